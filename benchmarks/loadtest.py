@@ -0,0 +1,576 @@
+"""
+End-to-end load test of the send path.
+
+Starts local stand-ins for the GitHub REST API, the Telegram Bot API and
+Discord webhooks, then drives ``SendIssue``/``SendPR`` through the real
+gateways at a fixed event rate and prints one JSON line with the
+throughput, the latency percentiles and the retries it took:
+
+    python benchmarks/loadtest.py --rate 20 --duration 30
+    python benchmarks/loadtest.py --latency 0.2 --rate-limit 1 --error-rate 0.05
+
+Events are started on schedule whether or not the previous ones are
+done, and latencies are measured from the scheduled start, so a send
+path that falls behind shows up as growing latencies rather than as a
+lower request rate.
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import http.server
+import itertools
+import json
+import math
+import os
+import pathlib
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+
+ROOT: typing.Final = pathlib.Path(__file__).resolve().parent.parent
+CORPUS: typing.Final = ROOT / "benchmarks" / "corpus"
+sys.path.insert(0, str(ROOT))
+
+from notifier.application import metrics
+from notifier.application.dispatcher import Dispatcher
+from notifier.application.document import (
+    RENDER_BACKEND_LXML,
+    RENDER_BACKENDS,
+)
+from notifier.application.interactors import SendIssue, SendPR
+from notifier.application.interfaces import Notifier
+from notifier.application.services import RenderService
+from notifier.infrastructure.discord_gateway import DiscordGateway
+from notifier.infrastructure.github_gateway import GithubGateway
+from notifier.infrastructure.http_client import HttpClient
+from notifier.infrastructure.rate_limiter import RateLimiter
+from notifier.infrastructure.retry import RETRY_DEADLINE_DEFAULT
+from notifier.infrastructure.telegram_gateway import (
+    TG_MESSAGE_LIMIT_DEFAULT,
+    TelegramGateway,
+)
+
+RATE_DEFAULT: typing.Final = 10.0
+DURATION_DEFAULT: typing.Final = 10.0
+DESTINATIONS_DEFAULT: typing.Final = 10
+CONCURRENCY_DEFAULT: typing.Final = 64
+LATENCY_DEFAULT: typing.Final = 0.05
+ATTEMPT_COUNT_DEFAULT: typing.Final = 3
+LABELS: typing.Final = ["bug", "high-priority"]
+
+JsonObject = dict[str, typing.Any]
+# status, extra headers and JSON body of a stand-in's response
+Reply = tuple[int, dict[str, str], JsonObject]
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Behaviour:
+    """How a stand-in answers, besides answering correctly."""
+
+    latency: float = 0.0
+    # the latency varies by up to this much either way
+    jitter: float = 0.0
+    # share of requests answered with a 500
+    error_rate: float = 0.0
+    # requests per second accepted per chat, webhook or token; 0 for all
+    rate_limit: int = 0
+
+
+@dataclasses.dataclass
+class ServerStats:
+    requests: int = 0
+    throttled: int = 0
+    errors: int = 0
+
+
+class StandIn(http.server.ThreadingHTTPServer):
+    """
+    A local HTTP server playing one of the services. Subclasses answer
+    the requests; latency, 429s and errors are added here the same way
+    for all of them.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, behaviour: Behaviour) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.behaviour = behaviour
+        self.stats = ServerStats()
+        self._windows: dict[str, tuple[int, int]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def respond(self, method: str, path: str, payload: JsonObject) -> Reply:
+        behaviour = self.behaviour
+        delay = behaviour.latency + random.uniform(
+            -behaviour.jitter, behaviour.jitter,
+        )
+        time.sleep(max(delay, 0.0))
+
+        retry_after = self._admit(self.rate_key(path, payload))
+        with self._lock:
+            self.stats.requests += 1
+            if retry_after is not None:
+                self.stats.throttled += 1
+            elif random.random() < behaviour.error_rate:
+                self.stats.errors += 1
+                return 500, {}, self.error()
+        if retry_after is not None:
+            return self.throttle(retry_after)
+        return self.reply(method, path, payload)
+
+    def next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def rate_key(self, path: str, payload: JsonObject) -> str:
+        return path
+
+    def reply(self, method: str, path: str, payload: JsonObject) -> Reply:
+        raise NotImplementedError
+
+    def throttle(self, retry_after: float) -> Reply:
+        return 429, {"Retry-After": str(math.ceil(retry_after))}, {}
+
+    def error(self) -> JsonObject:
+        return {"message": "Internal Server Error"}
+
+    def _admit(self, key: str) -> float | None:
+        """Seconds until ``key`` may be sent again, if it's over the limit."""
+        limit = self.behaviour.rate_limit
+        if not limit:
+            return None
+        now = time.monotonic()
+        # fixed one-second windows
+        window = int(now)
+        with self._lock:
+            start, count = self._windows.get(key, (window, 0))
+            if start != window:
+                start, count = window, 0
+            if count >= limit:
+                return start + 1 - now
+            self._windows[key] = (start, count + 1)
+        return None
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    # keep-alive, like the real services
+    protocol_version = "HTTP/1.1"
+    server: StandIn
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_POST(self) -> None:
+        self._handle()
+
+    def do_PATCH(self) -> None:
+        self._handle()
+
+    def do_DELETE(self) -> None:
+        self._handle()
+
+    def log_message(self, format: str, *args: typing.Any) -> None:
+        pass
+
+    def _handle(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        payload = json.loads(raw) if raw else {}
+        status, headers, body = self.server.respond(
+            self.command, self.path, payload,
+        )
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeGithub(StandIn):
+    """``GET /repos/{owner}/{repo}/issues|pulls/{number}``, HTML bodies."""
+
+    EVENT_PATH: typing.Final = re.compile(
+        r"/repos/([^/]+/[^/]+)/(issues|pulls)/(\d+)$",
+    )
+
+    def __init__(self, behaviour: Behaviour, bodies: list[str]) -> None:
+        super().__init__(behaviour)
+        self._bodies = bodies
+
+    def rate_key(self, path: str, payload: JsonObject) -> str:
+        # GitHub limits by token, and there is one
+        return "token"
+
+    def reply(self, method: str, path: str, payload: JsonObject) -> Reply:
+        match = self.EVENT_PATH.match(path)
+        if method != "GET" or match is None:
+            return 404, {}, {"message": "Not Found"}
+        repository, kind, number = match.groups()
+        html_url = f"https://github.com/{repository}/{kind[:-1]}/{number}"
+        data: JsonObject = {
+            "number": int(number),
+            "title": f"Load test event {number}",
+            "labels": [{"name": label} for label in LABELS],
+            "html_url": html_url,
+            "user": {"login": "octocat"},
+            "body_html": self._bodies[int(number) % len(self._bodies)],
+        }
+        if kind == "pulls":
+            data.update(
+                additions=10,
+                deletions=3,
+                head={"label": "octocat:feature"},
+                base={"ref": "main", "repo": {"full_name": repository}},
+            )
+        return 200, {"ETag": f'"{number}"'}, data
+
+    def throttle(self, retry_after: float) -> Reply:
+        status, headers, _ = super().throttle(retry_after)
+        return status, headers, {"message": "API rate limit exceeded"}
+
+
+class FakeTelegram(StandIn):
+    """``POST /bot{token}/{method}`` of the Bot API, limited per chat."""
+
+    def rate_key(self, path: str, payload: JsonObject) -> str:
+        return str(payload.get("chat_id"))
+
+    def reply(self, method: str, path: str, payload: JsonObject) -> Reply:
+        if path.endswith("/deleteMessage"):
+            return 200, {}, {"ok": True, "result": True}
+        message_id = payload.get("message_id") or self.next_id()
+        return 200, {}, {"ok": True, "result": {"message_id": message_id}}
+
+    def throttle(self, retry_after: float) -> Reply:
+        # Telegram only says how long to wait in the body, in whole seconds
+        seconds = math.ceil(retry_after)
+        return 429, {}, {
+            "ok": False,
+            "error_code": 429,
+            "description": f"Too Many Requests: retry after {seconds}",
+            "parameters": {"retry_after": seconds},
+        }
+
+    def error(self) -> JsonObject:
+        return {
+            "ok": False,
+            "error_code": 500,
+            "description": "Internal Server Error",
+        }
+
+
+class FakeDiscord(StandIn):
+    """Discord webhook executions and message edits, limited per webhook."""
+
+    WEBHOOK_PATH: typing.Final = re.compile(r"/api/webhooks/[^/]+/[^/?]+")
+
+    def rate_key(self, path: str, payload: JsonObject) -> str:
+        match = self.WEBHOOK_PATH.match(path)
+        return match[0] if match is not None else path
+
+    def reply(self, method: str, path: str, payload: JsonObject) -> Reply:
+        if method == "PATCH":
+            message_id = path.split("?", 1)[0].rsplit("/", 1)[-1]
+            return 200, {}, {"id": message_id}
+        return 200, {}, {"id": str(self.next_id())}
+
+    def throttle(self, retry_after: float) -> Reply:
+        return 429, {"Retry-After": f"{retry_after:.3f}"}, {
+            "message": "You are being rate limited.",
+            "retry_after": round(retry_after, 3),
+            "global": False,
+        }
+
+
+@dataclasses.dataclass(frozen=True)
+class EventResult:
+    latency: float
+    ok: bool
+
+
+class LoadTest:
+    """Gateways wired to the stand-ins, and the events sent through them."""
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        github: FakeGithub,
+        telegram: FakeTelegram,
+        discord: FakeDiscord,
+    ) -> None:
+        self._github = github
+        self._http_client = HttpClient(pool_maxsize=args.concurrency)
+        rate_limiter = RateLimiter()
+        self._render_service = RenderService(
+            custom_labels=["extra"],
+            join_input_with_list=False,
+            backend=args.backend,
+        )
+        self._dispatcher = Dispatcher()
+        # one chat and one webhook per destination, each with its own
+        # rate limits; events go to them in turn
+        self._destinations: list[list[Notifier]] = [
+            [
+                TelegramGateway(
+                    chat_id=str(1000 + index),
+                    bot_token="123:token",
+                    attempt_count=args.attempt_count,
+                    tg_message_limit=TG_MESSAGE_LIMIT_DEFAULT,
+                    http_client=self._http_client,
+                    rate_limiter=rate_limiter,
+                    retry_deadline=args.retry_deadline,
+                    api_url=telegram.url,
+                ),
+                DiscordGateway(
+                    webhook_url=f"{discord.url}/api/webhooks/{index}/token",
+                    attempt_count=args.attempt_count,
+                    http_client=self._http_client,
+                    rate_limiter=rate_limiter,
+                    retry_deadline=args.retry_deadline,
+                ),
+            ]
+            for index in range(args.destinations)
+        ]
+
+    def send(self, number: int) -> None:
+        """Handle one event, alternately an issue and a pull request."""
+        interactor_class = SendPR if number % 2 else SendIssue
+        kind = "pulls" if number % 2 else "issues"
+        github = GithubGateway(
+            token="token",
+            event_url=f"{self._github.url}/repos/org/repo/{kind}/{number}",
+            http_client=self._http_client,
+        )
+        interactor_class(
+            github=github,
+            notifiers=self._destinations[number % len(self._destinations)],
+            render_service=self._render_service,
+            dispatcher=self._dispatcher,
+        ).handler()
+
+    def close(self) -> None:
+        self._http_client.close()
+
+
+def drive(
+    load_test: LoadTest,
+    rate: float,
+    count: int,
+    concurrency: int,
+) -> tuple[list[EventResult], float]:
+    """
+    Start ``count`` events ``rate`` times a second. Returns their results
+    and the seconds from the first start to the last completion.
+    """
+
+    def run(number: int, scheduled: float) -> EventResult:
+        try:
+            load_test.send(number)
+        except Exception:  # noqa: BLE001
+            ok = False
+        else:
+            ok = True
+        return EventResult(latency=time.perf_counter() - scheduled, ok=ok)
+
+    futures: list[Future[EventResult]] = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        for number in range(count):
+            scheduled = started + number / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(run, number, scheduled))
+        results = [future.result() for future in futures]
+    return results, time.perf_counter() - started
+
+
+def percentiles(values: list[float]) -> JsonObject:
+    if not values:
+        return {}
+    if len(values) == 1:
+        cuts = values * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p90_ms": round(cuts[89] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2),
+    }
+
+
+def report(
+    args: argparse.Namespace,
+    results: list[EventResult],
+    elapsed: float,
+    servers: dict[str, StandIn],
+) -> JsonObject:
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    spans = snapshot["spans"]
+    delivered = sum(result.ok for result in results)
+    return {
+        "rate": args.rate,
+        "events": len(results),
+        "failed": len(results) - delivered,
+        "elapsed_s": round(elapsed, 3),
+        # events delivered everywhere, per second
+        "throughput": round(delivered / elapsed, 2) if elapsed else 0.0,
+        "latency": percentiles([result.latency for result in results]),
+        "attempts": {
+            name: int(spans[name]["count"])
+            for name in ("telegram.send", "discord.send")
+            if name in spans
+        },
+        "retries": int(counters.get("send.retries", 0)),
+        "throttled": int(counters.get("send.throttled", 0)),
+        "send_failed": int(counters.get("send.failed", 0)),
+        "servers": {
+            name: dataclasses.asdict(server.stats)
+            for name, server in servers.items()
+        },
+    }
+
+
+def load_bodies() -> list[str]:
+    return [
+        path.read_text(encoding="utf-8")
+        for path in sorted(CORPUS.glob("*.html"))
+    ]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Load test the send path against local stand-ins.",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=RATE_DEFAULT,
+        help="events started per second (default: 10)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=DURATION_DEFAULT,
+        help="seconds to start events for (default: 10)",
+    )
+    parser.add_argument(
+        "--destinations",
+        type=int,
+        default=DESTINATIONS_DEFAULT,
+        help="Telegram chats and Discord webhooks to spread events over",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=CONCURRENCY_DEFAULT,
+        help="events handled at the same time at most",
+    )
+    parser.add_argument(
+        "--attempt-count", type=int, default=ATTEMPT_COUNT_DEFAULT,
+    )
+    parser.add_argument(
+        "--retry-deadline", type=float, default=RETRY_DEADLINE_DEFAULT,
+    )
+    parser.add_argument(
+        "--backend", choices=RENDER_BACKENDS, default=RENDER_BACKEND_LXML,
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=LATENCY_DEFAULT,
+        help="seconds the Telegram and Discord stand-ins take to answer",
+    )
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="share of Telegram and Discord requests answered with a 500",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=0,
+        help="requests per second per chat or webhook before a 429",
+    )
+    parser.add_argument(
+        "--github-latency", type=float, default=LATENCY_DEFAULT,
+    )
+    parser.add_argument("--github-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--github-rate-limit",
+        type=int,
+        default=0,
+        help="GitHub requests per second before a 429",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    platform = Behaviour(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+    )
+    github = FakeGithub(
+        Behaviour(
+            latency=args.github_latency,
+            jitter=args.jitter,
+            error_rate=args.github_error_rate,
+            rate_limit=args.github_rate_limit,
+        ),
+        load_bodies(),
+    )
+    telegram = FakeTelegram(platform)
+    discord = FakeDiscord(platform)
+    servers: dict[str, StandIn] = {
+        "github": github,
+        "telegram": telegram,
+        "discord": discord,
+    }
+    for server in servers.values():
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    load_test = LoadTest(args, github, telegram, discord)
+    metrics.reset()
+    try:
+        # gateways print diagnostics on every call, keep stdout for results
+        with (
+            open(os.devnull, "w") as devnull,
+            contextlib.redirect_stdout(devnull),
+            contextlib.redirect_stderr(devnull),
+        ):
+            results, elapsed = drive(
+                load_test,
+                args.rate,
+                max(round(args.rate * args.duration), 1),
+                args.concurrency,
+            )
+    finally:
+        load_test.close()
+        for server in servers.values():
+            server.shutdown()
+            server.server_close()
+
+    print(json.dumps(report(args, results, elapsed, servers)), flush=True)
@@ -0,0 +1,190 @@
+"""
+Rendering backend parity check.
+
+Renders the ``body_html`` samples in ``benchmarks/corpus`` (and any HTML
+files given on the command line) with every rendering backend and
+compares what each platform would be sent: the parsed body, the Telegram
+text and entities, whole and split into parts, and the Discord markdown.
+Prints one JSON line per (sample, output) and exits 1 if a backend
+differs from the lxml one:
+
+    python benchmarks/parity.py
+    python benchmarks/parity.py bodies/*.html
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import pathlib
+import sys
+import typing
+from collections.abc import Callable
+
+ROOT: typing.Final = pathlib.Path(__file__).resolve().parent.parent
+CORPUS: typing.Final = ROOT / "benchmarks" / "corpus"
+sys.path.insert(0, str(ROOT))
+
+from notifier.application.document import (
+    RENDER_BACKEND_LXML,
+    RENDER_BACKENDS,
+    Document,
+)
+from notifier.application.services import RenderService
+from notifier.domain.entities import Issue
+from notifier.infrastructure.discord_gateway import DiscordGateway
+from notifier.infrastructure.http_client import HttpClient
+from notifier.infrastructure.rate_limiter import RateLimiter
+from notifier.infrastructure.telegram_gateway import (
+    TG_MESSAGE_LIMIT_DEFAULT,
+    TelegramGateway,
+)
+
+# small enough for most samples to be cut into several parts
+SPLIT_LIMIT: typing.Final = 1024
+LABELS: typing.Final = ["Bug Report", "high-priority", "Багрепорт"]
+
+# an output renders a parsed body the way one platform sends it
+Output = Callable[[Document, str], object]
+
+
+def _telegram_gateway(
+    tg_message_limit: int,
+    split_messages: bool = False,
+) -> TelegramGateway:
+    return TelegramGateway(
+        chat_id="-100123",
+        bot_token="123:token",
+        attempt_count=1,
+        tg_message_limit=tg_message_limit,
+        http_client=HttpClient(),
+        rate_limiter=RateLimiter(),
+        split_messages=split_messages,
+    )
+
+
+def _discord_gateway() -> DiscordGateway:
+    return DiscordGateway(
+        webhook_url="https://discord.com/api/webhooks/1/token",
+        attempt_count=1,
+        http_client=HttpClient(),
+        rate_limiter=RateLimiter(),
+    )
+
+
+def _issue(body: str) -> Issue:
+    return Issue(
+        id=12,
+        title="Crash on start",
+        labels=LABELS,
+        url="https://github.com/org/repo/issues/12",
+        user="octocat",
+        body=body,
+    )
+
+
+def _telegram_output(gateway: TelegramGateway) -> Output:
+    def output(document: Document, labels: str) -> object:
+        template, payload = gateway._issue_payload(
+            _issue(document.html), document, labels,
+        )
+        return [
+            {"text": message.text, "entities": message.entities}
+            for message in gateway._create_messages(template, payload)
+        ]
+
+    return output
+
+
+def _discord_output(document: Document, labels: str) -> object:
+    gateway = _discord_gateway()
+    return gateway._create_description(
+        gateway._html_to_markdown(document), labels,
+    )
+
+
+OUTPUTS: typing.Final[dict[str, Output]] = {
+    "Document.html": lambda document, labels: document.html,
+    "Document.text": lambda document, labels: document.text,
+    "TelegramGateway": _telegram_output(
+        _telegram_gateway(TG_MESSAGE_LIMIT_DEFAULT),
+    ),
+    "TelegramGateway[split_messages]": _telegram_output(
+        _telegram_gateway(SPLIT_LIMIT, split_messages=True),
+    ),
+    "DiscordGateway": _discord_output,
+}
+
+
+def load_samples(paths: list[str]) -> dict[str, str]:
+    files = [pathlib.Path(path) for path in paths]
+    if not files:
+        files = sorted(CORPUS.glob("*.html"))
+    return {path.stem: path.read_text(encoding="utf-8") for path in files}
+
+
+def render(
+    body: str,
+    backend: str,
+    join_input_with_list: bool,
+) -> dict[str, object]:
+    render_service = RenderService(
+        custom_labels=["extra"],
+        join_input_with_list=join_input_with_list,
+        backend=backend,
+    )
+    document = render_service.format_body(body)
+    labels = render_service.format_labels(LABELS)
+    return {
+        name: output(document, labels) for name, output in OUTPUTS.items()
+    }
+
+
+def run(samples: dict[str, str]) -> typing.Iterator[dict[str, typing.Any]]:
+    for sample, body in samples.items():
+        for join_input_with_list in (False, True):
+            # gateways print diagnostics on every call, keep stdout for results
+            with (
+                open(os.devnull, "w") as devnull,
+                contextlib.redirect_stdout(devnull),
+                contextlib.redirect_stderr(devnull),
+            ):
+                rendered = {
+                    backend: render(body, backend, join_input_with_list)
+                    for backend in RENDER_BACKENDS
+                }
+            expected = rendered[RENDER_BACKEND_LXML]
+            for name in OUTPUTS:
+                yield {
+                    "sample": sample,
+                    "join_input_with_list": join_input_with_list,
+                    "output": name,
+                    "differs": [
+                        backend
+                        for backend, outputs in rendered.items()
+                        if outputs[name] != expected[name]
+                    ],
+                }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare rendering backends on GitHub bodies.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="PATH",
+        help="HTML bodies to render instead of the benchmark corpus",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    mismatches = 0
+    for result in run(load_samples(args.paths)):
+        mismatches += bool(result["differs"])
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,269 @@
+"""
+Rendering micro-benchmarks.
+
+Times the hot paths between the GitHub response and the platform payload
+on the ``body_html`` samples in ``benchmarks/corpus`` and prints one JSON
+line per (benchmark, sample). Results of another run can be passed with
+``--compare`` to fail on regressions:
+
+    python benchmarks/rendering.py > baseline.jsonl
+    python benchmarks/rendering.py --compare baseline.jsonl
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import pathlib
+import statistics
+import sys
+import timeit
+import typing
+from collections.abc import Callable
+
+ROOT: typing.Final = pathlib.Path(__file__).resolve().parent.parent
+CORPUS: typing.Final = ROOT / "benchmarks" / "corpus"
+sys.path.insert(0, str(ROOT))
+
+from notifier.application.services import RenderService
+from notifier.domain.entities import Issue
+from notifier.infrastructure.discord_gateway import DiscordGateway
+from notifier.infrastructure.http_client import HttpClient
+from notifier.infrastructure.rate_limiter import RateLimiter
+from notifier.infrastructure.telegram_gateway import (
+    ISSUE_TEMPLATE,
+    TG_MESSAGE_LIMIT_DEFAULT,
+    TelegramGateway,
+)
+
+REPEAT_DEFAULT: typing.Final = 5
+THRESHOLD_DEFAULT: typing.Final = 0.2
+LABELS: typing.Final = [
+    "Bug Report",
+    "high-priority",
+    "Feature Request!!!",
+    "Version 2.0",
+    "Critical Bug - Urgent!!!",
+    "Багрепорт",
+    "already_normalized",
+    "Test@#$%^&*()Label",
+]
+
+# a benchmark prepares everything it needs from a sample body and
+# returns the call being measured
+Benchmark = Callable[[str], Callable[[], object]]
+
+
+def _render_service(join_input_with_list: bool = False) -> RenderService:
+    return RenderService(
+        custom_labels=["extra"],
+        join_input_with_list=join_input_with_list,
+    )
+
+
+def _issue(body: str) -> Issue:
+    return Issue(
+        id=12,
+        title="Crash on start",
+        labels=LABELS,
+        url="https://github.com/org/repo/issues/12",
+        user="octocat",
+        body=body,
+    )
+
+
+def bench_format_body(body: str) -> Callable[[], object]:
+    render_service = _render_service()
+    return lambda: render_service.format_body(body)
+
+
+def bench_format_body_join_input_with_list(body: str) -> Callable[[], object]:
+    render_service = _render_service(join_input_with_list=True)
+    return lambda: render_service.format_body(body)
+
+
+def bench_format_labels(body: str) -> Callable[[], object]:
+    render_service = _render_service()
+    return lambda: render_service.format_labels(LABELS)
+
+
+def bench_telegram_message(body: str) -> Callable[[], object]:
+    render_service = _render_service()
+    gateway = TelegramGateway(
+        chat_id="-100123",
+        bot_token="123:token",
+        attempt_count=1,
+        tg_message_limit=TG_MESSAGE_LIMIT_DEFAULT,
+        http_client=HttpClient(),
+        rate_limiter=RateLimiter(),
+    )
+    issue = _issue(body)
+    payload = {
+        "id": issue.id,
+        "user": issue.user,
+        "title": issue.title,
+        "labels": render_service.format_labels(issue.labels),
+        "url": issue.url,
+        "body": render_service.format_body(issue.body),
+        "repository": issue.repository,
+        "promo": "<a href='/reagento/relator'>sent via relator</a>",
+    }
+    return lambda: gateway._create_message_with_limit(ISSUE_TEMPLATE, payload)
+
+
+def _discord_gateway() -> DiscordGateway:
+    return DiscordGateway(
+        webhook_url="https://discord.com/api/webhooks/1/token",
+        attempt_count=1,
+        http_client=HttpClient(),
+        rate_limiter=RateLimiter(),
+    )
+
+
+def bench_discord_markdown(body: str) -> Callable[[], object]:
+    gateway = _discord_gateway()
+    document = _render_service().format_body(body)
+    return lambda: gateway._html_to_markdown(document)
+
+
+def bench_discord_description(body: str) -> Callable[[], object]:
+    render_service = _render_service()
+    gateway = _discord_gateway()
+    markdown = gateway._html_to_markdown(render_service.format_body(body))
+    labels = render_service.format_labels(LABELS)
+    return lambda: gateway._create_description(markdown, labels)
+
+
+BENCHMARKS: typing.Final[dict[str, Benchmark]] = {
+    "RenderService.format_body": bench_format_body,
+    "RenderService.format_body[join_input_with_list]": (
+        bench_format_body_join_input_with_list
+    ),
+    "TelegramGateway._create_message_with_limit": bench_telegram_message,
+    "DiscordGateway._html_to_markdown": bench_discord_markdown,
+    "DiscordGateway._create_description": bench_discord_description,
+}
+# benchmarks that don't depend on the body run once, not per sample
+UNIFORM_BENCHMARKS: typing.Final[dict[str, Benchmark]] = {
+    "RenderService.format_labels": bench_format_labels,
+}
+
+
+def load_corpus() -> dict[str, str]:
+    return {
+        path.stem: path.read_text(encoding="utf-8")
+        for path in sorted(CORPUS.glob("*.html"))
+    }
+
+
+def measure(
+    name: str,
+    sample: str,
+    call: Callable[[], object],
+    repeat: int,
+) -> dict[str, typing.Any]:
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    timings = [
+        total / number * 1_000_000 for total in timer.repeat(repeat, number)
+    ]
+    return {
+        "benchmark": name,
+        "sample": sample,
+        "number": number,
+        "repeat": repeat,
+        "min_us": round(min(timings), 2),
+        "median_us": round(statistics.median(timings), 2),
+    }
+
+
+def run(
+    corpus: dict[str, str],
+    selected: str | None,
+    repeat: int,
+) -> typing.Iterator[dict[str, typing.Any]]:
+    cases = [
+        (name, sample, benchmark, body)
+        for name, benchmark in BENCHMARKS.items()
+        for sample, body in corpus.items()
+    ] + [
+        (name, "-", benchmark, "")
+        for name, benchmark in UNIFORM_BENCHMARKS.items()
+    ]
+    for name, sample, benchmark, body in cases:
+        if selected and selected not in name:
+            continue
+        # gateways print diagnostics on every call, keep stdout for results
+        with (
+            open(os.devnull, "w") as devnull,
+            contextlib.redirect_stdout(devnull),
+            contextlib.redirect_stderr(devnull),
+        ):
+            result = measure(name, sample, benchmark(body), repeat)
+        yield result
+
+
+def compare(
+    results: list[dict[str, typing.Any]],
+    baseline_path: str,
+    threshold: float,
+) -> list[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {
+            (record["benchmark"], record["sample"]): record
+            for record in map(json.loads, f)
+        }
+
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["benchmark"], result["sample"]))
+        if previous is None:
+            continue
+        # min is the least noisy estimate of what the code itself costs
+        ratio = result["min_us"] / previous["min_us"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{result['benchmark']} on {result['sample']}: "
+                f"{previous['min_us']}us -> {result['min_us']}us "
+                f"(+{(ratio - 1) * 100:.0f}%)",
+            )
+    return regressions
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark rendering of GitHub bodies.",
+    )
+    parser.add_argument(
+        "-k",
+        dest="selected",
+        help="only run benchmarks whose name contains this string",
+    )
+    parser.add_argument("--repeat", type=int, default=REPEAT_DEFAULT)
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        help="JSON lines of a previous run; exit 1 on regressions",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD_DEFAULT,
+        help="allowed slowdown relative to the baseline (default: 0.2)",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    results = []
+    for result in run(load_corpus(), args.selected, args.repeat):
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,144 @@
+"""
+Cold start benchmark.
+
+Runs ``python -X importtime`` in a fresh interpreter for the common
+configurations, importing the entry point and building the gateways the
+same way ``python -m notifier`` does, and prints one JSON line per
+configuration:
+
+    python benchmarks/startup.py --runs 5 > startup.jsonl
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+import typing
+
+ROOT: typing.Final = pathlib.Path(__file__).resolve().parent.parent
+
+CONFIGURATIONS: typing.Final[dict[str, dict[str, str]]] = {
+    "telegram": {
+        "TELEGRAM_BOT_TOKEN": "123:token",
+        "TELEGRAM_CHAT_ID": "-100123",
+    },
+    "discord": {
+        "DISCORD_WEBHOOK_URL": "https://discord.com/api/webhooks/1/token",
+    },
+    "both": {
+        "TELEGRAM_BOT_TOKEN": "123:token",
+        "TELEGRAM_CHAT_ID": "-100123",
+        "DISCORD_WEBHOOK_URL": "https://discord.com/api/webhooks/1/token",
+    },
+}
+
+STARTUP_CODE: typing.Final = """
+from notifier.factory import (
+    create_dispatcher,
+    create_http_client,
+    create_notifiers,
+    create_render_service,
+)
+
+create_notifiers(create_http_client())
+create_render_service()
+create_dispatcher()
+"""
+
+# modules whose import cost is reported separately when they get loaded
+TRACKED_MODULES: typing.Final = (
+    "requests",
+    "bs4",
+    "lxml",
+    "sulguk",
+    "markdownify",
+    "notifier.factory",
+)
+
+
+def measure(env: dict[str, str]) -> tuple[float, list[tuple[int, str, int]]]:
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+        cwd=ROOT,
+        env={
+            **{
+                name: value
+                for name, value in os.environ.items()
+                if not name.startswith(("TELEGRAM_", "DISCORD_"))
+            },
+            **env,
+            "PYTHONPATH": str(ROOT),
+        },
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - started
+    return elapsed, parse_importtime(process.stderr)
+
+
+def parse_importtime(output: str) -> list[tuple[int, str, int]]:
+    """(depth, module, cumulative microseconds) for every imported module."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((depth, name.strip(), int(cumulative)))
+    return modules
+
+
+def run(name: str, env: dict[str, str], runs: int) -> dict[str, typing.Any]:
+    wall = []
+    imports = []
+    tracked: dict[str, list[int]] = {}
+    for _ in range(runs):
+        elapsed, modules = measure(env)
+        wall.append(elapsed)
+        # nested imports are already included in their parents
+        imports.append(sum(value for depth, _, value in modules if depth == 0))
+        for _, module, value in modules:
+            if module in TRACKED_MODULES:
+                tracked.setdefault(module, []).append(value)
+
+    return {
+        "configuration": name,
+        "runs": runs,
+        "wall_ms": round(statistics.median(wall) * 1000, 2),
+        "imports_ms": round(statistics.median(imports) / 1000, 2),
+        "modules_ms": {
+            module: round(statistics.median(values) / 1000, 2)
+            for module, values in sorted(tracked.items())
+        },
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure cold start of the notifier.",
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "configurations",
+        nargs="*",
+        metavar="configuration",
+        help=f"one of {', '.join(CONFIGURATIONS)}; all by default",
+    )
+    args = parser.parse_args(argv)
+    for name in args.configurations:
+        if name not in CONFIGURATIONS:
+            parser.error(f"unknown configuration: {name}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    for name in args.configurations or CONFIGURATIONS:
+        result = run(name, CONFIGURATIONS[name], args.runs)
+        print(json.dumps(result), flush=True)
@@ -0,0 +1,139 @@
+import dataclasses
+import sys
+import threading
+import traceback
+import typing
+
+from notifier.application import interfaces
+from notifier.domain.entities import Issue, PullRequest
+
+if typing.TYPE_CHECKING:
+    from notifier.application.document import Document
+
+DIGEST_MAX_EVENTS_DEFAULT: typing.Final = 20
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class DigestItem:
+    event: Issue | PullRequest
+    formatted_body: "Document"
+    formatted_labels: str
+
+
+class DigestNotifier(interfaces.Notifier):
+    """
+    Collects the events for one destination for ``window`` seconds
+    after the first of them, or until there are ``max_events``, and
+    sends them as a single digest. A window with one event is sent as
+    the usual message.
+
+    ``send_issue`` and ``send_pull_request`` return once the event is
+    queued; errors of a digest are reported when it is sent, and raised
+    by ``flush``.
+    """
+
+    def __init__(
+        self,
+        notifier: interfaces.Notifier,
+        window: float,
+        max_events: int = DIGEST_MAX_EVENTS_DEFAULT,
+    ) -> None:
+        self._notifier = notifier
+        self._window = window
+        self._max_events = max_events
+        self._pending: list[DigestItem] = []
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def destination(self) -> str:
+        return self._notifier.destination
+
+    def send_issue(
+        self,
+        issue: Issue,
+        formatted_body: "Document",
+        formatted_labels: str,
+    ) -> None:
+        self._add(
+            DigestItem(
+                event=issue,
+                formatted_body=formatted_body,
+                formatted_labels=formatted_labels,
+            ),
+        )
+
+    def send_pull_request(
+        self,
+        pull_request: PullRequest,
+        formatted_body: "Document",
+        formatted_labels: str,
+    ) -> None:
+        self._add(
+            DigestItem(
+                event=pull_request,
+                formatted_body=formatted_body,
+                formatted_labels=formatted_labels,
+            ),
+        )
+
+    def send_digest(self, items: typing.Sequence[DigestItem]) -> None:
+        self._notifier.send_digest(items)
+
+    def flush(self) -> None:
+        """Send what is queued now, e.g. before shutting down."""
+        self._send(self._take())
+
+    def _add(self, item: DigestItem) -> None:
+        items = []
+        with self._lock:
+            self._pending.append(item)
+            if len(self._pending) >= self._max_events:
+                items = self._take_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(
+                    self._window, lambda: self._deliver(self._take()),
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        self._deliver(items)
+
+    def _take(self) -> list[DigestItem]:
+        with self._lock:
+            return self._take_locked()
+
+    def _take_locked(self) -> list[DigestItem]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._pending = self._pending, []
+        return items
+
+    def _send(self, items: list[DigestItem]) -> None:
+        if not items:
+            return
+        if len(items) > 1:
+            self._notifier.send_digest(items)
+        elif isinstance(items[0].event, Issue):
+            self._notifier.send_issue(
+                items[0].event,
+                items[0].formatted_body,
+                items[0].formatted_labels,
+            )
+        else:
+            self._notifier.send_pull_request(
+                items[0].event,
+                items[0].formatted_body,
+                items[0].formatted_labels,
+            )
+
+    def _deliver(self, items: list[DigestItem]) -> None:
+        try:
+            self._send(items)
+        except Exception as e:  # noqa: BLE001
+            print(
+                f"Error sending digest of {len(items)} events to "
+                f"{self.destination}: {e}",
+                file=sys.stderr,
+            )
+            traceback.print_exception(e, file=sys.stderr)
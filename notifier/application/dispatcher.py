@@ -0,0 +1,232 @@
+import asyncio
+import dataclasses
+import threading
+import time
+from collections.abc import Awaitable, Callable, Sequence
+
+from notifier.application import interfaces
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class DeliveryResult:
+    destination: str
+    elapsed: float
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class DispatchError(Exception):
+    def __init__(self, results: list[DeliveryResult]) -> None:
+        self.results = results
+        self.failures = [result for result in results if not result.ok]
+        details = "; ".join(
+            f"{result.destination}: {result.error!r}"
+            for result in self.failures
+        )
+        super().__init__(
+            f"{len(self.failures)} of {len(results)} notifiers failed: "
+            f"{details}",
+        )
+
+
+class NotifierTimeoutError(TimeoutError):
+    pass
+
+
+@dataclasses.dataclass
+class _Delivery:
+    destination: str
+    started: float
+    finished: float | None = None
+    timed_out: bool = False
+    error: BaseException | None = None
+
+
+class Dispatcher:
+    """
+    Fans a send out to every notifier at once and waits for all of them,
+    so one slow destination (or its retry sleeps) doesn't hold up the rest.
+
+    Each send runs in a daemon thread: a destination that overruns
+    ``timeout`` is reported as failed and abandoned instead of keeping
+    the process alive. With ``concurrent=False`` the notifiers are run
+    one after another, each with its own ``timeout``.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        *,
+        concurrent: bool = True,
+    ) -> None:
+        self._timeout = timeout
+        self._concurrent = concurrent
+
+    def dispatch(
+        self,
+        notifiers: Sequence[interfaces.Notifier],
+        send: Callable[[interfaces.Notifier], None],
+    ) -> list[DeliveryResult]:
+        deliveries: list[_Delivery] = []
+        if self._concurrent:
+            started = [
+                self._start(self._describe(index, notifier), notifier, send)
+                for index, notifier in enumerate(notifiers)
+            ]
+            deadline = self._deadline()
+            for delivery, thread in started:
+                self._wait(delivery, thread, deadline)
+                deliveries.append(delivery)
+        else:
+            for index, notifier in enumerate(notifiers):
+                delivery, thread = self._start(
+                    self._describe(index, notifier), notifier, send,
+                )
+                self._wait(delivery, thread, self._deadline())
+                deliveries.append(delivery)
+
+        results = [self._to_result(delivery) for delivery in deliveries]
+        if any(not result.ok for result in results):
+            raise DispatchError(results)
+        return results
+
+    def _start(
+        self,
+        destination: str,
+        notifier: interfaces.Notifier,
+        send: Callable[[interfaces.Notifier], None],
+    ) -> tuple[_Delivery, threading.Thread]:
+        delivery = _Delivery(destination=destination, started=time.monotonic())
+        thread = threading.Thread(
+            target=self._run,
+            args=(notifier, delivery, send),
+            name=f"notifier-{destination}",
+            daemon=True,
+        )
+        thread.start()
+        return delivery, thread
+
+    def _deadline(self) -> float | None:
+        if self._timeout is None:
+            return None
+        return time.monotonic() + self._timeout
+
+    def _wait(
+        self,
+        delivery: _Delivery,
+        thread: threading.Thread,
+        deadline: float | None,
+    ) -> None:
+        if deadline is None:
+            thread.join()
+        else:
+            thread.join(max(deadline - time.monotonic(), 0.0))
+        delivery.timed_out = thread.is_alive()
+
+    def _run(
+        self,
+        notifier: interfaces.Notifier,
+        delivery: _Delivery,
+        send: Callable[[interfaces.Notifier], None],
+    ) -> None:
+        try:
+            send(notifier)
+        except Exception as e:  # noqa: BLE001
+            delivery.error = e
+        finally:
+            delivery.finished = time.monotonic()
+
+    def _to_result(self, delivery: _Delivery) -> DeliveryResult:
+        if delivery.timed_out or delivery.finished is None:
+            return DeliveryResult(
+                destination=delivery.destination,
+                elapsed=time.monotonic() - delivery.started,
+                error=NotifierTimeoutError(
+                    f"no response within {self._timeout} seconds",
+                ),
+            )
+
+        return DeliveryResult(
+            destination=delivery.destination,
+            elapsed=delivery.finished - delivery.started,
+            error=delivery.error,
+        )
+
+    def _describe(self, index: int, notifier: interfaces.Notifier) -> str:
+        return f"{type(notifier).__name__}[{index}]"
+
+
+class AsyncDispatcher:
+    """
+    ``Dispatcher`` for asyncio notifiers: every send is a task on the
+    running loop and a destination that overruns ``timeout`` is
+    cancelled instead of abandoned.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        *,
+        concurrent: bool = True,
+    ) -> None:
+        self._timeout = timeout
+        self._concurrent = concurrent
+
+    async def dispatch(
+        self,
+        notifiers: Sequence[interfaces.AsyncNotifier],
+        send: Callable[[interfaces.AsyncNotifier], Awaitable[None]],
+    ) -> list[DeliveryResult]:
+        if self._concurrent:
+            results = list(await asyncio.gather(*(
+                self._deliver(self._describe(index, notifier), send(notifier))
+                for index, notifier in enumerate(notifiers)
+            )))
+        else:
+            results = [
+                await self._deliver(
+                    self._describe(index, notifier), send(notifier),
+                )
+                for index, notifier in enumerate(notifiers)
+            ]
+
+        if any(not result.ok for result in results):
+            raise DispatchError(results)
+        return results
+
+    async def _deliver(
+        self,
+        destination: str,
+        sending: Awaitable[None],
+    ) -> DeliveryResult:
+        started = time.monotonic()
+        error: BaseException | None = None
+        # asyncio.wait instead of wait_for: the timeout error wait_for
+        # raises is not the builtin TimeoutError before Python 3.11
+        task = asyncio.ensure_future(sending)
+        try:
+            await asyncio.wait({task}, timeout=self._timeout)
+        finally:
+            timed_out = task.cancel()
+        if timed_out:
+            await asyncio.wait({task})
+            error = NotifierTimeoutError(
+                f"no response within {self._timeout} seconds",
+            )
+        else:
+            error = task.exception()
+        return DeliveryResult(
+            destination=destination,
+            elapsed=time.monotonic() - started,
+            error=error,
+        )
+
+    def _describe(
+        self,
+        index: int,
+        notifier: interfaces.AsyncNotifier,
+    ) -> str:
+        return f"{type(notifier).__name__}[{index}]"
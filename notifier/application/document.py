@@ -0,0 +1,171 @@
+import abc
+import functools
+import hashlib
+import threading
+import typing
+from html.parser import HTMLParser
+
+if typing.TYPE_CHECKING:
+    from sulguk.entities import Group
+
+RENDER_BACKEND_LXML: typing.Final = "lxml"
+RENDER_BACKEND_STDLIB: typing.Final = "stdlib"
+RENDER_BACKENDS: typing.Final = (RENDER_BACKEND_LXML, RENDER_BACKEND_STDLIB)
+# relative links in bodies point to GitHub
+BASE_URL: typing.Final = "https://github.com"
+
+NESTED_TAGS: typing.Final = frozenset(
+    ("ol", "ul", "li", "table", "thead", "tbody", "tfoot", "tr", "td", "th"),
+)
+
+_TreeT = typing.TypeVar("_TreeT")
+
+
+class Document(abc.ABC, typing.Generic[_TreeT]):
+    """
+    Issue/PR body parsed once and shared by every gateway.
+
+    The tree must be treated as read-only: gateways render from it
+    concurrently, so anything that edits it has to work on a copy.
+    A document restored from a cache holds only the HTML and parses it
+    on first access to ``tree``, which renders served from the cache
+    never need.
+
+    Subclasses hold the tree of one rendering backend; both build the
+    same tree for the same HTML, so gateways render them alike.
+    """
+
+    backend: typing.ClassVar[str]
+
+    def __init__(
+        self,
+        tree: _TreeT | None = None,
+        *,
+        digest: str | None = None,
+    ) -> None:
+        self._tree = tree
+        self._html: str | None = None
+        self._digest = digest
+        self._entities: Group | None = None
+        self._lock = threading.Lock()
+        if tree is not None:
+            self._strip_nested_whitespace(tree)
+
+    @staticmethod
+    @abc.abstractmethod
+    def parse(html: str) -> _TreeT:
+        """Tree of ``html``, as lxml builds it."""
+
+    @classmethod
+    def placeholder(cls) -> "Document[_TreeT]":
+        return cls(cls._placeholder_tree())
+
+    @classmethod
+    def from_html(
+        cls,
+        html: str,
+        *,
+        digest: str | None = None,
+    ) -> "Document[_TreeT]":
+        """Document for HTML serialized from another document."""
+        document = cls(digest=digest)
+        document._html = html
+        return document
+
+    @property
+    def tree(self) -> _TreeT | None:
+        if self._tree is None and self._html:
+            with self._lock:
+                if self._tree is None:
+                    tree = self.parse(self._html)
+                    self._strip_nested_whitespace(tree)
+                    self._tree = tree
+        return self._tree
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = "" if self._tree is None else str(self._tree)
+        return self._html
+
+    @functools.cached_property
+    def text(self) -> str:
+        tree = self.tree
+        if tree is None:
+            return ""
+        return self._get_text(tree)
+
+    @property
+    def digest(self) -> str:
+        """Identifies the content for cache keys."""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.html.encode()).hexdigest()
+        return self._digest
+
+    def replay(self, parser: HTMLParser) -> None:
+        """
+        Feed the tree into an ``HTMLParser`` subclass as if it had
+        parsed ``self.html`` itself, without serializing or re-parsing.
+        """
+        tree = self.tree
+        if tree is not None:
+            self._replay(tree, parser)
+
+    def entities(self) -> "Group":
+        """
+        The tree as sulguk entities, built on first use. ``RenderService``
+        builds them to check that sulguk supports the markup, and the
+        Telegram gateway renders them inside its template. Rendering
+        doesn't change them, so gateways share them.
+
+        Raises ``ValueError`` for markup sulguk doesn't support.
+        """
+        if self._entities is None:
+            from sulguk.transformer import Transformer
+
+            transformer = Transformer(base_url=BASE_URL)
+            self.replay(transformer)
+            self._entities = transformer.root
+        return self._entities
+
+    def __str__(self) -> str:
+        return self.html
+
+    @staticmethod
+    @abc.abstractmethod
+    def _placeholder_tree() -> _TreeT:
+        """Tree serialized as ``<p></p>``."""
+
+    @staticmethod
+    @abc.abstractmethod
+    def _strip_nested_whitespace(tree: _TreeT) -> None:
+        """
+        Drop whitespace around the parts of ``NESTED_TAGS``. markdownify
+        drops these nodes while converting; doing it up front keeps the
+        shared tree from being mutated during rendering.
+        """
+
+    @staticmethod
+    @abc.abstractmethod
+    def _get_text(tree: _TreeT) -> str: ...
+
+    @staticmethod
+    @abc.abstractmethod
+    def _replay(tree: _TreeT, parser: HTMLParser) -> None: ...
+
+
+def document_type(backend: str) -> type[Document[typing.Any]]:
+    """The ``Document`` subclass of a rendering backend."""
+    # the backends are imported on first use, they dominate startup time
+    if backend == RENDER_BACKEND_LXML:
+        from notifier.application.soup_document import SoupDocument
+
+        return SoupDocument
+    if backend == RENDER_BACKEND_STDLIB:
+        from notifier.application.tree_document import TreeDocument
+
+        return TreeDocument
+    raise ValueError(
+        f"Unknown render backend {backend!r}, expected one of "
+        f"{', '.join(RENDER_BACKENDS)}",
+    )
@@ -0,0 +1,138 @@
+import typing
+from html.parser import HTMLParser
+
+# more than a Telegram series of the default 10 parts can show
+BODY_TEXT_LIMIT_DEFAULT: typing.Final = 64 * 1024
+FEED_CHUNK_SIZE: typing.Final = 64 * 1024
+TRIMMED_MARKER: typing.Final = "…"
+
+VOID_ELEMENTS: typing.Final = frozenset(
+    (
+        "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+        "meta", "source", "track", "wbr",
+    ),
+)
+
+
+def trim_html(html: str, limit: int) -> str | None:
+    """
+    The HTML without blob wrappers, cut after ``limit`` characters of
+    text, or None if it has neither. The input is consumed in chunks
+    and only up to the cut, so a giant body costs no more than the
+    part of it that is kept.
+    """
+    parser = _TrimmingParser(limit)
+    for start in range(0, len(html), FEED_CHUNK_SIZE):
+        parser.feed(html[start:start + FEED_CHUNK_SIZE])
+        if parser.trimmed:
+            break
+    else:
+        parser.close()
+    if not parser.trimmed and not parser.dropped:
+        return None
+    return "".join(parser.output)
+
+
+def _is_blob_wrapper(attrs: list[tuple[str, str | None]]) -> bool:
+    return any(
+        name == "class" and "blob-wrapper" in (value or "").split()
+        for name, value in attrs
+    )
+
+
+class _TrimmingParser(HTMLParser):
+    """
+    Writes the markup back as it comes, minus the subtrees of blob
+    wrappers, until the text in it reaches the limit. Unclosed tags are
+    left for the HTML parser that builds the tree.
+    """
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(convert_charrefs=False)
+        self.output: list[str] = []
+        self.trimmed = False
+        self.dropped = False
+        self._remaining = limit
+        self._skipped_tag: str | None = None
+        self._skipped_depth = 0
+
+    def handle_starttag(
+        self, tag: str, attrs: list[tuple[str, str | None]],
+    ) -> None:
+        if self.trimmed:
+            return
+        if self._skipped_tag is not None:
+            if tag == self._skipped_tag:
+                self._skipped_depth += 1
+        elif tag not in VOID_ELEMENTS and _is_blob_wrapper(attrs):
+            self._skipped_tag = tag
+            self._skipped_depth = 1
+            self.dropped = True
+        else:
+            self.output.append(self.get_starttag_text() or "")
+
+    def handle_startendtag(
+        self, tag: str, attrs: list[tuple[str, str | None]],
+    ) -> None:
+        if self.trimmed or self._skipped_tag is not None:
+            return
+        if _is_blob_wrapper(attrs):
+            self.dropped = True
+        else:
+            self.output.append(self.get_starttag_text() or "")
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.trimmed:
+            return
+        if self._skipped_tag is None:
+            self.output.append(f"</{tag}>")
+        elif tag == self._skipped_tag:
+            self._skipped_depth -= 1
+            if not self._skipped_depth:
+                self._skipped_tag = None
+
+    def handle_data(self, data: str) -> None:
+        if self.trimmed or self._skipped_tag is not None:
+            return
+        if self.cdata_elem is not None:
+            # script and style contents aren't shown
+            self.output.append(data)
+            return
+        if len(data) <= self._remaining:
+            self.output.append(data)
+            self._remaining -= len(data)
+            return
+        self.output.append(data[:self._remaining] + TRIMMED_MARKER)
+        self.trimmed = True
+
+    def handle_entityref(self, name: str) -> None:
+        self._write_char(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        self._write_char(f"&#{name};")
+
+    def handle_comment(self, data: str) -> None:
+        self._write_markup(f"<!--{data}-->")
+
+    def handle_decl(self, decl: str) -> None:
+        self._write_markup(f"<!{decl}>")
+
+    def handle_pi(self, data: str) -> None:
+        self._write_markup(f"<?{data}>")
+
+    def unknown_decl(self, data: str) -> None:
+        self._write_markup(f"<![{data}]>")
+
+    def _write_char(self, reference: str) -> None:
+        if self.trimmed or self._skipped_tag is not None:
+            return
+        if not self._remaining:
+            self.output.append(TRIMMED_MARKER)
+            self.trimmed = True
+            return
+        self.output.append(reference)
+        self._remaining -= 1
+
+    def _write_markup(self, markup: str) -> None:
+        if not self.trimmed and self._skipped_tag is None:
+            self.output.append(markup)
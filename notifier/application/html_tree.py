@@ -0,0 +1,667 @@
+import html
+import re
+import typing
+from collections.abc import Collection, Iterator
+from html.parser import HTMLParser
+
+DOCUMENT_NAME: typing.Final = "[document]"
+ASCII_WHITESPACE: typing.Final = " \n\t\x0c\r"
+
+# elements libxml2 never puts anything in
+VOID_ELEMENTS: typing.Final = frozenset(
+    (
+        "area", "base", "basefont", "br", "col", "frame", "hr", "img",
+        "input", "isindex", "link", "meta", "param",
+    ),
+)
+# elements serialized and replayed as ``<tag/>`` when empty
+EMPTY_ELEMENTS: typing.Final = frozenset(
+    (
+        *VOID_ELEMENTS, "bgsound", "command", "embed", "image", "keygen",
+        "menuitem", "nextid", "source", "spacer", "track", "wbr",
+    ),
+)
+HEAD_ELEMENTS: typing.Final = frozenset(
+    ("base", "link", "meta", "script", "style", "title"),
+)
+# text in these elements is taken as is, up to their end tag
+RAW_TEXT_ELEMENTS: typing.Final = frozenset(
+    ("iframe", "noembed", "noframes", "plaintext", "xmp"),
+)
+# the same, with character references decoded
+ESCAPABLE_RAW_TEXT_ELEMENTS: typing.Final = frozenset(("textarea", "title"))
+UNESCAPED_ELEMENTS: typing.Final = frozenset(("script", "style"))
+PRESERVE_WHITESPACE_ELEMENTS: typing.Final = frozenset(("pre", "textarea"))
+# text in these isn't part of the text content
+HIDDEN_TEXT_ELEMENTS: typing.Final = frozenset(
+    ("rp", "rt", "script", "style", "template"),
+)
+# attributes holding whitespace separated lists
+LIST_ATTRIBUTES: typing.Final[dict[str, frozenset[str]]] = {
+    "*": frozenset(("accesskey", "class", "dropzone")),
+    "a": frozenset(("rel", "rev")),
+    "area": frozenset(("rel",)),
+    "form": frozenset(("accept-charset",)),
+    "icon": frozenset(("sizes",)),
+    "iframe": frozenset(("sandbox",)),
+    "link": frozenset(("rel", "rev")),
+    "object": frozenset(("archive",)),
+    "output": frozenset(("for",)),
+    "td": frozenset(("headers",)),
+    "th": frozenset(("headers",)),
+}
+
+# libxml2's htmlStartClose: the open elements a start tag closes, if
+# they are the current one
+START_CLOSE: typing.Final[dict[str, frozenset[str]]] = {
+    "a": frozenset(("a", "head")),
+    "abbr": frozenset(("head",)),
+    "acronym": frozenset(("head",)),
+    "address": frozenset(("head", "p", "ul")),
+    "b": frozenset(("head",)),
+    "bdo": frozenset(("head",)),
+    "big": frozenset(("head",)),
+    "blockquote": frozenset(("head", "p")),
+    "body": frozenset(("head", "p")),
+    "br": frozenset(("head",)),
+    "caption": frozenset(("p",)),
+    "center": frozenset(("b", "font", "head", "i", "p")),
+    "cite": frozenset(("head",)),
+    "code": frozenset(("head",)),
+    "col": frozenset(("caption", "p")),
+    "colgroup": frozenset(("caption", "colgroup", "p")),
+    "dd": frozenset(
+        ("address", "dir", "dt", "head", "listing", "menu", "p", "pre"),
+    ),
+    "dfn": frozenset(("head",)),
+    "dir": frozenset(("head", "p")),
+    "div": frozenset(("head", "p")),
+    "dl": frozenset(
+        ("address", "dir", "dt", "head", "listing", "menu", "p", "pre"),
+    ),
+    "dt": frozenset(
+        ("address", "dd", "dir", "head", "listing", "menu", "p", "pre"),
+    ),
+    "em": frozenset(("head",)),
+    "fieldset": frozenset(
+        (
+            "a", "h1", "h2", "h3", "h4", "h5", "h6", "head", "legend",
+            "listing", "p", "pre",
+        ),
+    ),
+    "font": frozenset(("head",)),
+    "form": frozenset(
+        (
+            "address", "dir", "dl", "form", "h1", "h2", "h3", "h4", "h5",
+            "h6", "head", "listing", "menu", "ol", "p", "pre", "ul",
+        ),
+    ),
+    "h1": frozenset(("head", "p")),
+    "h2": frozenset(("head", "p")),
+    "h3": frozenset(("head", "p")),
+    "h4": frozenset(("head", "p")),
+    "h5": frozenset(("head", "p")),
+    "h6": frozenset(("head", "p")),
+    "head": frozenset(("p",)),
+    "hr": frozenset(("head", "p")),
+    "i": frozenset(("head",)),
+    "iframe": frozenset(("head",)),
+    "img": frozenset(("head",)),
+    "kbd": frozenset(("head",)),
+    "li": frozenset(
+        (
+            "address", "dl", "h1", "h2", "h3", "h4", "h5", "h6", "head",
+            "li", "listing", "p", "pre",
+        ),
+    ),
+    "listing": frozenset(("head", "p")),
+    "map": frozenset(("head",)),
+    "menu": frozenset(("head", "p", "ul")),
+    "ol": frozenset(("head", "p")),
+    "optgroup": frozenset(("option",)),
+    "option": frozenset(("option",)),
+    "p": frozenset(
+        (
+            "b", "big", "h1", "h2", "h3", "h4", "h5", "h6", "head", "i",
+            "p", "s", "small", "strike", "tt", "u",
+        ),
+    ),
+    "pre": frozenset(("head", "p", "ul")),
+    "q": frozenset(("head",)),
+    "s": frozenset(("head",)),
+    "samp": frozenset(("head",)),
+    "small": frozenset(("head",)),
+    "span": frozenset(("head",)),
+    "strike": frozenset(("head",)),
+    "strong": frozenset(("head",)),
+    "sub": frozenset(("head",)),
+    "sup": frozenset(("head",)),
+    "table": frozenset(
+        (
+            "a", "h1", "h2", "h3", "h4", "h5", "h6", "head", "listing", "p",
+            "pre",
+        ),
+    ),
+    "tbody": frozenset(
+        (
+            "caption", "colgroup", "p", "tbody", "td", "tfoot", "th",
+            "thead", "tr",
+        ),
+    ),
+    "td": frozenset(("a", "b", "font", "i", "p", "span", "td", "th", "u")),
+    "tfoot": frozenset(
+        ("caption", "colgroup", "p", "tbody", "td", "th", "thead", "tr"),
+    ),
+    "th": frozenset(("a", "b", "font", "i", "p", "span", "td", "th", "u")),
+    "thead": frozenset(("caption", "colgroup")),
+    "title": frozenset(("p",)),
+    "tr": frozenset(("caption", "colgroup", "p", "td", "th", "tr")),
+    "tt": frozenset(("head",)),
+    "u": frozenset(("head",)),
+    "ul": frozenset(
+        ("address", "dir", "head", "listing", "menu", "p", "pre"),
+    ),
+    "var": frozenset(("head",)),
+    "xmp": frozenset(("head", "p")),
+}
+# libxml2's htmlEndPriority: a stray end tag only closes the elements
+# in its way whose priority isn't higher than its own
+END_PRIORITY: typing.Final[dict[str, int]] = {
+    "div": 150,
+    "td": 160,
+    "th": 160,
+    "tr": 170,
+    "thead": 180,
+    "tbody": 180,
+    "tfoot": 180,
+    "table": 190,
+    "head": 200,
+    "body": 200,
+    "html": 220,
+}
+END_PRIORITY_DEFAULT: typing.Final = 100
+
+ATTRIBUTE_ESCAPES: typing.Final = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;"},
+)
+LIST_SEPARATOR: typing.Final = re.compile(r"\S+")
+NOTHING: typing.Final = re.compile(r"(?!)")
+UNFINISHED_TAG: typing.Final = re.compile(r"<(/?)([a-zA-Z][^\s/>]*)")
+UNFINISHED_COMMENT: typing.Final = re.compile(r"<!(?:--)?|<(?=\?)")
+
+
+class Node:
+    """Where a node is in the tree; siblings are linked like in bs4."""
+
+    __slots__ = ("next_sibling", "parent", "previous_sibling")
+
+    name: str | None = None
+
+    def __init__(self) -> None:
+        self.parent: Element | None = None
+        self.previous_sibling: Node | None = None
+        self.next_sibling: Node | None = None
+
+    def extract(self) -> None:
+        parent = self.parent
+        if parent is None:
+            return
+        if self.previous_sibling is not None:
+            self.previous_sibling.next_sibling = self.next_sibling
+        if self.next_sibling is not None:
+            self.next_sibling.previous_sibling = self.previous_sibling
+        parent.children.remove(self)
+        self.parent = self.previous_sibling = self.next_sibling = None
+
+    def find_parent(self, names: str | Collection[str]) -> "Element | None":
+        names = (names,) if isinstance(names, str) else names
+        parent = self.parent
+        while parent is not None and parent.name not in names:
+            parent = parent.parent
+        return parent
+
+
+class CharacterData(Node):
+    __slots__ = ("data",)
+
+    def __init__(self, data: str) -> None:
+        super().__init__()
+        self.data = data
+
+    def __bool__(self) -> bool:
+        # like bs4's strings, an empty one is false
+        return bool(self.data)
+
+    def __str__(self) -> str:
+        return self.data
+
+
+class Text(CharacterData):
+    __slots__ = ()
+
+
+class Comment(CharacterData):
+    __slots__ = ()
+
+
+class Doctype(CharacterData):
+    __slots__ = ()
+
+
+class Element(Node):
+    """
+    An element or, named ``DOCUMENT_NAME``, the root. ``attrs`` values
+    are strings; lists like ``class`` are kept joined by single spaces.
+    """
+
+    __slots__ = ("attrs", "children", "name")
+
+    def __init__(
+        self,
+        name: str,
+        attrs: dict[str, str] | None = None,
+    ) -> None:
+        super().__init__()
+        self.name: str = name
+        self.attrs = attrs or {}
+        self.children: list[Node] = []
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __str__(self) -> str:
+        return self.decode()
+
+    def get(self, name: str, default: str | None = None) -> str | None:
+        return self.attrs.get(name, default)
+
+    def __getitem__(self, name: str) -> str:
+        return self.attrs[name]
+
+    @property
+    def is_empty_element(self) -> bool:
+        return not self.children and self.name in EMPTY_ELEMENTS
+
+    def append(self, node: Node) -> None:
+        node.parent = self
+        if self.children:
+            last = self.children[-1]
+            last.next_sibling = node
+            node.previous_sibling = last
+        self.children.append(node)
+
+    def index(self, node: Node) -> int:
+        for i, child in enumerate(self.children):
+            if child is node:
+                return i
+        raise ValueError("not a child")
+
+    @property
+    def descendants(self) -> Iterator[Node]:
+        stack = [iter(self.children)]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                continue
+            yield node
+            if isinstance(node, Element):
+                stack.append(iter(node.children))
+
+    def find_all(
+        self,
+        name: str | Collection[str] | None = None,
+        class_: str | None = None,
+    ) -> list["Element"]:
+        names = (name,) if isinstance(name, str) else name
+        return [
+            node
+            for node in self.descendants
+            if isinstance(node, Element)
+            and (names is None or node.name in names)
+            and (
+                class_ is None
+                or class_ in node.attrs.get("class", "").split(" ")
+            )
+        ]
+
+    def find(self, name: str | Collection[str]) -> "Element | None":
+        names = (name,) if isinstance(name, str) else name
+        for node in self.descendants:
+            if isinstance(node, Element) and node.name in names:
+                return node
+        return None
+
+    def get_text(self) -> str:
+        """The text, as bs4 has it: without comments, scripts or styles."""
+        strings = []
+        stack = [(iter(self.children), self.name in HIDDEN_TEXT_ELEMENTS)]
+        while stack:
+            children, hidden = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+            elif isinstance(child, Text):
+                if not hidden:
+                    strings.append(child.data)
+            elif isinstance(child, Element):
+                stack.append(
+                    (
+                        iter(child.children),
+                        hidden or child.name in HIDDEN_TEXT_ELEMENTS,
+                    ),
+                )
+        return "".join(strings)
+
+    def decode(self) -> str:
+        """The markup, serialized the way bs4 does it."""
+        output: list[str] = []
+        # open elements, their children left and whether text is escaped
+        stack: list[tuple[Element, Iterator[Node], bool]] = []
+        if _write_start_tag(self, output):
+            stack.append(
+                (
+                    self,
+                    iter(self.children),
+                    self.name not in UNESCAPED_ELEMENTS,
+                ),
+            )
+        while stack:
+            element, children, escape = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if element.name != DOCUMENT_NAME:
+                    output.append(f"</{element.name}>")
+            elif isinstance(child, Element):
+                if _write_start_tag(child, output):
+                    stack.append(
+                        (
+                            child,
+                            iter(child.children),
+                            escape and child.name not in UNESCAPED_ELEMENTS,
+                        ),
+                    )
+            elif isinstance(child, Text):
+                output.append(
+                    html.escape(child.data, quote=False)
+                    if escape
+                    else child.data,
+                )
+            elif isinstance(child, Comment):
+                output.append(f"<!--{child.data}-->")
+            elif isinstance(child, Doctype):
+                output.append(f"<!DOCTYPE {child.data}>\n")
+        return "".join(output)
+
+
+def _write_start_tag(element: Element, output: list[str]) -> bool:
+    """Whether an end tag and the children have to follow."""
+    if element.name == DOCUMENT_NAME:
+        return True
+    output.append(f"<{element.name}")
+    for name, value in sorted(element.attrs.items()):
+        output.append(f" {name}={_quote(value)}")
+    if element.is_empty_element:
+        output.append("/>")
+        return False
+    output.append(">")
+    return True
+
+
+def _quote(value: str) -> str:
+    value = value.translate(ATTRIBUTE_ESCAPES)
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"{}"'.format(value.replace('"', "&quot;"))
+
+
+def parse(markup: str) -> Element:
+    """
+    The tree libxml2's HTML parser builds, as bs4 with its ``lxml``
+    builder holds it: implied ``html``/``head``/``body``, the same tags
+    closed implicitly, whitespace-only text cut to one space or newline.
+    """
+    builder = _TreeBuilder()
+    builder.feed(markup.replace("\r\n", "\n").replace("\r", "\n"))
+    builder.close()
+    return builder.root
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.root = Element(DOCUMENT_NAME)
+        self._stack: list[Element] = []
+        self._text: list[str] = []
+        # the text node markup hasn't ended yet, with its raw data
+        self._open_text: Text | None = None
+        self._open_data = ""
+        self._at_start = True
+        self._preserved = 0
+        self._escapable = False
+        self._html_seen = False
+        self._head_seen = False
+        self._body_seen = False
+        # dropped html, head and body start tags, whose end tags go too
+        self._dropped = 0
+
+    def handle_starttag(
+        self, tag: str, attrs: list[tuple[str, str | None]],
+    ) -> None:
+        self._start(tag, attrs, closed=False)
+
+    def handle_startendtag(
+        self, tag: str, attrs: list[tuple[str, str | None]],
+    ) -> None:
+        self._start(tag, attrs, closed=True)
+
+    def handle_endtag(self, tag: str) -> None:
+        self._escapable = False
+        self._flush()
+        self._at_start = False
+        if tag in ("html", "head", "body") and self._dropped:
+            self._dropped -= 1
+            return
+        priority = END_PRIORITY.get(tag, END_PRIORITY_DEFAULT)
+        for i in range(len(self._stack) - 1, -1, -1):
+            name = self._stack[i].name
+            if name == tag:
+                break
+            if END_PRIORITY.get(name, END_PRIORITY_DEFAULT) > priority:
+                return
+        else:
+            # an end tag that closes nothing doesn't end the text either
+            return
+        while len(self._stack) > i:
+            self._pop()
+
+    def handle_data(self, data: str) -> None:
+        if self._escapable:
+            data = html.unescape(data)
+        self._text.append(data.replace("\x00", "\ufffd"))
+
+    def handle_comment(self, data: str) -> None:
+        self._add_markup(Comment(data))
+
+    def handle_decl(self, decl: str) -> None:
+        if decl[:8].lower() == "doctype ":
+            self._add_markup(Doctype(decl[8:]))
+        else:
+            self._add_markup(Comment(decl))
+
+    def handle_pi(self, data: str) -> None:
+        self._add_markup(Comment(f"?{data}"))
+
+    def unknown_decl(self, data: str) -> None:
+        self._add_markup(Comment(f"[{data}]]"))
+
+    def close(self) -> None:
+        if not self.cdata_elem:
+            # markup cut off by the end of the input
+            unfinished = UNFINISHED_TAG.match(self.rawdata)
+            if unfinished:
+                self.rawdata = ""
+                if not unfinished[1]:
+                    self._flush()
+                    self._imply(unfinished[2].lower())
+            elif UNFINISHED_COMMENT.match(self.rawdata):
+                self.handle_comment(UNFINISHED_COMMENT.sub("", self.rawdata))
+                self.rawdata = ""
+        super().close()
+        if self.rawdata:
+            # unclosed raw text runs to the end
+            self.handle_data(self.rawdata)
+            self.rawdata = ""
+        self._flush()
+        while self._stack:
+            self._pop()
+
+    def _start(
+        self,
+        tag: str,
+        attrs: list[tuple[str, str | None]],
+        *,
+        closed: bool,
+    ) -> None:
+        self._flush()
+        self._at_start = False
+        closes = START_CLOSE.get(tag)
+        while closes and self._stack and self._stack[-1].name in closes:
+            self._pop()
+        self._imply(tag)
+        if tag in ("html", "head", "body") and self._is_misplaced(tag):
+            self._dropped += 1
+            return
+
+        element = Element(tag, self._attributes(tag, attrs))
+        (self._stack[-1] if self._stack else self.root).append(element)
+        self._open_text = None
+        if closed or tag in VOID_ELEMENTS:
+            return
+        self._push(element)
+        if tag in RAW_TEXT_ELEMENTS:
+            self.set_cdata_mode(tag)
+            if tag == "plaintext":
+                # not even its end tag ends it
+                self.interesting = NOTHING
+        elif tag in ESCAPABLE_RAW_TEXT_ELEMENTS and tag not in getattr(
+            self, "RCDATA_CONTENT_ELEMENTS", (),
+        ):
+            # older html.parser versions only know raw text
+            self.set_cdata_mode(tag)
+            self._escapable = True
+
+    def _is_misplaced(self, tag: str) -> bool:
+        if tag == "html":
+            return bool(self._stack)
+        if tag == "head":
+            return len(self._stack) != 1
+        return any(element.name == "body" for element in self._stack)
+
+    def _imply(self, tag: str) -> None:
+        """libxml2's ``htmlCheckImplied``."""
+        if tag == "html":
+            return
+        if not self._stack:
+            self._push_new("html")
+        if tag in ("head", "body"):
+            return
+        if len(self._stack) == 1 and tag in HEAD_ELEMENTS:
+            if not self._head_seen:
+                self._push_new("head")
+        elif (
+            tag not in ("noframes", "frame", "frameset")
+            and not self._body_seen
+            and not any(
+                element.name in ("head", "body") for element in self._stack
+            )
+        ):
+            self._push_new("body")
+
+    def _push_new(self, tag: str) -> None:
+        element = Element(tag)
+        (self._stack[-1] if self._stack else self.root).append(element)
+        self._push(element)
+
+    def _push(self, element: Element) -> None:
+        self._stack.append(element)
+        self._open_text = None
+        if element.name == "html":
+            self._html_seen = True
+        elif element.name == "head":
+            self._head_seen = True
+        elif element.name == "body":
+            self._head_seen = self._body_seen = True
+        elif element.name in PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserved += 1
+
+    def _pop(self) -> None:
+        self._open_text = None
+        if self._stack.pop().name in PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserved -= 1
+
+    def _attributes(
+        self, tag: str, attrs: list[tuple[str, str | None]],
+    ) -> dict[str, str]:
+        lists = LIST_ATTRIBUTES["*"] | LIST_ATTRIBUTES.get(tag, frozenset())
+        attributes: dict[str, str] = {}
+        for name, value in attrs:
+            if name in attributes:
+                continue
+            attributes[name] = (
+                " ".join(LIST_SEPARATOR.findall(value or ""))
+                if name in lists
+                else value or ""
+            )
+        return attributes
+
+    def _add_markup(self, node: CharacterData) -> None:
+        self._flush()
+        self._open_text = None
+        node.data = self._normalize(node.data)
+        (self._stack[-1] if self._stack else self.root).append(node)
+
+    def _flush(self) -> None:
+        if not self._text:
+            return
+        data = "".join(self._text)
+        self._text.clear()
+        if self._at_start and not self._html_seen:
+            # whitespace before the first tag is dropped
+            data = data.lstrip(ASCII_WHITESPACE)
+            if not data:
+                return
+        if not self._stack or self._stack[-1].name in ("html", "head"):
+            parent = self._stack[-1] if self._stack else self.root
+            text = data.lstrip(ASCII_WHITESPACE)
+            if not text:
+                self._append_text(parent, data)
+                return
+            if parent.name != "html" or not self._body_seen:
+                # leading whitespace stays, the rest starts the body
+                if len(text) < len(data):
+                    self._append_text(parent, data[:len(data) - len(text)])
+                data = text
+            if parent.name == "head":
+                self._pop()
+            self._imply("#text")
+        self._append_text(self._stack[-1], data)
+
+    def _append_text(self, parent: Element, data: str) -> None:
+        text = self._open_text
+        if text is not None and text.parent is parent:
+            self._open_data += data
+            text.data = self._normalize(self._open_data)
+            return
+        self._open_text = Text(self._normalize(data))
+        self._open_data = data
+        parent.append(self._open_text)
+
+    def _normalize(self, data: str) -> str:
+        if not self._preserved and not data.strip(ASCII_WHITESPACE):
+            # as bs4 does outside of pre and textarea
+            return "\n" if "\n" in data else " "
+        return data
@@ -1,42 +1,281 @@
+import dataclasses
+import hashlib
+import json
+import sys
+import typing
+from collections.abc import Awaitable, Callable
+
 from notifier.application import interfaces
+from notifier.application.dispatcher import (
+    AsyncDispatcher,
+    DeliveryResult,
+    Dispatcher,
+)
+from notifier.application.document import Document
+from notifier.application.routing import Router
 from notifier.application.services import RenderService
+from notifier.application.steps import Blocking, Steps, run, run_async
+from notifier.domain.entities import Issue, PullRequest
+
+_NotifierT = typing.TypeVar(
+    "_NotifierT", interfaces.Notifier, interfaces.AsyncNotifier,
+)
+
+
+class _Deliveries(typing.Generic[_NotifierT]):
+    """
+    Notifiers that still have to get this version of the event, and
+    the bookkeeping of the ones that do.
+    """
+
+    def __init__(
+        self,
+        outbox: interfaces.Outbox | None,
+        event: Issue | PullRequest,
+        notifiers: list[_NotifierT],
+    ) -> None:
+        self._outbox = outbox
+        self._url = event.url
+        self._content_hash = hashlib.sha256(
+            json.dumps(dataclasses.asdict(event), sort_keys=True).encode(),
+        ).hexdigest()
+        self.notifiers: list[_NotifierT] = notifiers
+        if outbox is not None:
+            pending = outbox.pending(
+                self._url,
+                self._content_hash,
+                [notifier.destination for notifier in notifiers],
+            )
+            self.notifiers = [
+                notifier
+                for notifier in notifiers
+                if notifier.destination in pending
+            ]
+            for notifier in notifiers:
+                if notifier.destination not in pending:
+                    print(
+                        f"Already delivered to {notifier.destination}",
+                        file=sys.stderr,
+                    )
+
+    def track(
+        self,
+        send: Callable[[_NotifierT], None],
+    ) -> Callable[[_NotifierT], None]:
+        def tracked(notifier: _NotifierT) -> None:
+            try:
+                send(notifier)
+            except Exception as e:
+                self._failed(notifier, e)
+                raise
+            self._delivered(notifier)
+
+        return tracked if self._outbox is not None else send
+
+    def track_async(
+        self,
+        send: Callable[[_NotifierT], Awaitable[None]],
+    ) -> Callable[[_NotifierT], Awaitable[None]]:
+        async def tracked(notifier: _NotifierT) -> None:
+            try:
+                await send(notifier)
+            except Exception as e:
+                self._failed(notifier, e)
+                raise
+            self._delivered(notifier)
+
+        return tracked if self._outbox is not None else send
+
+    def _delivered(self, notifier: _NotifierT) -> None:
+        if self._outbox is not None:
+            self._outbox.mark_delivered(
+                self._url, self._content_hash, notifier.destination,
+            )
+
+    def _failed(self, notifier: _NotifierT, error: Exception) -> None:
+        if self._outbox is not None:
+            self._outbox.mark_failed(
+                self._url, self._content_hash, notifier.destination,
+                repr(error),
+            )
+
+
+def _route(
+    router: Router | None,
+    event: Issue | PullRequest,
+    notifiers: list[_NotifierT],
+) -> tuple[list[_NotifierT], tuple[str, ...]]:
+    """The notifiers the event is routed to, and the labels it gets."""
+    if router is None:
+        return notifiers, ()
+    route = router.route(event)
+    routed = []
+    for notifier in notifiers:
+        if route.allows(notifier.destination):
+            routed.append(notifier)
+        else:
+            print(f"Not routed to {notifier.destination}", file=sys.stderr)
+    return routed, route.labels
+
+
+@dataclasses.dataclass(frozen=True)
+class _Dispatch:
+    """Send to the notifiers, the result is their ``DeliveryResult``s."""
 
+    deliveries: _Deliveries
+    send: Callable[[typing.Any], typing.Any]
 
-class SendIssue:
+
+def _send_event(
+    event: Issue | PullRequest,
+    notifiers: list[_NotifierT],
+    render_service: RenderService,
+    outbox: interfaces.Outbox | None,
+    router: Router | None,
+    send: Callable[[_NotifierT, Document, str], typing.Any],
+) -> Steps[list[DeliveryResult]]:
+    notifiers, extra_labels = _route(router, event, notifiers)
+    deliveries = _Deliveries(outbox, event, notifiers)
+    if not deliveries.notifiers:
+        return []
+    labels = render_service.format_labels(event.labels, extra_labels)
+    body = yield Blocking(render_service.format_body, (event.body,))
+
+    return (
+        yield _Dispatch(
+            deliveries,
+            lambda notifier: send(notifier, body, labels),
+        )
+    )
+
+
+class _SendEvent:
     def __init__(
         self,
         github: interfaces.Github,
         notifiers: list[interfaces.Notifier],
         render_service: RenderService,
+        dispatcher: Dispatcher | None = None,
+        outbox: interfaces.Outbox | None = None,
+        router: Router | None = None,
     ) -> None:
         self._github = github
         self._notifiers = notifiers
         self._render_service = render_service
+        self._dispatcher = dispatcher or Dispatcher()
+        self._outbox = outbox
+        self._router = router
+
+    def _send(
+        self,
+        event: Issue | PullRequest,
+        send: Callable[[interfaces.Notifier, Document, str], None],
+    ) -> list[DeliveryResult]:
+        return run(
+            _send_event(
+                event,
+                self._notifiers,
+                self._render_service,
+                self._outbox,
+                self._router,
+                send,
+            ),
+            self._dispatch,
+        )
+
+    def _dispatch(self, step: _Dispatch) -> list[DeliveryResult]:
+        return self._dispatcher.dispatch(
+            step.deliveries.notifiers,
+            step.deliveries.track(step.send),
+        )
+
 
-    def handler(self) -> None:
+class SendIssue(_SendEvent):
+    def handler(self) -> list[DeliveryResult]:
         issue = self._github.get_issue()
-        labels = self._render_service.format_labels(issue.labels)
-        body = self._render_service.format_body(issue.body)
+        return self._send(
+            issue,
+            lambda notifier, body, labels: notifier.send_issue(
+                issue, body, labels,
+            ),
+        )
 
-        for notifier in self._notifiers:
-            notifier.send_issue(issue, body, labels)
+
+class SendPR(_SendEvent):
+    def handler(self) -> list[DeliveryResult]:
+        pr = self._github.get_pull_request()
+        return self._send(
+            pr,
+            lambda notifier, body, labels: notifier.send_pull_request(
+                pr, body, labels,
+            ),
+        )
 
 
-class SendPR:
+class _AsyncSendEvent:
     def __init__(
         self,
-        github: interfaces.Github,
-        notifiers: list[interfaces.Notifier],
+        github: interfaces.AsyncGithub,
+        notifiers: list[interfaces.AsyncNotifier],
         render_service: RenderService,
+        dispatcher: AsyncDispatcher | None = None,
+        outbox: interfaces.Outbox | None = None,
+        router: Router | None = None,
     ) -> None:
         self._github = github
         self._notifiers = notifiers
         self._render_service = render_service
+        self._dispatcher = dispatcher or AsyncDispatcher()
+        self._outbox = outbox
+        self._router = router
 
-    def handler(self) -> None:
-        pr = self._github.get_pull_request()
-        labels = self._render_service.format_labels(pr.labels)
-        body = self._render_service.format_body(pr.body)
+    async def _send(
+        self,
+        event: Issue | PullRequest,
+        send: Callable[
+            [interfaces.AsyncNotifier, Document, str], Awaitable[None],
+        ],
+    ) -> list[DeliveryResult]:
+        return await run_async(
+            _send_event(
+                event,
+                self._notifiers,
+                self._render_service,
+                self._outbox,
+                self._router,
+                send,
+            ),
+            self._dispatch,
+        )
+
+    async def _dispatch(self, step: _Dispatch) -> list[DeliveryResult]:
+        return await self._dispatcher.dispatch(
+            step.deliveries.notifiers,
+            step.deliveries.track_async(step.send),
+        )
+
+
+class AsyncSendIssue(_AsyncSendEvent):
+    """``SendIssue`` for an event loop; the body is parsed in a thread."""
+
+    async def handler(self) -> list[DeliveryResult]:
+        issue = await self._github.get_issue()
+        return await self._send(
+            issue,
+            lambda notifier, body, labels: notifier.send_issue(
+                issue, body, labels,
+            ),
+        )
+
+
+class AsyncSendPR(_AsyncSendEvent):
+    """``SendPR`` for an event loop; the body is parsed in a thread."""
 
-        for notifier in self._notifiers:
-            notifier.send_pull_request(pr, body, labels)
+    async def handler(self) -> list[DeliveryResult]:
+        pr = await self._github.get_pull_request()
+        return await self._send(
+            pr,
+            lambda notifier, body, labels: notifier.send_pull_request(
+                pr, body, labels,
+            ),
+        )
@@ -1,7 +1,12 @@
 import abc
 import typing
 
-from notifier.domain.entities import Issue, PullRequest
+from notifier.domain.entities import Issue, PullRequest, SentMessage
+
+if typing.TYPE_CHECKING:
+    from notifier.application.digest import DigestItem
+    from notifier.application.document import Document
+    from notifier.application.metrics import Span
 
 
 class Github(typing.Protocol):
@@ -13,11 +18,16 @@ class Github(typing.Protocol):
 
 
 class Notifier(typing.Protocol):
+    @property
+    @abc.abstractmethod
+    def destination(self) -> str:
+        """Stable id of where messages go, without secrets."""
+
     @abc.abstractmethod
     def send_issue(
         self,
         issue: Issue,
-        formatted_body: str,
+        formatted_body: "Document",
         formatted_labels: str,
     ) -> None: ...
 
@@ -25,6 +35,127 @@ class Notifier(typing.Protocol):
     def send_pull_request(
         self,
         pull_request: PullRequest,
-        formatted_body: str,
+        formatted_body: "Document",
+        formatted_labels: str,
+    ) -> None: ...
+
+    @abc.abstractmethod
+    def send_digest(self, items: typing.Sequence["DigestItem"]) -> None:
+        """Several events at once, in as few messages as possible."""
+
+
+class AsyncGithub(typing.Protocol):
+    @abc.abstractmethod
+    async def get_issue(self) -> Issue: ...
+
+    @abc.abstractmethod
+    async def get_pull_request(self) -> PullRequest: ...
+
+
+class AsyncNotifier(typing.Protocol):
+    @property
+    @abc.abstractmethod
+    def destination(self) -> str: ...
+
+    @abc.abstractmethod
+    async def send_issue(
+        self,
+        issue: Issue,
+        formatted_body: "Document",
+        formatted_labels: str,
+    ) -> None: ...
+
+    @abc.abstractmethod
+    async def send_pull_request(
+        self,
+        pull_request: PullRequest,
+        formatted_body: "Document",
         formatted_labels: str,
     ) -> None: ...
+
+
+class Cache(typing.Protocol):
+    """
+    Memoizes rendered output. Keys are tuples of everything the output
+    depends on; values are strings so they can be kept on disk.
+    """
+
+    @abc.abstractmethod
+    def get(self, key: tuple[typing.Any, ...]) -> str | None: ...
+
+    @abc.abstractmethod
+    def put(self, key: tuple[typing.Any, ...], value: str) -> None: ...
+
+    @abc.abstractmethod
+    def get_or_put(
+        self,
+        key: tuple[typing.Any, ...],
+        render: typing.Callable[[], str],
+    ) -> str:
+        """
+        Cached value, or the result of ``render`` which is then cached.
+        Concurrent callers with the same key wait for a single render.
+        """
+
+
+class Outbox(typing.Protocol):
+    """
+    Remembers which destinations got which version of an event, so
+    reruns don't send duplicates.
+    """
+
+    @abc.abstractmethod
+    def pending(
+        self,
+        event_url: str,
+        content_hash: str,
+        destinations: typing.Sequence[str],
+    ) -> set[str]:
+        """Record the deliveries and return those not done yet."""
+
+    @abc.abstractmethod
+    def mark_delivered(
+        self,
+        event_url: str,
+        content_hash: str,
+        destination: str,
+    ) -> None: ...
+
+    @abc.abstractmethod
+    def mark_failed(
+        self,
+        event_url: str,
+        content_hash: str,
+        destination: str,
+        error: str,
+    ) -> None: ...
+
+
+class MessageIndex(typing.Protocol):
+    """Where each event was posted, per destination."""
+
+    @abc.abstractmethod
+    def get(self, event_url: str, destination: str) -> SentMessage | None: ...
+
+    @abc.abstractmethod
+    def put(
+        self,
+        event_url: str,
+        destination: str,
+        message: SentMessage,
+    ) -> None: ...
+
+
+class MetricsHook(typing.Protocol):
+    """Receives every span and counter increment, e.g. to export them."""
+
+    @abc.abstractmethod
+    def on_span(self, span: "Span") -> None: ...
+
+    @abc.abstractmethod
+    def on_count(
+        self,
+        name: str,
+        value: float,
+        attributes: dict[str, typing.Any],
+    ) -> None: ...
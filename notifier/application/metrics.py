@@ -0,0 +1,168 @@
+import contextlib
+import dataclasses
+import threading
+import time
+import typing
+from collections.abc import Iterator
+
+from notifier.application import interfaces
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Span:
+    name: str
+    elapsed: float
+    attributes: dict[str, typing.Any]
+    error: BaseException | None = None
+
+
+@dataclasses.dataclass
+class _SpanStats:
+    count: int = 0
+    errors: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    # sums of the numeric attributes: bytes, parts, waits...
+    sums: dict[str, float] = dataclasses.field(default_factory=dict)
+
+
+class Metrics:
+    """
+    Timings of the stages of a run (GitHub fetch, body parsing, platform
+    renders, send attempts) and counters such as retries.
+
+    Spans and counters are aggregated by name for the JSON export and
+    the step summary; every single one is also passed to the hooks, so
+    exporters can keep their own histograms.
+    """
+
+    def __init__(self) -> None:
+        self._spans: dict[str, _SpanStats] = {}
+        self._counters: dict[str, float] = {}
+        self._hooks: list[interfaces.MetricsHook] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(
+        self,
+        name: str,
+        **attributes: typing.Any,
+    ) -> Iterator[dict[str, typing.Any]]:
+        """
+        Time the block. The yielded dict can be filled with attributes
+        that are only known at the end, like response sizes.
+        """
+        started = time.perf_counter()
+        error: BaseException | None = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(
+                Span(
+                    name=name,
+                    elapsed=time.perf_counter() - started,
+                    attributes=attributes,
+                    error=error,
+                ),
+            )
+
+    def count(
+        self,
+        name: str,
+        value: float = 1,
+        **attributes: typing.Any,
+    ) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            hooks = list(self._hooks)
+        for hook in hooks:
+            hook.on_count(name, value, attributes)
+
+    def add_hook(self, hook: interfaces.MetricsHook) -> None:
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: interfaces.MetricsHook) -> None:
+        with self._lock:
+            self._hooks.remove(hook)
+
+    def snapshot(self) -> dict[str, typing.Any]:
+        """Aggregates so far, ready for ``json.dumps``."""
+        with self._lock:
+            return {
+                "spans": {
+                    name: {
+                        "count": stats.count,
+                        "errors": stats.errors,
+                        "total": stats.total,
+                        "max": stats.max,
+                        **stats.sums,
+                    }
+                    for name, stats in self._spans.items()
+                },
+                "counters": dict(self._counters),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            stats = self._spans.get(span.name)
+            if stats is None:
+                stats = self._spans[span.name] = _SpanStats()
+            stats.count += 1
+            stats.errors += span.error is not None
+            stats.total += span.elapsed
+            stats.max = max(stats.max, span.elapsed)
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(
+                    value, bool,
+                ):
+                    stats.sums[key] = stats.sums.get(key, 0) + value
+            hooks = list(self._hooks)
+        for hook in hooks:
+            hook.on_span(span)
+
+
+def format_summary(snapshot: dict[str, typing.Any]) -> str:
+    """Markdown tables of a ``Metrics.snapshot()``, for the step summary."""
+    lines = [
+        "| Stage | Count | Errors | Total, ms | Max, ms | Details |",
+        "| --- | ---: | ---: | ---: | ---: | --- |",
+    ]
+    for name, stats in snapshot["spans"].items():
+        details = ", ".join(
+            f"{key}={value:g}"
+            for key, value in stats.items()
+            if key not in ("count", "errors", "total", "max")
+        )
+        lines.append(
+            f"| {name} | {stats['count']} | {stats['errors']} "
+            f"| {stats['total'] * 1000:.1f} | {stats['max'] * 1000:.1f} "
+            f"| {details} |",
+        )
+    if snapshot["counters"]:
+        lines += ["", "| Counter | Value |", "| --- | ---: |"]
+        lines += [
+            f"| {name} | {value:g} |"
+            for name, value in snapshot["counters"].items()
+        ]
+    return "\n".join(lines) + "\n"
+
+
+# One registry per process, so spans from every gateway, thread and
+# event loop end up in the same report without being passed around.
+_metrics: typing.Final = Metrics()
+
+span = _metrics.span
+count = _metrics.count
+add_hook = _metrics.add_hook
+remove_hook = _metrics.remove_hook
+snapshot = _metrics.snapshot
+reset = _metrics.reset
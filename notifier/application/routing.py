@@ -0,0 +1,183 @@
+import dataclasses
+import fnmatch
+import functools
+import re
+import typing
+from collections.abc import Mapping, Sequence
+
+from notifier.domain.entities import Issue, PullRequest
+
+ISSUE: typing.Final = "issue"
+PULL_REQUEST: typing.Final = "pull_request"
+EVENT_TYPES: typing.Final = (ISSUE, PULL_REQUEST)
+
+LABEL_INVALID_CHARS: typing.Final = re.compile(r"[^a-zA-Z0-9_]")
+GLOB_CHARS: typing.Final = frozenset("*?[")
+REPOSITORY_MASKS_MAX: typing.Final = 4096
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_label(raw_label: str) -> str:
+    """
+    Bug Report -> bug_report
+    high-priority -> high_priority
+    Feature Request!!! -> feature_request
+    Version 2.0 -> version_20
+    Critical Bug - Urgent!!! -> critical_bug___urgent
+    Багрепорт - ...
+    already_normalized -> already_normalized
+    Test@#$%^&*()Label -> testlabel
+    ... -> ...
+    """
+    parsed_label = raw_label.lower().replace(" ", "_").replace("-", "_")
+    return LABEL_INVALID_CHARS.sub("", parsed_label)
+
+
+def event_type(event: Issue | PullRequest) -> str:
+    return ISSUE if isinstance(event, Issue) else PULL_REQUEST
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class RoutingRule:
+    """
+    Sends matching events to ``destinations`` and adds ``add_labels``
+    to them. An empty condition matches everything; within one, any of
+    the values matches. ``repositories`` may hold glob patterns.
+    """
+
+    destinations: frozenset[str]
+    labels: frozenset[str] = frozenset()
+    repositories: frozenset[str] = frozenset()
+    authors: frozenset[str] = frozenset()
+    events: frozenset[str] = frozenset()
+    add_labels: tuple[str, ...] = ()
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Route:
+    destinations: frozenset[str]
+    # destinations named by any rule; the others get every event
+    routed: frozenset[str]
+    labels: tuple[str, ...]
+
+    def allows(self, destination: str) -> bool:
+        return (
+            destination in self.destinations
+            or destination not in self.routed
+        )
+
+
+class _Index:
+    """Rules matching each value of one condition, as a bit per rule."""
+
+    def __init__(self) -> None:
+        self.unconditional = 0
+        self.masks: dict[str, int] = {}
+
+    def add(self, bit: int, values: frozenset[str]) -> None:
+        if not values:
+            self.unconditional |= bit
+        for value in values:
+            self.masks[value] = self.masks.get(value, 0) | bit
+
+    def match(self, value: str) -> int:
+        return self.unconditional | self.masks.get(value, 0)
+
+
+class Router:
+    """
+    Rules compiled into one index per condition. Routing an event is a
+    few dict lookups and ANDs of bit masks, whatever the number of
+    rules; the route for a combination of matched rules is built once.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[RoutingRule],
+        aliases: Mapping[str, str] | None = None,
+    ) -> None:
+        aliases = aliases or {}
+        self._rules = [
+            dataclasses.replace(
+                rule,
+                destinations=frozenset(
+                    aliases.get(destination, destination)
+                    for destination in rule.destinations
+                ),
+                labels=frozenset(map(normalize_label, rule.labels)),
+                authors=frozenset(author.lower() for author in rule.authors),
+            )
+            for rule in rules
+        ]
+        self._routed = frozenset().union(
+            *(rule.destinations for rule in self._rules),
+        )
+        self._labels = _Index()
+        self._repositories = _Index()
+        self._authors = _Index()
+        self._events = _Index()
+        self._repository_patterns: list[tuple[re.Pattern[str], int]] = []
+        for i, rule in enumerate(self._rules):
+            bit = 1 << i
+            self._labels.add(bit, rule.labels)
+            self._authors.add(bit, rule.authors)
+            self._events.add(bit, rule.events)
+            self._repositories.add(
+                bit,
+                frozenset(
+                    repository
+                    for repository in rule.repositories
+                    if GLOB_CHARS.isdisjoint(repository)
+                ),
+            )
+            for repository in rule.repositories:
+                if not GLOB_CHARS.isdisjoint(repository):
+                    self._repository_patterns.append(
+                        (re.compile(fnmatch.translate(repository)), bit),
+                    )
+        self._repository_masks: dict[str, int] = {}
+        self._routes: dict[int, Route] = {}
+
+    def route(self, event: Issue | PullRequest) -> Route:
+        mask = (
+            self._events.match(event_type(event))
+            & self._authors.match(event.user.lower())
+            & self._repository_mask(event.repository)
+        )
+        if mask:
+            labels = self._labels.unconditional
+            for label in event.labels:
+                labels |= self._labels.masks.get(normalize_label(label), 0)
+            mask &= labels
+
+        route = self._routes.get(mask)
+        if route is None:
+            route = self._routes[mask] = self._build_route(mask)
+        return route
+
+    def _repository_mask(self, repository: str) -> int:
+        mask = self._repository_masks.get(repository)
+        if mask is None:
+            mask = self._repositories.match(repository)
+            for pattern, bit in self._repository_patterns:
+                if pattern.match(repository):
+                    mask |= bit
+            if len(self._repository_masks) < REPOSITORY_MASKS_MAX:
+                self._repository_masks[repository] = mask
+        return mask
+
+    def _build_route(self, mask: int) -> Route:
+        rules = [
+            rule for i, rule in enumerate(self._rules) if mask >> i & 1
+        ]
+        return Route(
+            destinations=frozenset().union(
+                *(rule.destinations for rule in rules),
+            ),
+            routed=self._routed,
+            labels=tuple(
+                dict.fromkeys(
+                    label for rule in rules for label in rule.add_labels
+                ),
+            ),
+        )
@@ -1,62 +1,111 @@
 import dataclasses
-import re
+import hashlib
+import json
 import sys
+import typing
+from collections.abc import Sequence
 
-import bs4
-import sulguk
+from notifier.application import interfaces, metrics
+from notifier.application.document import RENDER_BACKEND_LXML, document_type
+from notifier.application.html_budget import BODY_TEXT_LIMIT_DEFAULT, trim_html
+from notifier.application.routing import normalize_label
+
+if typing.TYPE_CHECKING:
+    from notifier.application.document import Document
 
 
 @dataclasses.dataclass(frozen=True, kw_only=True)
 class RenderService:
     custom_labels: list[str]
     join_input_with_list: bool
+    cache: interfaces.Cache | None = None
+    # characters of text kept from a body, 0 keeps all of it
+    body_text_limit: int = BODY_TEXT_LIMIT_DEFAULT
+    # parses bodies: one of RENDER_BACKENDS
+    backend: str = RENDER_BACKEND_LXML
+
+    def format_body(self, body: str) -> "Document":
+        with metrics.span("render.body", bytes_in=len(body)):
+            return self._format_body(body)
+
+    def _format_body(self, body: str) -> "Document":
+        document_cls = document_type(self.backend)
 
-    def format_body(self, body: str) -> str:
         if not body:
-            return body
+            return document_cls()
+        if self.cache is None:
+            return self._parse_body(body) or document_cls.placeholder()
 
-        soup = bs4.BeautifulSoup(body, "lxml")
+        body_hash = hashlib.sha256(body.encode()).hexdigest()
+        digest = (
+            f"{body_hash}:{self.backend}:{int(self.join_input_with_list)}"
+            f":{self.body_text_limit}"
+        )
+        key = ("body", digest)
+        cached = self.cache.get(key)
+        if cached is not None:
+            entry = json.loads(cached)
+            if entry["html"] is None:
+                return document_cls.placeholder()
+            return document_cls.from_html(entry["html"], digest=digest)
+
+        document = self._parse_body(body, digest=digest)
+        self.cache.put(
+            key,
+            json.dumps({"html": document.html if document else None}),
+        )
+        return document or document_cls.placeholder()
 
-        for s in soup.find_all(class_="blob-wrapper"):
+    def _parse_body(
+        self,
+        body: str,
+        digest: str | None = None,
+    ) -> "Document | None":
+        """Parsed body, or None if it can't be rendered."""
+        document_cls = document_type(self.backend)
+
+        if self.body_text_limit and len(body) > self.body_text_limit:
+            # it may have more text than any platform shows, or diffs
+            # that are dropped anyway: don't build a tree of all of it
+            trimmed = trim_html(body, self.body_text_limit)
+            if trimmed is not None:
+                metrics.count("render.trimmed")
+                body = trimmed
+
+        tree = document_cls.parse(body)
+
+        for s in tree.find_all(class_="blob-wrapper"):
             s.extract()
 
         if self.join_input_with_list:
-            for ul in soup.find_all("ul"):
+            for ul in tree.find_all("ul"):
                 if ul.find("input"):
                     ul.name = "div"
                     for li in ul.find_all("li"):
                         li.name = "div"
 
-        result = str(soup)
+        document = document_cls(tree, digest=digest)
 
         try:
-            sulguk.transform_html(result, base_url="https://github.com")
-            return result
-        except Exception as e:
+            # kept by the document for the Telegram gateway to render
+            document.entities()
+            return document
+        except Exception as e:  # noqa: BLE001
+            # sulguk fails on markup it doesn't expect; it is reported and
+            # the event is sent with a placeholder body
             print(f"Error transforming HTML: {e}", file=sys.stderr)
-            return "<p></p>"
+            return None
 
-    def format_labels(self, labels: list[str]):
+    def format_labels(
+        self,
+        labels: list[str],
+        extra_labels: Sequence[str] = (),
+    ) -> str:
+        parsed_labels = (
+            normalize_label(label)
+            for label in (*labels, *self.custom_labels, *extra_labels)
+        )
         return (
-            " ".join(
-                f"#{self._parse_label(label)}"
-                for label in labels + self.custom_labels
-                if self._parse_label(label)
-            )
+            " ".join(f"#{label}" for label in parsed_labels if label)
             + "<br/>"
         )
-
-    def _parse_label(self, raw_label: str) -> str:
-        """
-        Bug Report -> bug_report
-        high-priority -> high_priority
-        Feature Request!!! -> feature_request
-        Version 2.0 -> version_20
-        Critical Bug - Urgent!!! -> critical_bug___urgent
-        Багрепорт - ...
-        already_normalized -> already_normalized
-        Test@#$%^&*()Label -> testlabel
-        ... -> ...
-        """
-        parsed_label = raw_label.lower().replace(" ", "_").replace("-", "_")
-        return re.sub(r"[^a-zA-Z0-9_]", "", parsed_label)
@@ -0,0 +1,89 @@
+import typing
+from html.parser import HTMLParser
+
+import bs4
+
+from notifier.application.document import (
+    NESTED_TAGS,
+    RENDER_BACKEND_LXML,
+    Document,
+)
+
+SKIPPED_NODES: typing.Final = (
+    bs4.Comment,
+    bs4.Doctype,
+    bs4.Declaration,
+    bs4.ProcessingInstruction,
+    bs4.CData,
+)
+
+
+class SoupDocument(Document[bs4.BeautifulSoup]):
+    """Body parsed by lxml into a BeautifulSoup tree."""
+
+    backend = RENDER_BACKEND_LXML
+
+    @staticmethod
+    def parse(html: str) -> bs4.BeautifulSoup:
+        return bs4.BeautifulSoup(html, "lxml")
+
+    @staticmethod
+    def _placeholder_tree() -> bs4.BeautifulSoup:
+        soup = bs4.BeautifulSoup("", "html.parser")
+        soup.append(soup.new_tag("p"))
+        return soup
+
+    @staticmethod
+    def _strip_nested_whitespace(tree: bs4.BeautifulSoup) -> None:
+        for tag in tree.find_all(NESTED_TAGS):
+            stripped = True
+            while stripped:
+                stripped = False
+                for child in list(tag.children):
+                    if _is_insignificant_whitespace(child):
+                        child.extract()
+                        stripped = True
+
+    @staticmethod
+    def _get_text(tree: bs4.BeautifulSoup) -> str:
+        return tree.get_text()
+
+    @staticmethod
+    def _replay(tree: bs4.BeautifulSoup, parser: HTMLParser) -> None:
+        _replay_children(tree, parser)
+
+
+def _replay_children(node: bs4.Tag, parser: HTMLParser) -> None:
+    for child in node.children:
+        if isinstance(child, SKIPPED_NODES):
+            continue
+        if isinstance(child, bs4.NavigableString):
+            parser.handle_data(str(child))
+        elif isinstance(child, bs4.Tag):
+            attrs: list[tuple[str, str | None]] = [
+                (name, " ".join(value) if isinstance(value, list) else value)
+                for name, value in child.attrs.items()
+            ]
+            if child.is_empty_element:
+                parser.handle_startendtag(child.name, attrs)
+                continue
+            parser.handle_starttag(child.name, attrs)
+            _replay_children(child, parser)
+            parser.handle_endtag(child.name)
+
+
+def _is_insignificant_whitespace(node: bs4.PageElement) -> bool:
+    return (
+        isinstance(node, bs4.NavigableString)
+        and not node.strip()
+        and (
+            not node.previous_sibling
+            or not node.next_sibling
+            or _is_nested(node.previous_sibling)
+            or _is_nested(node.next_sibling)
+        )
+    )
+
+
+def _is_nested(node: bs4.PageElement | None) -> bool:
+    return isinstance(node, bs4.Tag) and node.name in NESTED_TAGS
@@ -0,0 +1,84 @@
+"""
+Logic shared by the blocking and the asyncio code paths, written once.
+
+A generator of steps yields the I/O it needs and is sent the result
+back, or has the error thrown in at the ``yield``. ``run`` performs the
+steps by blocking, ``run_async`` on an event loop, so the two paths
+differ only in how they do the I/O.
+
+A step is any object ``perform`` understands, or ``Blocking``.
+"""
+
+import asyncio
+import dataclasses
+import typing
+from collections.abc import Awaitable, Callable, Generator
+
+_T = typing.TypeVar("_T")
+
+Steps: typing.TypeAlias = Generator[typing.Any, typing.Any, _T]
+
+
+@dataclasses.dataclass(frozen=True)
+class Blocking:
+    """A blocking call, e.g. to SQLite: run in a thread on an event loop."""
+
+    function: Callable[..., typing.Any]
+    args: tuple[typing.Any, ...] = ()
+
+
+def run(
+    steps: "Steps[_T]",
+    perform: Callable[[typing.Any], typing.Any],
+) -> _T:
+    """Perform the steps one after another, returns what ``steps`` does."""
+    result: typing.Any = None
+    error: Exception | None = None
+    try:
+        while True:
+            try:
+                if error is None:
+                    step = steps.send(result)
+                else:
+                    step = steps.throw(error)
+            except StopIteration as stop:
+                return typing.cast(_T, stop.value)
+            result, error = None, None
+            try:
+                if isinstance(step, Blocking):
+                    result = step.function(*step.args)
+                else:
+                    result = perform(step)
+            except Exception as e:  # noqa: BLE001
+                # raised where the step was yielded, if not handled there
+                error = e
+    finally:
+        steps.close()
+
+
+async def run_async(
+    steps: "Steps[_T]",
+    perform: Callable[[typing.Any], Awaitable[typing.Any]],
+) -> _T:
+    """``run`` on an event loop, ``Blocking`` steps run in a thread."""
+    result: typing.Any = None
+    error: Exception | None = None
+    try:
+        while True:
+            try:
+                if error is None:
+                    step = steps.send(result)
+                else:
+                    step = steps.throw(error)
+            except StopIteration as stop:
+                return typing.cast(_T, stop.value)
+            result, error = None, None
+            try:
+                if isinstance(step, Blocking):
+                    result = await asyncio.to_thread(step.function, *step.args)
+                else:
+                    result = await perform(step)
+            except Exception as e:  # noqa: BLE001
+                error = e
+    finally:
+        steps.close()
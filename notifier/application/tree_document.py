@@ -0,0 +1,80 @@
+from html.parser import HTMLParser
+
+from notifier.application import html_tree
+from notifier.application.document import (
+    NESTED_TAGS,
+    RENDER_BACKEND_STDLIB,
+    Document,
+)
+
+
+class TreeDocument(Document[html_tree.Element]):
+    """
+    Body parsed by ``html.parser`` into an ``html_tree`` tree, for runs
+    without lxml and BeautifulSoup installed.
+    """
+
+    backend = RENDER_BACKEND_STDLIB
+
+    @staticmethod
+    def parse(html: str) -> html_tree.Element:
+        return html_tree.parse(html)
+
+    @staticmethod
+    def _placeholder_tree() -> html_tree.Element:
+        tree = html_tree.Element(html_tree.DOCUMENT_NAME)
+        tree.append(html_tree.Element("p"))
+        return tree
+
+    @staticmethod
+    def _strip_nested_whitespace(tree: html_tree.Element) -> None:
+        for element in tree.find_all(NESTED_TAGS):
+            stripped = True
+            while stripped:
+                stripped = False
+                for child in list(element.children):
+                    if _is_insignificant_whitespace(child):
+                        child.extract()
+                        stripped = True
+
+    @staticmethod
+    def _get_text(tree: html_tree.Element) -> str:
+        return tree.get_text()
+
+    @staticmethod
+    def _replay(tree: html_tree.Element, parser: HTMLParser) -> None:
+        _replay_children(tree, parser)
+
+
+def _replay_children(
+    element: html_tree.Element, parser: HTMLParser,
+) -> None:
+    for child in element.children:
+        if isinstance(child, html_tree.Text):
+            parser.handle_data(child.data)
+        elif isinstance(child, html_tree.Element):
+            attrs: list[tuple[str, str | None]] = list(child.attrs.items())
+            if child.is_empty_element:
+                parser.handle_startendtag(child.name, attrs)
+                continue
+            parser.handle_starttag(child.name, attrs)
+            _replay_children(child, parser)
+            parser.handle_endtag(child.name)
+
+
+def _is_insignificant_whitespace(node: html_tree.Node) -> bool:
+    return (
+        # comments count as strings, like in BeautifulSoup
+        isinstance(node, html_tree.CharacterData)
+        and not node.data.strip()
+        and (
+            not node.previous_sibling
+            or not node.next_sibling
+            or _is_nested(node.previous_sibling)
+            or _is_nested(node.next_sibling)
+        )
+    )
+
+
+def _is_nested(node: html_tree.Node | None) -> bool:
+    return isinstance(node, html_tree.Element) and node.name in NESTED_TAGS
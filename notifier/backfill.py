@@ -0,0 +1,343 @@
+import argparse
+import contextlib
+import datetime
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import typing
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from notifier.application.dispatcher import (
+    DeliveryResult,
+    Dispatcher,
+    DispatchError,
+)
+from notifier.application.interfaces import Github, Notifier, Outbox
+from notifier.application.routing import Router
+from notifier.application.services import RenderService
+from notifier.factory import (
+    create_digest_notifiers,
+    create_dispatcher,
+    create_github_gateway,
+    create_graphql_client,
+    create_http_client,
+    create_message_index,
+    create_notifiers,
+    create_outbox,
+    create_render_cache,
+    create_render_service,
+    create_response_cache,
+    create_router,
+    flush_digests,
+    get_interactor,
+    register_metrics_hooks,
+    report_metrics,
+)
+from notifier.infrastructure.github_gateway import GithubEventsGateway
+from notifier.infrastructure.github_graphql_gateway import (
+    GRAPHQL_BATCH_SIZE_DEFAULT,
+    GithubGraphQLClient,
+    PrefetchedGithubGateway,
+)
+from notifier.infrastructure.http_client import HttpClient
+from notifier.infrastructure.render_cache import (
+    RENDER_CACHE_SIZE_DEFAULT,
+    RenderCache,
+)
+from notifier.infrastructure.response_cache import ResponseCache
+
+BACKFILL_CONCURRENCY_DEFAULT: typing.Final = 4
+# datetime.UTC, which Python 3.10 does not have
+UTC: typing.Final = datetime.timezone(datetime.timedelta(0))
+
+
+def parse_date(value: str) -> datetime.datetime:
+    # dates without an offset are UTC, "Z" included
+    date = datetime.datetime.fromisoformat(value.removesuffix("Z"))
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=UTC)
+    return date
+
+
+def read_urls(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        url = line.strip()
+        if url and not url.startswith("#"):
+            yield url
+
+
+@contextlib.contextmanager
+def open_urls(path: str) -> Iterator[Iterator[str]]:
+    """URLs listed in the file at ``path``, ``-`` reads stdin."""
+    if path == "-":
+        yield read_urls(sys.stdin)
+        return
+    with open(path, encoding="utf-8") as file:
+        yield read_urls(file)
+
+
+class Backfill:
+    """
+    Sends many events through the regular interactors with at most
+    ``concurrency`` events in flight, writing one JSON line per event
+    as soon as it's done and a summary line at the end.
+
+    With a ``graphql`` client the events are fetched ``batch_size`` at a
+    time, each batch with one query, while the previous one is sent.
+    """
+
+    def __init__(
+        self,
+        http_client: HttpClient,
+        notifiers: list[Notifier],
+        render_service: RenderService,
+        dispatcher: Dispatcher,
+        concurrency: int,
+        output: typing.TextIO,
+        response_cache: ResponseCache | None = None,
+        render_cache: RenderCache | None = None,
+        graphql: GithubGraphQLClient | None = None,
+        batch_size: int = GRAPHQL_BATCH_SIZE_DEFAULT,
+        outbox: Outbox | None = None,
+        router: Router | None = None,
+    ) -> None:
+        self._outbox = outbox
+        self._router = router
+        self._http_client = http_client
+        self._graphql = graphql
+        self._batch_size = batch_size
+        self._response_cache = response_cache
+        self._render_cache = render_cache
+        self._notifiers = notifiers
+        self._render_service = render_service
+        self._dispatcher = dispatcher
+        self._concurrency = concurrency
+        self._output = output
+        self._output_lock = threading.Lock()
+        self._counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    def run(self, urls: Iterable[str]) -> bool:
+        started = time.monotonic()
+        slots = threading.BoundedSemaphore(self._concurrency)
+
+        with ThreadPoolExecutor(
+            max_workers=self._concurrency,
+            thread_name_prefix="backfill",
+        ) as executor:
+            for index, (url, github) in enumerate(self._prefetch(urls)):
+                slots.acquire()
+                future = executor.submit(self._process, index, url, github)
+                future.add_done_callback(
+                    lambda f: self._on_done(f, slots),
+                )
+
+        summary: dict[str, typing.Any] = {
+            **self._counts,
+            "elapsed": round(time.monotonic() - started, 3),
+        }
+        if self._render_cache is not None:
+            stats = self._render_cache.stats()
+            summary["render_cache"] = {
+                "hits": stats.hits,
+                "disk_hits": stats.disk_hits,
+                "misses": stats.misses,
+            }
+        self._write({"summary": summary})
+        return self._counts["failed"] == 0
+
+    def _prefetch(
+        self,
+        urls: Iterable[str],
+    ) -> Iterator[tuple[str, Github | None]]:
+        if self._graphql is None:
+            for url in urls:
+                yield url, None
+            return
+
+        urls = iter(urls)
+        while batch := list(itertools.islice(urls, self._batch_size)):
+            try:
+                events = self._graphql.fetch(batch)
+            except Exception as e:  # noqa: BLE001
+                events = dict.fromkeys(batch, e)
+            for url in batch:
+                yield url, PrefetchedGithubGateway(events[url])
+
+    def _process(
+        self,
+        index: int,
+        url: str,
+        github: Github | None = None,
+    ) -> dict[str, typing.Any]:
+        record: dict[str, typing.Any] = {"index": index, "url": url}
+        started = time.monotonic()
+        try:
+            interactor_class = get_interactor(url)
+        except ValueError as e:
+            record.update(status="skipped", error=str(e))
+            return record
+
+        interactor = interactor_class(
+            github=github or create_github_gateway(
+                url, self._http_client, self._response_cache,
+            ),
+            notifiers=self._notifiers,
+            render_service=self._render_service,
+            dispatcher=self._dispatcher,
+            outbox=self._outbox,
+            router=self._router,
+        )
+        try:
+            results = interactor.handler()
+        except DispatchError as e:
+            record.update(
+                status="failed",
+                error=str(e),
+                destinations=self._describe(e.results),
+            )
+        except Exception as e:  # noqa: BLE001
+            record.update(status="failed", error=repr(e))
+        else:
+            record.update(status="ok", destinations=self._describe(results))
+        record["elapsed"] = round(time.monotonic() - started, 3)
+        return record
+
+    def _on_done(
+        self,
+        future: "Future[dict[str, typing.Any]]",
+        slots: threading.BoundedSemaphore,
+    ) -> None:
+        try:
+            self._write(future.result())
+        finally:
+            slots.release()
+
+    def _describe(self, results: list[DeliveryResult]) -> list[dict]:
+        return [
+            {
+                "destination": result.destination,
+                "ok": result.ok,
+                "elapsed": round(result.elapsed, 3),
+                **({} if result.ok else {"error": repr(result.error)}),
+            }
+            for result in results
+        ]
+
+    def _write(self, record: dict[str, typing.Any]) -> None:
+        with self._output_lock:
+            if "status" in record:
+                self._counts[record["status"]] += 1
+            self._output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._output.flush()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m notifier.backfill",
+        description=(
+            "Send notifications for many issues/PRs at once. "
+            "Results are written to stdout as JSON lines."
+        ),
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "file",
+        nargs="?",
+        help="file with one issue/PR API URL per line, '-' for stdin",
+    )
+    source.add_argument(
+        "--repo",
+        help="owner/name: replay issues and PRs created in a date range",
+    )
+    parser.add_argument("--since", type=parse_date, help="ISO date, inclusive")
+    parser.add_argument("--until", type=parse_date, help="ISO date, exclusive")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BACKFILL_CONCURRENCY_DEFAULT,
+        help="events processed at the same time",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=GRAPHQL_BATCH_SIZE_DEFAULT,
+        help="events fetched with one query when GITHUB_API=graphql",
+    )
+    args = parser.parse_args(argv)
+    if args.repo and args.since is None:
+        parser.error("--repo requires --since")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    # stdout is reserved for the JSON lines, gateway logs go to stderr
+    output = sys.stdout
+    sys.stdout = sys.stderr
+
+    register_metrics_hooks()
+    http_client = create_http_client()
+
+    urls: contextlib.AbstractContextManager[Iterable[str]]
+    if args.repo:
+        urls = contextlib.nullcontext(
+            GithubEventsGateway(
+                token=(os.environ.get("GITHUB_TOKEN") or "").strip(),
+                http_client=http_client,
+            ).list_event_urls(
+                repository=args.repo,
+                since=args.since,
+                until=args.until,
+            ),
+        )
+    else:
+        urls = open_urls(args.file)
+
+    render_cache = create_render_cache(RENDER_CACHE_SIZE_DEFAULT)
+    try:
+        graphql = create_graphql_client(http_client)
+        outbox = create_outbox()
+        message_index = create_message_index()
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    notifiers = create_digest_notifiers(
+        create_notifiers(
+            http_client,
+            render_cache=render_cache,
+            message_index=message_index,
+        ),
+    )
+    backfill = Backfill(
+        http_client=http_client,
+        notifiers=notifiers,
+        render_service=create_render_service(render_cache),
+        dispatcher=create_dispatcher(),
+        concurrency=args.concurrency,
+        output=output,
+        response_cache=create_response_cache(),
+        render_cache=render_cache,
+        graphql=graphql,
+        batch_size=args.batch_size,
+        outbox=outbox,
+        router=create_router(notifiers),
+    )
+    try:
+        with urls as event_urls:
+            ok = backfill.run(event_urls)
+    finally:
+        flushed = flush_digests(notifiers)
+        report_metrics()
+        http_client.close()
+        if outbox is not None:
+            outbox.close()
+        if message_index is not None:
+            message_index.close()
+    sys.exit(0 if ok and flushed else 1)
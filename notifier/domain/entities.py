@@ -28,3 +28,14 @@ class PullRequest:
     head_ref: str
     base_ref: str
     repository: str
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class SentMessage:
+    """
+    Messages an event was posted as, to edit them later, with a hash of
+    the content of each.
+    """
+
+    message_ids: list[str]
+    payload_hashes: list[str]
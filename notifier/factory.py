@@ -0,0 +1,677 @@
+import importlib
+import json
+import os
+import re
+import sys
+import traceback
+import typing
+from collections.abc import Callable
+
+from notifier.application import metrics
+from notifier.application.digest import (
+    DIGEST_MAX_EVENTS_DEFAULT,
+    DigestNotifier,
+)
+from notifier.application.dispatcher import (
+    AsyncDispatcher,
+    Dispatcher,
+    DispatchError,
+)
+from notifier.application.document import (
+    RENDER_BACKEND_LXML,
+    RENDER_BACKENDS,
+)
+from notifier.application.html_budget import BODY_TEXT_LIMIT_DEFAULT
+from notifier.application.interactors import SendIssue, SendPR
+from notifier.application.interfaces import (
+    AsyncNotifier,
+    Cache,
+    Github,
+    MessageIndex,
+    Notifier,
+)
+from notifier.application.routing import EVENT_TYPES, Router, RoutingRule
+from notifier.application.services import RenderService
+from notifier.infrastructure.disk_cache import DiskCache
+from notifier.infrastructure.github_gateway import (
+    AsyncGithubGateway,
+    GithubGateway,
+)
+from notifier.infrastructure.github_graphql_gateway import (
+    GithubGraphQLClient,
+    GithubGraphQLGateway,
+)
+from notifier.infrastructure.http_client import (
+    HTTP_POOL_SIZE_DEFAULT,
+    HttpClient,
+)
+from notifier.infrastructure.message_index import SqliteMessageIndex
+from notifier.infrastructure.outbox import SqliteOutbox
+from notifier.infrastructure.rate_limiter import RateLimiter
+from notifier.infrastructure.render_cache import (
+    RENDER_CACHE_DISK_SIZE_DEFAULT,
+    RenderCache,
+)
+from notifier.infrastructure.response_cache import (
+    RESPONSE_CACHE_SIZE_DEFAULT,
+    ResponseCache,
+)
+from notifier.infrastructure.retry import RETRY_DEADLINE_DEFAULT
+
+if typing.TYPE_CHECKING:
+    from notifier.infrastructure.async_http_client import AsyncHttpClient
+
+_ClientT = typing.TypeVar("_ClientT")
+_GatewayT = typing.TypeVar("_GatewayT")
+
+
+def get_interactor(url: str) -> type[SendIssue] | type[SendPR]:
+    issue_pattern = (
+        r"https://(?:api\.)?github\.com/repos/[\w\-\.]+/[\w\-\.]+/issues/\d+"
+    )
+
+    pr_pattern = r"https://(?:api\.)?github\.com/repos/[\w\-\.]+/[\w\-\.]+/pulls/\d+"
+
+    if re.match(issue_pattern, url):
+        return SendIssue
+    elif re.match(pr_pattern, url):
+        return SendPR
+    else:
+        raise ValueError(f"Unknown event type for URL: {url}")
+
+
+def create_http_client() -> HttpClient:
+    return HttpClient(
+        pool_maxsize=int(
+            os.environ.get("HTTP_POOL_SIZE") or HTTP_POOL_SIZE_DEFAULT,
+        ),
+    )
+
+
+def create_response_cache() -> ResponseCache | None:
+    cache_dir = os.environ.get("GITHUB_CACHE_DIR")
+    if not cache_dir:
+        return None
+    return ResponseCache(
+        directory=cache_dir,
+        max_size=int(
+            os.environ.get("GITHUB_CACHE_SIZE") or RESPONSE_CACHE_SIZE_DEFAULT,
+        ),
+    )
+
+
+def create_github_gateway(
+    event_url: str,
+    http_client: HttpClient,
+    cache: ResponseCache | None = None,
+) -> Github:
+    token = (os.environ.get("GITHUB_TOKEN") or "").strip()
+    if os.environ.get("GITHUB_API") == "graphql":
+        # POST queries can't be revalidated, so the response cache is unused
+        return GithubGraphQLGateway(
+            token=token,
+            event_url=event_url,
+            http_client=http_client,
+        )
+    return GithubGateway(
+        token=token,
+        event_url=event_url,
+        http_client=http_client,
+        cache=cache,
+    )
+
+
+def create_graphql_client(
+    http_client: HttpClient,
+) -> GithubGraphQLClient | None:
+    """Client for batched fetches, if ``GITHUB_API=graphql``."""
+    if os.environ.get("GITHUB_API") != "graphql":
+        return None
+    return GithubGraphQLClient(
+        token=(os.environ.get("GITHUB_TOKEN") or "").strip(),
+        http_client=http_client,
+    )
+
+
+def create_async_github_gateway(
+    event_url: str,
+    http_client: "AsyncHttpClient",
+    cache: ResponseCache | None = None,
+) -> AsyncGithubGateway:
+    return AsyncGithubGateway(
+        token=(os.environ.get("GITHUB_TOKEN") or "").strip(),
+        event_url=event_url,
+        http_client=http_client,
+        cache=cache,
+    )
+
+
+def create_outbox() -> SqliteOutbox | None:
+    outbox_path = os.environ.get("OUTBOX_PATH")
+    if not outbox_path:
+        return None
+    return SqliteOutbox(outbox_path)
+
+
+def create_message_index() -> SqliteMessageIndex | None:
+    message_index_path = os.environ.get("MESSAGE_INDEX_PATH")
+    if not message_index_path:
+        return None
+    return SqliteMessageIndex(message_index_path)
+
+
+def create_render_cache(max_size_default: int = 0) -> RenderCache | None:
+    """
+    One-shot runs render every body once, so the in-memory tier is off
+    unless ``RENDER_CACHE_SIZE`` is set or the caller expects repeats.
+    """
+    max_size = int(os.environ.get("RENDER_CACHE_SIZE") or max_size_default)
+    cache_dir = os.environ.get("RENDER_CACHE_DIR")
+    if not max_size and not cache_dir:
+        return None
+
+    disk = None
+    if cache_dir:
+        disk = DiskCache(
+            directory=cache_dir,
+            max_size=int(
+                os.environ.get("RENDER_CACHE_DISK_SIZE")
+                or RENDER_CACHE_DISK_SIZE_DEFAULT,
+            ),
+        )
+    return RenderCache(max_size=max_size, disk=disk)
+
+
+def create_render_service(cache: Cache | None = None) -> RenderService:
+    custom_labels = os.environ.get("CUSTOM_LABELS", "").split(",")
+    if custom_labels == [""]:
+        custom_labels = []
+
+    backend = os.environ.get("RENDER_BACKEND") or RENDER_BACKEND_LXML
+    if backend not in RENDER_BACKENDS:
+        raise ValueError(
+            f"Unknown RENDER_BACKEND {backend!r}, expected one of "
+            f"{', '.join(RENDER_BACKENDS)}",
+        )
+
+    return RenderService(
+        custom_labels=custom_labels,
+        join_input_with_list=os.environ.get("JOIN_INPUT_WITH_LIST") == "1",
+        cache=cache,
+        body_text_limit=int(
+            os.environ.get("BODY_TEXT_LIMIT") or BODY_TEXT_LIMIT_DEFAULT,
+        ),
+        backend=backend,
+    )
+
+
+def read_destinations() -> list[dict[str, typing.Any]]:
+    """
+    Destinations from ``DESTINATIONS``, a JSON list of objects with a
+    ``platform`` key and per-destination options, followed by the ones
+    from the platform env vars, which accept comma separated lists.
+    """
+    destinations: list[dict[str, typing.Any]] = []
+
+    raw_destinations = os.environ.get("DESTINATIONS", "").strip()
+    if raw_destinations:
+        destinations.extend(json.loads(raw_destinations))
+
+    if os.environ.get("TELEGRAM_BOT_TOKEN"):
+        for chat in _split_list(os.environ.get("TELEGRAM_CHAT_ID", "")):
+            # "chat_id:thread_id" posts to a topic of that chat
+            chat_id, _, thread_id = chat.partition(":")
+            destinations.append({
+                "platform": "telegram",
+                "chat_id": chat_id,
+                "message_thread_id": (
+                    thread_id or os.environ.get("TELEGRAM_MESSAGE_THREAD_ID")
+                ),
+            })
+
+    for webhook_url in _split_list(os.environ.get("DISCORD_WEBHOOK_URL", "")):
+        destinations.append({"platform": "discord", "webhook_url": webhook_url})
+
+    return destinations
+
+
+def _split_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def create_router(
+    notifiers: typing.Sequence[Notifier | AsyncNotifier],
+) -> Router | None:
+    """
+    Router for the rules in ``ROUTES``, a JSON list of objects. Rules
+    name destinations by the ``name`` given to them in ``DESTINATIONS``
+    or by their ``destination`` key.
+    """
+    raw_routes = os.environ.get("ROUTES", "").strip()
+    if not raw_routes:
+        return None
+
+    try:
+        rules = [_routing_rule(options) for options in json.loads(raw_routes)]
+        aliases = {
+            options["name"]: notifier.destination
+            for options, notifier in zip(
+                read_destinations(), notifiers, strict=True,
+            )
+            if options.get("name")
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Error: Invalid route: {e!r}", file=sys.stderr)
+        sys.exit(1)
+    return Router(rules, aliases)
+
+
+def _routing_rule(options: dict[str, typing.Any]) -> RoutingRule:
+    events = _string_set(options.get("events"))
+    if not events <= set(EVENT_TYPES):
+        raise ValueError(f"unknown event types: {sorted(events)}")
+    add_labels = options.get("add_labels") or []
+    if isinstance(add_labels, str):
+        add_labels = _split_list(add_labels)
+    return RoutingRule(
+        destinations=_string_set(options["destinations"]),
+        labels=_string_set(options.get("labels")),
+        repositories=_string_set(options.get("repositories")),
+        authors=_string_set(options.get("authors")),
+        events=events,
+        add_labels=tuple(map(str, add_labels)),
+    )
+
+
+def _string_set(value: str | list[str] | None) -> frozenset[str]:
+    if not value:
+        return frozenset()
+    if isinstance(value, str):
+        return frozenset(_split_list(value))
+    return frozenset(map(str, value))
+
+
+def _telegram_options(options: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    from notifier.infrastructure.telegram_gateway import (
+        TG_API_URL_DEFAULT,
+        TG_MESSAGE_LIMIT_DEFAULT,
+        TG_MESSAGE_PARTS_DEFAULT,
+    )
+
+    bot_token = options.get("bot_token") or os.environ.get("TELEGRAM_BOT_TOKEN")
+    if not bot_token:
+        raise ValueError("telegram destination without bot_token")
+
+    return {
+        "chat_id": str(options["chat_id"]),
+        "bot_token": bot_token,
+        "attempt_count": int(
+            options.get("attempt_count") or os.environ.get("ATTEMPT_COUNT", "2"),
+        ),
+        "message_thread_id": options.get("message_thread_id"),
+        "custom_template": (
+            options.get("template") or os.environ.get("HTML_TEMPLATE", "")
+        ).strip(),
+        "tg_message_limit": int(
+            options.get("message_limit")
+            or os.environ.get("TELEGRAM_MESSAGE_LIMIT")
+            or TG_MESSAGE_LIMIT_DEFAULT,
+        ),
+        "split_messages": bool(
+            options.get(
+                "split_messages",
+                os.environ.get("TELEGRAM_SPLIT_MESSAGES") == "1",
+            ),
+        ),
+        "max_parts": int(
+            options.get("max_parts")
+            or os.environ.get("TELEGRAM_MESSAGE_PARTS")
+            or TG_MESSAGE_PARTS_DEFAULT,
+        ),
+        "retry_deadline": _retry_deadline(options),
+        # a local Bot API server, or a stand-in for load tests
+        "api_url": (
+            options.get("api_url")
+            or os.environ.get("TELEGRAM_API_URL")
+            or TG_API_URL_DEFAULT
+        ),
+    }
+
+
+def _discord_options(options: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    return {
+        "webhook_url": options["webhook_url"],
+        "attempt_count": int(
+            options.get("attempt_count") or os.environ.get("ATTEMPT_COUNT", "2"),
+        ),
+        "retry_deadline": _retry_deadline(options),
+    }
+
+
+def _retry_deadline(options: dict[str, typing.Any]) -> float | None:
+    """Seconds to keep retrying one event, 0 retries until attempts run out."""
+    retry_deadline = options.get(
+        "retry_deadline", os.environ.get("RETRY_DEADLINE"),
+    )
+    if retry_deadline in (None, ""):
+        return RETRY_DEADLINE_DEFAULT
+    return float(retry_deadline) or None
+
+
+def create_telegram_gateway(
+    options: dict[str, typing.Any],
+    http_client: HttpClient,
+    rate_limiter: RateLimiter,
+    render_cache: Cache | None,
+    message_index: MessageIndex | None,
+) -> Notifier:
+    from notifier.infrastructure.telegram_gateway import TelegramGateway
+
+    return TelegramGateway(
+        http_client=http_client,
+        rate_limiter=rate_limiter,
+        render_cache=render_cache,
+        message_index=message_index,
+        **_telegram_options(options),
+    )
+
+
+def create_discord_gateway(
+    options: dict[str, typing.Any],
+    http_client: HttpClient,
+    rate_limiter: RateLimiter,
+    render_cache: Cache | None,
+    message_index: MessageIndex | None,
+) -> Notifier:
+    from notifier.infrastructure.discord_gateway import DiscordGateway
+
+    return DiscordGateway(
+        http_client=http_client,
+        rate_limiter=rate_limiter,
+        render_cache=render_cache,
+        message_index=message_index,
+        **_discord_options(options),
+    )
+
+
+def create_async_telegram_gateway(
+    options: dict[str, typing.Any],
+    http_client: "AsyncHttpClient",
+    rate_limiter: RateLimiter,
+    render_cache: Cache | None,
+    message_index: MessageIndex | None,
+) -> AsyncNotifier:
+    from notifier.infrastructure.telegram_gateway import AsyncTelegramGateway
+
+    return AsyncTelegramGateway(
+        http_client=http_client,
+        rate_limiter=rate_limiter,
+        render_cache=render_cache,
+        message_index=message_index,
+        **_telegram_options(options),
+    )
+
+
+def create_async_discord_gateway(
+    options: dict[str, typing.Any],
+    http_client: "AsyncHttpClient",
+    rate_limiter: RateLimiter,
+    render_cache: Cache | None,
+    message_index: MessageIndex | None,
+) -> AsyncNotifier:
+    from notifier.infrastructure.discord_gateway import AsyncDiscordGateway
+
+    return AsyncDiscordGateway(
+        http_client=http_client,
+        rate_limiter=rate_limiter,
+        render_cache=render_cache,
+        message_index=message_index,
+        **_discord_options(options),
+    )
+
+
+# Platform modules pull in their own parsers (sulguk, markdownify), so they
+# are imported only when a destination on that platform is configured.
+GATEWAYS: typing.Final[
+    dict[
+        str,
+        Callable[
+            [
+                dict[str, typing.Any],
+                HttpClient,
+                RateLimiter,
+                Cache | None,
+                MessageIndex | None,
+            ],
+            Notifier,
+        ],
+    ]
+] = {
+    "telegram": create_telegram_gateway,
+    "discord": create_discord_gateway,
+}
+
+ASYNC_GATEWAYS: typing.Final[
+    dict[
+        str,
+        Callable[
+            [
+                dict[str, typing.Any],
+                "AsyncHttpClient",
+                RateLimiter,
+                Cache | None,
+                MessageIndex | None,
+            ],
+            AsyncNotifier,
+        ],
+    ]
+] = {
+    "telegram": create_async_telegram_gateway,
+    "discord": create_async_discord_gateway,
+}
+
+
+def create_notifiers(
+    http_client: HttpClient,
+    rate_limiter: RateLimiter | None = None,
+    render_cache: Cache | None = None,
+    message_index: MessageIndex | None = None,
+) -> list[Notifier]:
+    return _create_gateways(
+        GATEWAYS, http_client, rate_limiter, render_cache, message_index,
+    )
+
+
+def create_async_notifiers(
+    http_client: "AsyncHttpClient",
+    rate_limiter: RateLimiter | None = None,
+    render_cache: Cache | None = None,
+    message_index: MessageIndex | None = None,
+) -> list[AsyncNotifier]:
+    return _create_gateways(
+        ASYNC_GATEWAYS,
+        http_client,
+        rate_limiter,
+        render_cache,
+        message_index,
+    )
+
+
+def _create_gateways(
+    gateways: dict[
+        str,
+        Callable[
+            [
+                dict[str, typing.Any],
+                _ClientT,
+                RateLimiter,
+                Cache | None,
+                MessageIndex | None,
+            ],
+            _GatewayT,
+        ],
+    ],
+    http_client: _ClientT,
+    rate_limiter: RateLimiter | None,
+    render_cache: Cache | None,
+    message_index: MessageIndex | None,
+) -> list[_GatewayT]:
+    rate_limiter = rate_limiter or RateLimiter()
+
+    try:
+        destinations = read_destinations()
+        if render_cache is None and len(destinations) > 1:
+            # destinations sharing a template render it once
+            render_cache = RenderCache()
+        notifiers = []
+        for destination in destinations:
+            create_gateway = gateways.get(destination["platform"])
+            if create_gateway is None:
+                raise ValueError(
+                    f"unknown platform: {destination['platform']!r}",
+                )
+            notifiers.append(
+                create_gateway(
+                    destination,
+                    http_client,
+                    rate_limiter,
+                    render_cache,
+                    message_index,
+                ),
+            )
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Error: Invalid destination: {e!r}", file=sys.stderr)
+        sys.exit(1)
+
+    if not notifiers:
+        print(
+            "Error: No notification platform configured. "
+            "Please provide either TELEGRAM_BOT_TOKEN + TELEGRAM_CHAT_ID, "
+            "DISCORD_WEBHOOK_URL or DESTINATIONS",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    return notifiers
+
+
+def create_digest_notifiers(notifiers: list[Notifier]) -> list[Notifier]:
+    """
+    With ``DIGEST_WINDOW`` seconds set, events for each destination are
+    collected and sent as digests of up to ``DIGEST_MAX_EVENTS``.
+    """
+    window = os.environ.get("DIGEST_WINDOW")
+    if not window:
+        return notifiers
+    if os.environ.get("OUTBOX_PATH"):
+        # the outbox would record queued events as delivered
+        print(
+            "Error: DIGEST_WINDOW can't be used together with OUTBOX_PATH",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    max_events = int(
+        os.environ.get("DIGEST_MAX_EVENTS") or DIGEST_MAX_EVENTS_DEFAULT,
+    )
+    return [
+        DigestNotifier(notifier, float(window), max_events)
+        for notifier in notifiers
+    ]
+
+
+def _flush_digest(notifier: Notifier) -> None:
+    assert isinstance(notifier, DigestNotifier)
+    notifier.flush()
+
+
+def flush_digests(notifiers: list[Notifier]) -> bool:
+    """Sends the queued digests, False if some of them failed."""
+    digests = [
+        notifier
+        for notifier in notifiers
+        if isinstance(notifier, DigestNotifier)
+    ]
+    try:
+        Dispatcher().dispatch(digests, _flush_digest)
+    except DispatchError as e:
+        report_error(e)
+        return False
+    return True
+
+
+def create_dispatcher() -> Dispatcher:
+    notifier_timeout = os.environ.get("NOTIFIER_TIMEOUT")
+    return Dispatcher(
+        timeout=float(notifier_timeout) if notifier_timeout else None,
+        concurrent=os.environ.get("CONCURRENT_DISPATCH", "1") == "1",
+    )
+
+
+def create_async_dispatcher() -> AsyncDispatcher:
+    notifier_timeout = os.environ.get("NOTIFIER_TIMEOUT")
+    return AsyncDispatcher(
+        timeout=float(notifier_timeout) if notifier_timeout else None,
+        concurrent=os.environ.get("CONCURRENT_DISPATCH", "1") == "1",
+    )
+
+
+def report_error(e: Exception) -> None:
+    if isinstance(e, DispatchError):
+        for result in e.results:
+            status = "ok" if result.ok else f"failed: {result.error!r}"
+            print(
+                f"{result.destination} ({result.elapsed:.2f}s): {status}",
+                file=sys.stderr,
+            )
+        for failure in e.failures:
+            assert failure.error is not None
+            traceback.print_exception(failure.error, file=sys.stderr)
+    else:
+        traceback.print_exception(e, file=sys.stderr)
+    print(f"Error processing event: {e}", file=sys.stderr)
+
+
+def report_http_stats(http_client: HttpClient) -> None:
+    if os.environ.get("HTTP_STATS") != "1":
+        return
+    for host_stats in http_client.stats():
+        print(
+            f"{host_stats.host}: {host_stats.requests} requests over "
+            f"{host_stats.connections} connections "
+            f"({host_stats.reused} reused)",
+        )
+
+
+def report_render_cache_stats(render_cache: RenderCache | None) -> None:
+    if render_cache is None or os.environ.get("RENDER_CACHE_STATS") != "1":
+        return
+    stats = render_cache.stats()
+    print(
+        f"render cache: {stats.hits} hits, {stats.disk_hits} disk hits, "
+        f"{stats.misses} misses ({stats.hit_ratio:.0%})",
+    )
+
+
+def register_metrics_hooks() -> None:
+    """
+    ``METRICS_HOOKS`` is a comma-separated list of ``module:attribute``
+    callables returning a ``MetricsHook``, e.g. a Prometheus exporter.
+    """
+    for path in _split_list(os.environ.get("METRICS_HOOKS", "")):
+        module_name, _, attribute = path.partition(":")
+        create_hook = getattr(importlib.import_module(module_name), attribute)
+        metrics.add_hook(create_hook())
+
+
+def report_metrics() -> None:
+    snapshot = metrics.snapshot()
+    metrics_file = os.environ.get("METRICS_FILE")
+    if metrics_file:
+        with open(metrics_file, "w") as f:
+            json.dump(snapshot, f, indent=2)
+
+    summary_file = os.environ.get("GITHUB_STEP_SUMMARY")
+    if summary_file and os.environ.get("METRICS_SUMMARY") == "1":
+        with open(summary_file, "a") as f:
+            f.write("### relator timings\n\n")
+            f.write(metrics.format_summary(snapshot))
@@ -0,0 +1,84 @@
+import asyncio
+import typing
+import urllib.parse
+
+try:
+    import httpx
+except ImportError as e:
+    raise ImportError(
+        "the asyncio gateways need httpx, "
+        "install it with: pip install -r requirements-async.txt",
+    ) from e
+
+from notifier.infrastructure.http_client import (
+    HTTP_POOL_SIZE_DEFAULT,
+    HTTP_TIMEOUT_DEFAULT,
+)
+
+# failures to get a response at all, worth another attempt
+TRANSPORT_ERRORS: typing.Final = (httpx.TransportError,)
+
+
+class AsyncHttpClient:
+    """
+    ``HttpClient`` for the asyncio gateways: one keep-alive pool per
+    host, used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = HTTP_POOL_SIZE_DEFAULT,
+        timeout: float = HTTP_TIMEOUT_DEFAULT,
+    ) -> None:
+        self._pool_maxsize = pool_maxsize
+        self._timeout = timeout
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout
+
+    async def get(self, url: str, **kwargs: typing.Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: typing.Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        **kwargs: typing.Any,
+    ) -> httpx.Response:
+        if isinstance(kwargs.get("timeout"), (int, float)):
+            kwargs["timeout"] = httpx.Timeout(kwargs["timeout"], pool=None)
+        return await self.client(url).request(method, url, **kwargs)
+
+    def client(self, url: str) -> httpx.AsyncClient:
+        host = self._host(url)
+        client = self._clients.get(host)
+        if client is None:
+            client = self._clients[host] = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self._pool_maxsize,
+                    max_keepalive_connections=self._pool_maxsize,
+                ),
+                # waiting for a free connection is not a failed request
+                timeout=httpx.Timeout(self._timeout, pool=None),
+            )
+        return client
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self.aclose()
+
+    def _host(self, url: str) -> str:
+        parsed = urllib.parse.urlsplit(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
@@ -1,60 +1,149 @@
+import dataclasses
+import hashlib
+import json
+import sys
 import typing
-from datetime import datetime, timezone
+import urllib.parse
+from datetime import datetime, timedelta, timezone
 
-import bs4
-from markdownify import markdownify
+from notifier.application import interfaces, metrics
+from notifier.application.digest import DigestItem
+from notifier.application.document import RENDER_BACKEND_STDLIB, Document
+from notifier.application.steps import Blocking, Steps, run, run_async
+from notifier.domain.entities import Issue, PullRequest, SentMessage
+from notifier.infrastructure.http_client import HttpClient
+from notifier.infrastructure.rate_limiter import (
+    DISCORD_CHANNEL_LIMIT,
+    DISCORD_WEBHOOK_LIMIT,
+    Bucket,
+    RateLimiter,
+)
+from notifier.infrastructure.retry import (
+    RETRY_DEADLINE_DEFAULT,
+    CircuitBreaker,
+    Deadline,
+    SendError,
+)
+from notifier.infrastructure.send_weebhook import (
+    send_webhook,
+    send_webhook_async,
+)
 
-from notifier.application import interfaces
-from notifier.domain.entities import Issue, PullRequest
-from notifier.infrastructure.send_weebhook import send_webhook
+if typing.TYPE_CHECKING:
+    import httpx
+    import requests
+
+    from notifier.infrastructure.async_http_client import AsyncHttpClient
+    from notifier.infrastructure.soup_markdown import SoupMarkdownConverter
+    from notifier.infrastructure.tree_markdown import TreeMarkdownConverter
+
+# the async client needs httpx, only imported when type checking
+_AsyncClient: typing.TypeAlias = "AsyncHttpClient"
 
 DISCORD_EMBED_DESC_LIMIT: typing.Final = 2000
+# datetime.UTC, which Python 3.10 does not have
+UTC: typing.Final = timezone(timedelta(0))
 DISCORD_COLOR_ISSUE: typing.Final = 0x28A745  # green
 DISCORD_COLOR_PR: typing.Final = 0x6F42C1  # purple
+# https://discord.com/developers/docs/resources/message#embed-object-embed-limits
+DISCORD_EMBEDS_PER_MESSAGE: typing.Final = 10
+DISCORD_EMBEDS_TOTAL_LIMIT: typing.Final = 6000
+
+
+_ClientT = typing.TypeVar("_ClientT")
+
+
+def _markdown_converter(
+    backend: str,
+) -> "SoupMarkdownConverter | TreeMarkdownConverter":
+    # imported on first use, like the parsers of the backend
+    if backend == RENDER_BACKEND_STDLIB:
+        from notifier.infrastructure.tree_markdown import (
+            TreeMarkdownConverter,
+        )
+
+        return TreeMarkdownConverter()
+    from notifier.infrastructure.soup_markdown import SoupMarkdownConverter
+
+    return SoupMarkdownConverter()
+
 
+class BaseDiscordGateway(typing.Generic[_ClientT]):
+    """Embeds and delivery shared by the blocking and the asyncio gateway."""
 
-class DiscordGateway(interfaces.Notifier):
     def __init__(
         self,
         webhook_url: str,
         attempt_count: int,
+        http_client: _ClientT,
+        rate_limiter: RateLimiter,
+        render_cache: interfaces.Cache | None = None,
+        message_index: interfaces.MessageIndex | None = None,
+        retry_deadline: float | None = RETRY_DEADLINE_DEFAULT,
     ) -> None:
         self._webhook_url = webhook_url
         self._attempt_count = attempt_count
+        self._http_client = http_client
+        self._rate_limiter = rate_limiter
+        self._render_cache = render_cache
+        self._message_index = message_index
+        self._retry_deadline = retry_deadline
+        self._circuit = CircuitBreaker()
+        self._buckets = [
+            Bucket(f"discord:{webhook_url}", DISCORD_WEBHOOK_LIMIT),
+            Bucket(f"discord:{webhook_url}:channel", DISCORD_CHANNEL_LIMIT),
+        ]
 
-    def send_issue(
-        self,
-        issue: Issue,
-        formatted_body: str,
-        formatted_labels: str,
-    ) -> None:
-        embed = self._format_issue(issue, formatted_body, formatted_labels)
-        send_webhook(
-            url=self._webhook_url,
-            payload={"embeds": [embed]},
-            attempts=self._attempt_count,
+    @property
+    def destination(self) -> str:
+        # the webhook URL contains its token
+        digest = hashlib.sha256(self._webhook_url.encode()).hexdigest()
+        return f"discord:{digest[:16]}"
+
+    def _deadline(self) -> Deadline:
+        return Deadline(self._retry_deadline)
+
+    def _endpoint(self, path: str = "", **params: str) -> str:
+        """The webhook URL, keeping its query (e.g. ``thread_id``)."""
+        parts = urllib.parse.urlsplit(self._webhook_url)
+        query = [*urllib.parse.parse_qsl(parts.query), *params.items()]
+        return urllib.parse.urlunsplit(
+            parts._replace(
+                path=parts.path.rstrip("/") + path,
+                query=urllib.parse.urlencode(query),
+            ),
         )
 
-    def send_pull_request(
+    def _payload_hash(self, payload: dict[str, typing.Any]) -> str:
+        # timestamps change on every render
+        embeds = [
+            {key: value for key, value in embed.items() if key != "timestamp"}
+            for embed in payload["embeds"]
+        ]
+        return hashlib.sha256(
+            json.dumps(embeds, sort_keys=True, ensure_ascii=False).encode(),
+        ).hexdigest()
+
+    def _up_to_date(
         self,
-        pull_request: PullRequest,
-        formatted_body: str,
-        formatted_labels: str,
-    ) -> None:
-        embed = self._format_pull_request(
-            pull_request, formatted_body, formatted_labels
-        )
-        send_webhook(
-            url=self._webhook_url,
-            payload={"embeds": [embed]},
-            attempts=self._attempt_count,
+        sent: SentMessage | None,
+        payload_hashes: list[str],
+        event_url: str,
+    ) -> bool:
+        if sent is None or sent.payload_hashes != payload_hashes:
+            return False
+        print(
+            f"{self.destination}: message for {event_url} is up to date",
+            file=sys.stderr,
         )
+        return True
 
     def _format_issue(
-        self, issue: Issue, body: str, labels: str
+        self, issue: Issue, body: Document, labels: str
     ) -> dict[str, typing.Any]:
-        markdown_body = self._html_to_markdown(body)
-        description = self._create_description(markdown_body, labels)
+        with metrics.span("discord.render"):
+            markdown_body = self._html_to_markdown(body)
+            description = self._create_description(markdown_body, labels)
 
         embed = {
             "title": f"🚀 New Issue #{issue.id}: {self._truncate_title(issue.title)}",
@@ -81,17 +170,18 @@ class DiscordGateway(interfaces.Notifier):
             "footer": {
                 "text": "sent via relator",
             },
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": datetime.now(UTC).isoformat(),
         }
 
         return embed
 
     def _format_pull_request(
-        self, pr: PullRequest, body: str, labels: str
+        self, pr: PullRequest, body: Document, labels: str
     ) -> dict[str, typing.Any]:
         labels = labels.rstrip("<br/>")
-        markdown_body = self._html_to_markdown(body)
-        description = self._create_description(markdown_body, labels)
+        with metrics.span("discord.render"):
+            markdown_body = self._html_to_markdown(body)
+            description = self._create_description(markdown_body, labels)
 
         embed = {
             "title": f"🎉 New PR #{pr.id}: {self._truncate_title(pr.title)}",
@@ -128,45 +218,77 @@ class DiscordGateway(interfaces.Notifier):
             "footer": {
                 "text": "sent via relator",
             },
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": datetime.now(UTC).isoformat(),
         }
 
         return embed
 
-    def _html_to_markdown(self, html: str) -> str:
-        if not html or html == "<p></p>":
+    def _create_digest_payloads(
+        self, items: typing.Sequence[DigestItem],
+    ) -> list[dict[str, typing.Any]]:
+        """The usual embeds, as many per webhook call as Discord allows."""
+        payloads = []
+        batch: list[dict[str, typing.Any]] = []
+        batch_size = 0
+        for item in items:
+            if isinstance(item.event, Issue):
+                embed = self._format_issue(
+                    item.event, item.formatted_body, item.formatted_labels,
+                )
+            else:
+                embed = self._format_pull_request(
+                    item.event, item.formatted_body, item.formatted_labels,
+                )
+            size = self._embed_size(embed)
+            if batch and (
+                len(batch) == DISCORD_EMBEDS_PER_MESSAGE
+                or batch_size + size > DISCORD_EMBEDS_TOTAL_LIMIT
+            ):
+                payloads.append({"embeds": batch})
+                batch, batch_size = [], 0
+            batch.append(embed)
+            batch_size += size
+        if batch:
+            payloads.append({"embeds": batch})
+        return payloads
+
+    def _embed_size(self, embed: dict[str, typing.Any]) -> int:
+        return (
+            len(embed["title"])
+            + len(embed["description"])
+            + len(embed["author"]["name"])
+            + len(embed["footer"]["text"])
+            + sum(
+                len(field["name"]) + len(field["value"])
+                for field in embed["fields"]
+            )
+        )
+
+    def _html_to_markdown(self, body: Document) -> str:
+        if not body.html or body.html == "<p></p>":
             return ""
 
-        html = html.replace("<br/>", "\n")
-        print(f"After trim {html=}")
+        if self._render_cache is None:
+            return self._convert_markdown(body)
+
+        return self._render_cache.get_or_put(
+            ("discord", body.digest),
+            lambda: self._convert_markdown(body),
+        )
+
+    def _convert_markdown(self, body: Document) -> str:
+        tree = body.tree
+        if tree is None:
+            return ""
         try:
-            markdown = markdownify(
-                html,
-                heading_style="ATX",
-                bullets="-",
-                strip=["script", "style"],
+            # enough for the description whatever the labels take
+            return _markdown_converter(body.backend).convert_budgeted(
+                tree, DISCORD_EMBED_DESC_LIMIT,
             )
-            markdown = self._clean_markdown(markdown)
-            return markdown.strip()
-        except Exception:
-            soup = bs4.BeautifulSoup(html, "lxml")
-            return soup.get_text().strip()
-
-    def _clean_markdown(self, markdown: str) -> str:
-        lines = markdown.split("\n")
-        cleaned_lines = []
-        empty_count = 0
-
-        for line in lines:
-            if line.strip() == "":
-                empty_count += 1
-                if empty_count <= 2:
-                    cleaned_lines.append(line)
-            else:
-                empty_count = 0
-                cleaned_lines.append(line)
-
-        return "\n".join(cleaned_lines)
+        except Exception as e:  # noqa: BLE001
+            # the plain text is still worth sending
+            print(f"Error converting HTML to markdown: {e}", file=sys.stderr)
+            return body.text.strip()
 
     def _create_description(self, markdown_body: str, labels: str) -> str:
         labels_text = f"\n\n{labels}" if labels.strip() else ""
@@ -189,3 +311,169 @@ class DiscordGateway(interfaces.Notifier):
         if len(title) <= max_length:
             return title
         return title[: max_length - 3] + "..."
+
+    def _deliver(
+        self,
+        event_url: str,
+        create_embed: Blocking,
+    ) -> Steps[None]:
+        """
+        With a message index, a known event has its message edited, or
+        nothing is sent at all if it hasn't changed.
+        """
+        payload = {"embeds": [(yield create_embed)]}
+        deadline = self._deadline()
+        if self._message_index is None:
+            yield _Call("POST", self._webhook_url, payload, deadline)
+            return
+
+        payload_hashes = [self._payload_hash(payload)]
+        sent = yield Blocking(
+            self._message_index.get, (event_url, self.destination),
+        )
+        if self._up_to_date(sent, payload_hashes, event_url):
+            return
+
+        response = None
+        if sent is not None:
+            try:
+                response = yield _Call(
+                    "PATCH",
+                    self._endpoint(f"/messages/{sent.message_ids[0]}"),
+                    payload,
+                    deadline,
+                )
+            except SendError as e:
+                # e.g. the message was deleted: post it anew
+                if e.retryable:
+                    raise
+        if response is None:
+            # with wait=true the created message is returned with its id
+            response = yield _Call(
+                "POST", self._endpoint(wait="true"), payload, deadline,
+            )
+        yield Blocking(
+            self._message_index.put,
+            (
+                event_url,
+                self.destination,
+                SentMessage(
+                    message_ids=[response.json()["id"]],
+                    payload_hashes=payload_hashes,
+                ),
+            ),
+        )
+
+    def _send_kwargs(self, call: "_Call") -> dict[str, typing.Any]:
+        return {
+            "url": call.url,
+            "payload": call.payload,
+            "attempts": self._attempt_count,
+            "rate_limiter": self._rate_limiter,
+            "buckets": self._buckets,
+            "method": call.method,
+            "deadline": call.deadline,
+            "circuit": self._circuit,
+        }
+
+
+@dataclasses.dataclass(frozen=True)
+class _Call:
+    """Call the webhook, the result is the response."""
+
+    method: str
+    url: str
+    payload: dict[str, typing.Any]
+    deadline: Deadline
+
+
+class DiscordGateway(BaseDiscordGateway[HttpClient], interfaces.Notifier):
+    def send_issue(
+        self,
+        issue: Issue,
+        formatted_body: Document,
+        formatted_labels: str,
+    ) -> None:
+        run(
+            self._deliver(
+                issue.url,
+                Blocking(
+                    self._format_issue,
+                    (issue, formatted_body, formatted_labels),
+                ),
+            ),
+            self._call,
+        )
+
+    def send_pull_request(
+        self,
+        pull_request: PullRequest,
+        formatted_body: Document,
+        formatted_labels: str,
+    ) -> None:
+        run(
+            self._deliver(
+                pull_request.url,
+                Blocking(
+                    self._format_pull_request,
+                    (pull_request, formatted_body, formatted_labels),
+                ),
+            ),
+            self._call,
+        )
+
+    def send_digest(self, items: typing.Sequence[DigestItem]) -> None:
+        deadline = self._deadline()
+        for payload in self._create_digest_payloads(items):
+            self._call(_Call("POST", self._webhook_url, payload, deadline))
+
+    def _call(self, call: _Call) -> "requests.Response":
+        return send_webhook(
+            http_client=self._http_client, **self._send_kwargs(call),
+        )
+
+
+class AsyncDiscordGateway(
+    BaseDiscordGateway[_AsyncClient],
+    interfaces.AsyncNotifier,
+):
+    """Same embeds as ``DiscordGateway``, sent from an event loop."""
+
+    async def send_issue(
+        self,
+        issue: Issue,
+        formatted_body: Document,
+        formatted_labels: str,
+    ) -> None:
+        await run_async(
+            self._deliver(
+                issue.url,
+                Blocking(
+                    self._format_issue,
+                    (issue, formatted_body, formatted_labels),
+                ),
+            ),
+            self._call,
+        )
+
+    async def send_pull_request(
+        self,
+        pull_request: PullRequest,
+        formatted_body: Document,
+        formatted_labels: str,
+    ) -> None:
+        await run_async(
+            self._deliver(
+                pull_request.url,
+                Blocking(
+                    self._format_pull_request,
+                    (pull_request, formatted_body, formatted_labels),
+                ),
+            ),
+            self._call,
+        )
+
+    async def _call(self, call: _Call) -> "httpx.Response":
+        return await send_webhook_async(
+            http_client=self._http_client, **self._send_kwargs(call),
+        )
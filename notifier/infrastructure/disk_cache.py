@@ -0,0 +1,84 @@
+import hashlib
+import os
+import pathlib
+import tempfile
+import threading
+import typing
+
+# share of max_size an eviction shrinks the directory to, so that the
+# directory is scanned once per this much of it rewritten, not every put
+EVICT_TARGET_RATIO: typing.Final = 0.9
+
+
+class DiskCache:
+    """
+    Directory of small files with a total size cap.
+
+    File mtimes track recency: a hit touches the file and once the
+    directory grows past ``max_size`` bytes the least recently used
+    entries are removed. The total size is counted once on open and
+    then kept up to date by ``put``.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        max_size: int,
+    ) -> None:
+        self._directory = pathlib.Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            content = path.read_bytes()
+            path.touch()
+        except OSError:
+            return None
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        path = self._path(key)
+        with self._lock:
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            os.replace(temp_path, path)
+            self._size += len(content) - replaced
+            if self._size > self._max_size:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        # recount: other processes may share the directory
+        total = sum(size for _, size, _ in entries)
+        target = self._max_size * EVICT_TARGET_RATIO
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._size = total
+
+    def _entries(self) -> list[tuple[float, int, pathlib.Path]]:
+        """(mtime, size, path) of every cached file."""
+        entries = []
+        for path in self._directory.glob("*.cache"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _path(self, key: str) -> pathlib.Path:
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return self._directory / f"{name}.cache"
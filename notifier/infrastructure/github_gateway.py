@@ -1,57 +1,204 @@
-import requests
+import datetime
+import typing
+from collections.abc import Iterator
 
-from notifier.application import interfaces
+from notifier.application import interfaces, metrics
 from notifier.domain.entities import Issue, PullRequest
+from notifier.infrastructure.http_client import HttpClient
+from notifier.infrastructure.response_cache import (
+    CachedResponse,
+    ResponseCache,
+)
 
+if typing.TYPE_CHECKING:
+    import httpx
+    import requests
 
-class GithubGateway(interfaces.Github):
-    def __init__(self, token: str, event_url: str) -> None:
+    from notifier.infrastructure.async_http_client import AsyncHttpClient
+
+# the async client needs httpx, only imported when type checking
+_AsyncClient: typing.TypeAlias = "AsyncHttpClient"
+
+NOT_MODIFIED: typing.Final = 304
+# "2024-01-31T12:00:00Z", %z reads the Z
+GITHUB_DATE_FORMAT: typing.Final = "%Y-%m-%dT%H:%M:%S%z"
+
+
+_ClientT = typing.TypeVar("_ClientT")
+_Extract = typing.Callable[[dict[str, typing.Any]], dict[str, typing.Any]]
+
+
+class BaseGithubGateway(typing.Generic[_ClientT]):
+    """Conditional requests shared by the blocking and the asyncio gateway."""
+
+    def __init__(
+        self,
+        token: str,
+        event_url: str,
+        http_client: _ClientT,
+        cache: ResponseCache | None = None,
+    ) -> None:
         self._token = token
         self._url = event_url
+        self._http_client = http_client
+        self._cache = cache
 
-    def get_issue(self) -> Issue:
+    def _prepare(self) -> tuple[dict[str, str], CachedResponse | None]:
         headers = {
             "Accept": "application/vnd.github.v3.html+json",
             "X-GitHub-Api-Version": "2022-11-28",
             "Authorization": f"Bearer {self._token}",
         }
 
-        response = requests.get(self._url, headers=headers, timeout=30)
+        cached = None
+        if self._cache is not None:
+            cached = self._cache.get(self._url, headers["Accept"])
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers, cached
+
+    def _process(
+        self,
+        response: "requests.Response | httpx.Response",
+        headers: dict[str, str],
+        cached: CachedResponse | None,
+        extract: _Extract,
+        attributes: dict[str, typing.Any],
+    ) -> dict[str, typing.Any]:
+        attributes["bytes_in"] = len(response.content)
+        if cached is not None and response.status_code == NOT_MODIFIED:
+            attributes["not_modified"] = 1
+            return cached.data
         response.raise_for_status()
 
-        data = response.json()
+        fields = extract(response.json())
+
+        if self._cache is not None:
+            self._cache.put(
+                self._url,
+                headers["Accept"],
+                CachedResponse(
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    data=fields,
+                ),
+            )
+        return fields
+
+    def _issue_fields(self, data: dict[str, typing.Any]) -> dict[str, typing.Any]:
+        return {
+            "id": data["number"],
+            "title": data["title"],
+            "labels": [label["name"] for label in data["labels"]],
+            "url": (data["html_url"] or "").strip(),
+            "user": data["user"]["login"],
+            "body": (data.get("body_html", "") or "").strip(),
+        }
+
+    def _pull_request_fields(
+        self, data: dict[str, typing.Any],
+    ) -> dict[str, typing.Any]:
+        return {
+            "id": data["number"],
+            "title": data["title"],
+            "labels": [label["name"] for label in data["labels"]],
+            "url": data["html_url"],
+            "user": data["user"]["login"],
+            "body": (data.get("body_html", "") or "").strip(),
+            "additions": data["additions"],
+            "deletions": data["deletions"],
+            "head_ref": data["head"]["label"],
+            "base_ref": data["base"]["ref"],
+            "repository": data["base"]["repo"]["full_name"],
+        }
+
 
-        return Issue(
-            id=data["number"],
-            title=data["title"],
-            labels=[label["name"] for label in data["labels"]],
-            url=(data["html_url"] or "").strip(),
-            user=data["user"]["login"],
-            body=(data.get("body_html", "") or "").strip(),
-        )
+class GithubGateway(BaseGithubGateway[HttpClient], interfaces.Github):
+    def get_issue(self) -> Issue:
+        return Issue(**self._fetch(self._issue_fields))
 
     def get_pull_request(self) -> PullRequest:
+        return PullRequest(**self._fetch(self._pull_request_fields))
+
+    def _fetch(self, extract: _Extract) -> dict[str, typing.Any]:
+        with metrics.span("github.fetch") as attributes:
+            headers, cached = self._prepare()
+            response = self._http_client.get(self._url, headers=headers)
+            return self._process(
+                response, headers, cached, extract, attributes,
+            )
+
+
+class AsyncGithubGateway(
+    BaseGithubGateway[_AsyncClient],
+    interfaces.AsyncGithub,
+):
+    async def get_issue(self) -> Issue:
+        return Issue(**await self._fetch(self._issue_fields))
+
+    async def get_pull_request(self) -> PullRequest:
+        return PullRequest(**await self._fetch(self._pull_request_fields))
+
+    async def _fetch(self, extract: _Extract) -> dict[str, typing.Any]:
+        with metrics.span("github.fetch") as attributes:
+            headers, cached = self._prepare()
+            response = await self._http_client.get(self._url, headers=headers)
+            return self._process(
+                response, headers, cached, extract, attributes,
+            )
+
+
+class GithubEventsGateway:
+    def __init__(self, token: str, http_client: HttpClient) -> None:
+        self._token = token
+        self._http_client = http_client
+
+    def list_event_urls(
+        self,
+        repository: str,
+        since: datetime.datetime,
+        until: datetime.datetime | None = None,
+    ) -> Iterator[str]:
+        """
+        API URLs of issues and pull requests created in [since, until),
+        oldest first. Pull requests are returned as /pulls/ URLs.
+        """
         headers = {
-            "Accept": "application/vnd.github.v3.html+json",
+            "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28",
-            "Authorization": f"Bearer {self._token}",
         }
+        if self._token:
+            headers["Authorization"] = f"Bearer {self._token}"
 
-        response = requests.get(self._url, headers=headers, timeout=30)
-        response.raise_for_status()
+        url: str | None = f"https://api.github.com/repos/{repository}/issues"
+        params: dict[str, str] | None = {
+            "state": "all",
+            "sort": "created",
+            "direction": "asc",
+            "since": since.isoformat(),
+            "per_page": "100",
+        }
+        while url:
+            response = self._http_client.get(
+                url, headers=headers, params=params,
+            )
+            response.raise_for_status()
+
+            for item in response.json():
+                created_at = datetime.datetime.strptime(
+                    item["created_at"], GITHUB_DATE_FORMAT,
+                )
+                if created_at < since:
+                    continue
+                if until is not None and created_at >= until:
+                    return
+                if "pull_request" in item:
+                    yield item["pull_request"]["url"]
+                else:
+                    yield item["url"]
 
-        data = response.json()
-
-        return PullRequest(
-            id=data["number"],
-            title=data["title"],
-            labels=[label["name"] for label in data["labels"]],
-            url=data["html_url"],
-            user=data["user"]["login"],
-            body=(data.get("body_html", "") or "").strip(),
-            additions=data["additions"],
-            deletions=data["deletions"],
-            head_ref=data["head"]["label"],
-            base_ref=data["base"]["ref"],
-            repository=data["base"]["repo"]["full_name"],
-        )
+            url = response.links.get("next", {}).get("url")
+            params = None
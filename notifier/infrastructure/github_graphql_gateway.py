@@ -0,0 +1,253 @@
+import dataclasses
+import re
+import typing
+from collections.abc import Sequence
+
+from notifier.application import interfaces, metrics
+from notifier.domain.entities import Issue, PullRequest
+from notifier.infrastructure.http_client import HttpClient
+
+GRAPHQL_URL: typing.Final = "https://api.github.com/graphql"
+# aliases per query; each event costs about one point of the rate limit
+GRAPHQL_BATCH_SIZE_DEFAULT: typing.Final = 50
+
+EVENT_URL_PATTERN: typing.Final = re.compile(
+    r"https://(?:api\.)?github\.com/repos/"
+    r"(?P<owner>[\w\-\.]+)/(?P<name>[\w\-\.]+)/(?P<kind>issues|pulls)/"
+    r"(?P<number>\d+)",
+)
+
+# Only what ends up in Issue/PullRequest, instead of the full REST
+# objects with their nested user, repository and link objects.
+FRAGMENTS: typing.Final = {
+    "issues": """
+fragment IssueFields on Issue {
+  number
+  title
+  url
+  bodyHTML
+  author { login }
+  labels(first: 100) { nodes { name } }
+}""",
+    "pulls": """
+fragment PullRequestFields on PullRequest {
+  number
+  title
+  url
+  bodyHTML
+  author { login }
+  labels(first: 100) { nodes { name } }
+  additions
+  deletions
+  headRefName
+  headRepositoryOwner { login }
+  baseRefName
+  baseRepository { nameWithOwner }
+}""",
+}
+
+
+class GithubGraphQLError(Exception):
+    pass
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class EventRef:
+    owner: str
+    name: str
+    kind: str
+    number: int
+
+
+def parse_event_url(url: str) -> EventRef | None:
+    match = EVENT_URL_PATTERN.match(url)
+    if match is None:
+        return None
+    return EventRef(
+        owner=match["owner"],
+        name=match["name"],
+        kind=match["kind"],
+        number=int(match["number"]),
+    )
+
+
+class GithubGraphQLClient:
+    """
+    Fetches issues and pull requests by their REST API URLs with one
+    GraphQL query per batch.
+    """
+
+    def __init__(self, token: str, http_client: HttpClient) -> None:
+        if not token:
+            raise ValueError("the GraphQL API requires GITHUB_TOKEN")
+        self._token = token
+        self._http_client = http_client
+
+    def fetch(
+        self,
+        urls: Sequence[str],
+    ) -> dict[str, Issue | PullRequest | Exception]:
+        """
+        Events by URL; an event that could not be fetched maps to the
+        error instead, so one missing issue doesn't fail the batch.
+        """
+        refs = {}
+        results: dict[str, Issue | PullRequest | Exception] = {}
+        for url in urls:
+            ref = parse_event_url(url)
+            if ref is None:
+                results[url] = ValueError(f"Unknown event type for URL: {url}")
+            else:
+                refs[url] = ref
+        if not refs:
+            return results
+
+        query, variables = self._build_query(list(refs.values()))
+        with metrics.span("github.fetch", events=len(refs)) as attributes:
+            response = self._http_client.post(
+                GRAPHQL_URL,
+                json={"query": query, "variables": variables},
+                headers={"Authorization": f"Bearer {self._token}"},
+            )
+            attributes["bytes_in"] = len(response.content)
+            response.raise_for_status()
+            content = response.json()
+
+        data = content.get("data")
+        errors = content.get("errors") or []
+        if data is None:
+            raise GithubGraphQLError(
+                "; ".join(error.get("message", "") for error in errors),
+            )
+        if data.get("rateLimit"):
+            metrics.count("github.graphql_cost", data["rateLimit"]["cost"])
+
+        for index, (url, ref) in enumerate(refs.items()):
+            node = (data.get(f"e{index}") or {}).get("event")
+            if node is None:
+                messages = [
+                    error.get("message", "")
+                    for error in errors
+                    if (error.get("path") or [None])[0] == f"e{index}"
+                ]
+                results[url] = GithubGraphQLError(
+                    "; ".join(messages) or f"{url} not found",
+                )
+            elif ref.kind == "issues":
+                results[url] = self._issue(node)
+            else:
+                results[url] = self._pull_request(node)
+        return results
+
+    def _build_query(
+        self,
+        refs: list[EventRef],
+    ) -> tuple[str, dict[str, typing.Any]]:
+        parameters = []
+        selections = []
+        variables: dict[str, typing.Any] = {}
+        for index, ref in enumerate(refs):
+            field, fragment = (
+                ("issue", "IssueFields")
+                if ref.kind == "issues"
+                else ("pullRequest", "PullRequestFields")
+            )
+            parameters.append(
+                f"$o{index}: String!, $r{index}: String!, $n{index}: Int!",
+            )
+            selections.append(
+                f"  e{index}: repository(owner: $o{index}, name: $r{index}) "
+                f"{{ event: {field}(number: $n{index}) {{ ...{fragment} }} }}",
+            )
+            variables.update(
+                {f"o{index}": ref.owner, f"r{index}": ref.name},
+            )
+            variables[f"n{index}"] = ref.number
+
+        # unused fragments are an error in GraphQL
+        fragments = [
+            FRAGMENTS[kind] for kind in sorted({ref.kind for ref in refs})
+        ]
+        query = "\n".join(
+            [
+                f"query ({', '.join(parameters)}) {{",
+                *selections,
+                "  rateLimit { cost }",
+                "}",
+                *fragments,
+            ],
+        )
+        return query, variables
+
+    def _issue(self, node: dict[str, typing.Any]) -> Issue:
+        return Issue(
+            id=node["number"],
+            title=node["title"],
+            labels=[label["name"] for label in node["labels"]["nodes"]],
+            url=(node["url"] or "").strip(),
+            user=self._login(node["author"]),
+            body=(node.get("bodyHTML") or "").strip(),
+        )
+
+    def _pull_request(self, node: dict[str, typing.Any]) -> PullRequest:
+        head_owner = self._login(node["headRepositoryOwner"])
+        return PullRequest(
+            id=node["number"],
+            title=node["title"],
+            labels=[label["name"] for label in node["labels"]["nodes"]],
+            url=node["url"],
+            user=self._login(node["author"]),
+            body=(node.get("bodyHTML") or "").strip(),
+            additions=node["additions"],
+            deletions=node["deletions"],
+            head_ref=f"{head_owner}:{node['headRefName']}",
+            base_ref=node["baseRefName"],
+            repository=node["baseRepository"]["nameWithOwner"],
+        )
+
+    def _login(self, actor: dict[str, typing.Any] | None) -> str:
+        # deleted accounts are shown as "ghost", as in the REST API
+        return (actor or {}).get("login") or "ghost"
+
+
+class GithubGraphQLGateway(interfaces.Github):
+    """``GithubGateway`` over a single-event GraphQL query."""
+
+    def __init__(
+        self,
+        token: str,
+        event_url: str,
+        http_client: HttpClient,
+    ) -> None:
+        self._client = GithubGraphQLClient(token, http_client)
+        self._url = event_url
+
+    def get_issue(self) -> Issue:
+        return PrefetchedGithubGateway(self._fetch()).get_issue()
+
+    def get_pull_request(self) -> PullRequest:
+        return PrefetchedGithubGateway(self._fetch()).get_pull_request()
+
+    def _fetch(self) -> Issue | PullRequest | Exception:
+        return self._client.fetch([self._url])[self._url]
+
+
+class PrefetchedGithubGateway(interfaces.Github):
+    """Serves an event fetched beforehand, e.g. as part of a batch."""
+
+    def __init__(self, event: Issue | PullRequest | Exception) -> None:
+        self._event = event
+
+    def get_issue(self) -> Issue:
+        if isinstance(self._event, Exception):
+            raise self._event
+        if not isinstance(self._event, Issue):
+            raise TypeError(f"expected an issue, got {self._event!r}")
+        return self._event
+
+    def get_pull_request(self) -> PullRequest:
+        if isinstance(self._event, Exception):
+            raise self._event
+        if not isinstance(self._event, PullRequest):
+            raise TypeError(f"expected a pull request, got {self._event!r}")
+        return self._event
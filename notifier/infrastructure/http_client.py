@@ -0,0 +1,111 @@
+import dataclasses
+import threading
+import typing
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_POOL_SIZE_DEFAULT: typing.Final = 10
+HTTP_TIMEOUT_DEFAULT: typing.Final = 30
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class HostStats:
+    host: str
+    requests: int
+    connections: int
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections, 0)
+
+
+class HttpClient:
+    """
+    Keep-alive sessions shared by every gateway, one pool per host,
+    so repeated calls and retries skip the TCP and TLS handshakes.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = HTTP_POOL_SIZE_DEFAULT,
+        timeout: float = HTTP_TIMEOUT_DEFAULT,
+    ) -> None:
+        self._pool_maxsize = pool_maxsize
+        self._timeout = timeout
+        self._sessions: dict[str, requests.Session] = {}
+        self._adapters: dict[str, HTTPAdapter] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout
+
+    def get(self, url: str, **kwargs: typing.Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: typing.Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        **kwargs: typing.Any,
+    ) -> requests.Response:
+        kwargs.setdefault("timeout", self._timeout)
+        return self.session(url).request(method, url, **kwargs)
+
+    def session(self, url: str) -> requests.Session:
+        host = self._host(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._sessions[host] = requests.Session()
+                adapter = self._adapters[host] = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self._pool_maxsize,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+        return session
+
+    def stats(self) -> list[HostStats]:
+        with self._lock:
+            adapters = list(self._adapters.items())
+
+        stats = []
+        for host, adapter in adapters:
+            request_count = connection_count = 0
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():  # noqa: SIM118
+                pool = pools[key]
+                request_count += pool.num_requests
+                connection_count += pool.num_connections
+            stats.append(
+                HostStats(
+                    host=host,
+                    requests=request_count,
+                    connections=connection_count,
+                ),
+            )
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._adapters.clear()
+        for session in sessions:
+            session.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _host(self, url: str) -> str:
+        parsed = urllib.parse.urlsplit(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
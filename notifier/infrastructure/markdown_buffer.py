@@ -0,0 +1,40 @@
+import typing
+
+BLANK_LINES_MAX: typing.Final = 2
+
+
+class MarkdownBuffer:
+    """
+    Markdown with runs of blank lines cut to ``BLANK_LINES_MAX`` as it is
+    written. Exhausted once its complete lines, stripped, are longer
+    than ``limit``: whatever follows can't change the first ``limit``
+    characters.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._lines: list[str] = []
+        self._partial = ""
+        self._empty_count = 0
+        self._size = 0
+        self.exhausted = False
+
+    def write(self, text: str) -> None:
+        *lines, self._partial = (self._partial + text).split("\n")
+        for line in lines:
+            if line.strip() == "":
+                self._empty_count += 1
+                if self._empty_count > BLANK_LINES_MAX:
+                    continue
+            else:
+                self._empty_count = 0
+            self._lines.append(line)
+            self._size += len(line) + 1
+        if self._size > self.limit:
+            self.exhausted = len("\n".join(self._lines).strip()) > self.limit
+
+    def getvalue(self) -> str:
+        lines = self._lines
+        if self._partial.strip() or self._empty_count < BLANK_LINES_MAX:
+            lines = [*lines, self._partial]
+        return "\n".join(lines).strip()
@@ -0,0 +1,77 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import typing
+
+from notifier.application import interfaces
+from notifier.domain.entities import SentMessage
+
+SCHEMA: typing.Final = """
+CREATE TABLE IF NOT EXISTS messages (
+    event_url TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    message_ids TEXT NOT NULL,
+    payload_hashes TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (event_url, destination)
+) WITHOUT ROWID
+"""
+
+
+class SqliteMessageIndex(interfaces.MessageIndex):
+    """
+    Message ids per (event URL, destination) in an SQLite file, which
+    may be the outbox file too.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._connection = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA busy_timeout=5000")
+            self._connection.execute(SCHEMA)
+
+    def get(self, event_url: str, destination: str) -> SentMessage | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT message_ids, payload_hashes FROM messages "
+                "WHERE event_url = ? AND destination = ?",
+                (event_url, destination),
+            ).fetchone()
+        if row is None:
+            return None
+        return SentMessage(
+            message_ids=json.loads(row[0]),
+            payload_hashes=json.loads(row[1]),
+        )
+
+    def put(
+        self,
+        event_url: str,
+        destination: str,
+        message: SentMessage,
+    ) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO messages (event_url, destination, "
+                "message_ids, payload_hashes, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    event_url,
+                    destination,
+                    json.dumps(message.message_ids),
+                    json.dumps(message.payload_hashes),
+                    time.time(),
+                ),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
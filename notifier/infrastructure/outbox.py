@@ -0,0 +1,138 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import typing
+from collections.abc import Sequence
+
+from notifier.application import interfaces
+
+DELIVERED: typing.Final = "delivered"
+PENDING: typing.Final = "pending"
+FAILED: typing.Final = "failed"
+
+SCHEMA: typing.Final = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    key TEXT PRIMARY KEY,
+    event_url TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def idempotency_key(event_url: str, destination: str, content_hash: str) -> str:
+    return hashlib.sha256(
+        f"{event_url}\0{destination}\0{content_hash}".encode(),
+    ).hexdigest()
+
+
+class SqliteOutbox(interfaces.Outbox):
+    """
+    Deliveries kept in an SQLite file, one row per idempotency key.
+
+    A rerun of the same event finds the destinations it already reached
+    and only sends to the rest; an edited issue has a new content hash
+    and is delivered again.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._connection = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            # the server and backfills may share the file
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA busy_timeout=5000")
+            self._connection.execute(SCHEMA)
+
+    def pending(
+        self,
+        event_url: str,
+        content_hash: str,
+        destinations: Sequence[str],
+    ) -> set[str]:
+        keys = {
+            idempotency_key(event_url, destination, content_hash): destination
+            for destination in destinations
+        }
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO deliveries (key, event_url, "
+                    "destination, content_hash, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (key, event_url, destination, content_hash, PENDING, now)
+                        for key, destination in keys.items()
+                    ],
+                )
+                delivered = {
+                    key
+                    for (key,) in self._connection.execute(
+                        # only the placeholders are formatted in
+                        "SELECT key FROM deliveries WHERE status = ? "
+                        f"AND key IN ({', '.join('?' * len(keys))})",
+                        (DELIVERED, *keys),
+                    )
+                }
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+        return {
+            destination
+            for key, destination in keys.items()
+            if key not in delivered
+        }
+
+    def mark_delivered(
+        self,
+        event_url: str,
+        content_hash: str,
+        destination: str,
+    ) -> None:
+        self._update(event_url, content_hash, destination, DELIVERED, None)
+
+    def mark_failed(
+        self,
+        event_url: str,
+        content_hash: str,
+        destination: str,
+        error: str,
+    ) -> None:
+        self._update(event_url, content_hash, destination, FAILED, error)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _update(
+        self,
+        event_url: str,
+        content_hash: str,
+        destination: str,
+        status: str,
+        error: str | None,
+    ) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE deliveries SET status = ?, error = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE key = ?",
+                (
+                    status,
+                    error,
+                    time.time(),
+                    idempotency_key(event_url, destination, content_hash),
+                ),
+            )
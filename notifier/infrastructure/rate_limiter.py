@@ -0,0 +1,203 @@
+import asyncio
+import dataclasses
+import threading
+import time
+import typing
+from collections.abc import Sequence
+
+TOO_MANY_REQUESTS: typing.Final = 429
+
+
+@dataclasses.dataclass(frozen=True)
+class RateLimit:
+    count: int
+    period: float
+    burst: int | None = None
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+    @property
+    def tolerance(self) -> float:
+        return self.interval * ((self.burst or self.count) - 1)
+
+
+@dataclasses.dataclass(frozen=True)
+class Bucket:
+    key: str
+    limit: RateLimit
+
+
+class Response(typing.Protocol):
+    """What is read from a response; both requests and httpx match it."""
+
+    @property
+    def status_code(self) -> int: ...
+
+    @property
+    def headers(self) -> typing.Mapping[str, str]: ...
+
+    def json(self) -> typing.Any: ...
+
+
+# https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+TELEGRAM_BOT_LIMIT: typing.Final = RateLimit(30, 1.0)
+# one message per second in a chat, short bursts are tolerated
+TELEGRAM_CHAT_LIMIT: typing.Final = RateLimit(1, 1.0, burst=3)
+TELEGRAM_GROUP_LIMIT: typing.Final = RateLimit(20, 60.0)
+# https://discord.com/developers/docs/topics/rate-limits
+DISCORD_WEBHOOK_LIMIT: typing.Final = RateLimit(5, 2.0)
+DISCORD_CHANNEL_LIMIT: typing.Final = RateLimit(30, 60.0)
+
+
+@dataclasses.dataclass
+class _BucketState:
+    limit: RateLimit
+    # theoretical arrival time of the next request (GCRA)
+    arrival: float = 0.0
+    paused_until: float = 0.0
+
+
+class RateLimiter:
+    """
+    Token buckets shared by every gateway in the process.
+
+    ``acquire`` reserves the next free slot in all buckets of a send under
+    one lock, so concurrent senders are served in arrival order at the
+    highest rate the buckets allow. Hints from the server (``Retry-After``,
+    Telegram's ``retry_after``, Discord's ``X-RateLimit-*``) pause the
+    buckets for everyone, including sends that already hold a slot.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, _BucketState] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, buckets: Sequence[Bucket]) -> float:
+        """Block until a send is allowed; returns the time spent waiting."""
+        return self.wait(buckets, self.reserve(buckets))
+
+    def reserve(self, buckets: Sequence[Bucket]) -> float:
+        """
+        Reserve the next free slot without waiting for it. Returns its
+        ``time.monotonic()`` time, to be passed to ``wait`` later.
+        """
+        with self._lock:
+            now = time.monotonic()
+            states = [self._state(bucket) for bucket in buckets]
+            slot = max(
+                [now]
+                + [state.arrival - state.limit.tolerance for state in states]
+                + [state.paused_until for state in states],
+            )
+            for state in states:
+                state.arrival = max(state.arrival, slot) + state.limit.interval
+        return slot
+
+    def wait(self, buckets: Sequence[Bucket], slot: float) -> float:
+        """
+        Block until a reserved slot, or later if the buckets were paused
+        in the meantime; returns the time spent waiting.
+        """
+        waited = 0.0
+        states = self._states(buckets)
+        while True:
+            delay = slot - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+                waited += delay
+            paused_until = self._paused_until(states)
+            if paused_until <= slot:
+                return waited
+            slot = paused_until
+
+    async def acquire_async(self, buckets: Sequence[Bucket]) -> float:
+        """``acquire`` for coroutines: sleeps without blocking the loop."""
+        return await self.wait_async(buckets, self.reserve(buckets))
+
+    async def wait_async(
+        self,
+        buckets: Sequence[Bucket],
+        slot: float,
+    ) -> float:
+        waited = 0.0
+        states = self._states(buckets)
+        while True:
+            delay = slot - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                waited += delay
+            paused_until = self._paused_until(states)
+            if paused_until <= slot:
+                return waited
+            slot = paused_until
+
+    def pause(self, buckets: Sequence[Bucket], seconds: float) -> None:
+        with self._lock:
+            until = time.monotonic() + seconds
+            for bucket in buckets:
+                state = self._state(bucket)
+                state.paused_until = max(state.paused_until, until)
+                state.arrival = max(
+                    state.arrival, until + state.limit.tolerance,
+                )
+
+    def observe(
+        self,
+        buckets: Sequence[Bucket],
+        response: Response,
+    ) -> float | None:
+        """
+        Apply the server's rate limit hints. Returns the number of seconds
+        to wait before retrying if the request was throttled.
+        """
+        retry_after = get_retry_after(response)
+        if response.status_code == TOO_MANY_REQUESTS:
+            retry_after = retry_after if retry_after is not None else 1.0
+            self.pause(buckets, retry_after)
+            return retry_after
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset_after = response.headers.get("X-RateLimit-Reset-After")
+        if remaining == "0" and reset_after:
+            self.pause(buckets, float(reset_after))
+        return None
+
+    def _states(self, buckets: Sequence[Bucket]) -> list[_BucketState]:
+        with self._lock:
+            return [self._state(bucket) for bucket in buckets]
+
+    def _paused_until(self, states: Sequence[_BucketState]) -> float:
+        with self._lock:
+            return max((state.paused_until for state in states), default=0.0)
+
+    def _state(self, bucket: Bucket) -> _BucketState:
+        state = self._buckets.get(bucket.key)
+        if state is None:
+            state = self._buckets[bucket.key] = _BucketState(bucket.limit)
+        return state
+
+
+def get_retry_after(response: Response) -> float | None:
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+
+    if response.status_code != TOO_MANY_REQUESTS:
+        return None
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    # Telegram: {"parameters": {"retry_after": 5}}, Discord: {"retry_after": 1.5}
+    retry_after = (data.get("parameters") or {}).get("retry_after")
+    if retry_after is None:
+        retry_after = data.get("retry_after")
+    return float(retry_after) if retry_after is not None else None
@@ -0,0 +1,132 @@
+import collections
+import dataclasses
+import hashlib
+import json
+import threading
+import typing
+
+from notifier.application import interfaces
+from notifier.infrastructure.disk_cache import DiskCache
+
+RENDER_CACHE_SIZE_DEFAULT: typing.Final = 32 * 1024 * 1024
+RENDER_CACHE_DISK_SIZE_DEFAULT: typing.Final = 256 * 1024 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    disk_hits: int
+    misses: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class RenderCache(interfaces.Cache):
+    """
+    In-memory LRU bounded by the total length of the cached values, with
+    an optional on-disk tier behind it. Disk hits are promoted to memory.
+
+    ``get_or_put`` also deduplicates renders running at the same time,
+    e.g. when one event is sent to several chats sharing a template.
+    """
+
+    def __init__(
+        self,
+        max_size: int = RENDER_CACHE_SIZE_DEFAULT,
+        disk: DiskCache | None = None,
+    ) -> None:
+        self._max_size = max_size
+        self._disk = disk
+        self._entries: collections.OrderedDict[str, str] = (
+            collections.OrderedDict()
+        )
+        self._size = 0
+        self._lock = threading.Lock()
+        # per key locks of renders in progress and how many callers use them
+        self._flights: dict[str, tuple[threading.Lock, int]] = {}
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    def get(self, key: tuple[typing.Any, ...]) -> str | None:
+        return self._get(self._digest(key))
+
+    def put(self, key: tuple[typing.Any, ...], value: str) -> None:
+        self._put(self._digest(key), value)
+
+    def get_or_put(
+        self,
+        key: tuple[typing.Any, ...],
+        render: typing.Callable[[], str],
+    ) -> str:
+        digest = self._digest(key)
+        with self._lock:
+            flight, waiting = self._flights.get(digest, (threading.Lock(), 0))
+            self._flights[digest] = (flight, waiting + 1)
+        try:
+            with flight:
+                value = self._get(digest)
+                if value is None:
+                    value = render()
+                    self._put(digest, value)
+                return value
+        finally:
+            with self._lock:
+                flight, waiting = self._flights[digest]
+                if waiting == 1:
+                    del self._flights[digest]
+                else:
+                    self._flights[digest] = (flight, waiting - 1)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+            )
+
+    def _get(self, digest: str) -> str | None:
+        with self._lock:
+            value = self._entries.get(digest)
+            if value is not None:
+                self._entries.move_to_end(digest)
+                self._hits += 1
+                return value
+
+        content = self._disk.get(digest) if self._disk is not None else None
+        with self._lock:
+            if content is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            value = content.decode()
+            self._store(digest, value)
+        return value
+
+    def _put(self, digest: str, value: str) -> None:
+        with self._lock:
+            self._store(digest, value)
+        if self._disk is not None:
+            self._disk.put(digest, value.encode())
+
+    def _store(self, digest: str, value: str) -> None:
+        previous = self._entries.pop(digest, None)
+        if previous is not None:
+            self._size -= len(previous)
+        if len(value) > self._max_size:
+            return
+        self._entries[digest] = value
+        self._size += len(value)
+        while self._size > self._max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _digest(self, key: tuple[typing.Any, ...]) -> str:
+        serialized = json.dumps(
+            key, ensure_ascii=False, sort_keys=True, default=str,
+        )
+        return hashlib.sha256(serialized.encode()).hexdigest()
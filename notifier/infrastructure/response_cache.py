@@ -0,0 +1,65 @@
+import dataclasses
+import json
+import os
+import typing
+
+from notifier.infrastructure.disk_cache import DiskCache
+
+RESPONSE_CACHE_SIZE_DEFAULT: typing.Final = 50 * 1024 * 1024
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    data: dict[str, typing.Any]
+
+
+class ResponseCache:
+    """
+    On-disk cache of GitHub responses for conditional requests.
+
+    One small entry per (URL, Accept) pair holding the validators and
+    the fields that were extracted from the response, not the whole
+    payload.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        max_size: int = RESPONSE_CACHE_SIZE_DEFAULT,
+    ) -> None:
+        self._disk = DiskCache(directory, max_size)
+
+    def get(self, url: str, accept: str) -> CachedResponse | None:
+        content = self._disk.get(f"{accept}\0{url}")
+        if content is None:
+            return None
+        try:
+            entry = json.loads(content)
+        except ValueError:
+            return None
+        return CachedResponse(
+            etag=entry.get("etag"),
+            last_modified=entry.get("last_modified"),
+            data=entry["data"],
+        )
+
+    def put(
+        self,
+        url: str,
+        accept: str,
+        response: CachedResponse,
+    ) -> None:
+        if response.etag is None and response.last_modified is None:
+            return
+
+        content = json.dumps(
+            {
+                "url": url,
+                "etag": response.etag,
+                "last_modified": response.last_modified,
+                "data": response.data,
+            },
+        ).encode()
+        self._disk.put(f"{accept}\0{url}", content)
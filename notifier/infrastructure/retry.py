@@ -0,0 +1,138 @@
+import random
+import threading
+import time
+import typing
+
+# seconds for all the requests of one event to one destination
+RETRY_DEADLINE_DEFAULT: typing.Final = 120.0
+RETRY_BASE_DELAY: typing.Final = 1.0
+RETRY_MAX_DELAY: typing.Final = 30.0
+CIRCUIT_THRESHOLD_DEFAULT: typing.Final = 5
+CIRCUIT_RESET_DEFAULT: typing.Final = 60.0
+# besides 5xx: request timeout, too early, too many requests
+RETRYABLE_STATUSES: typing.Final = frozenset((408, 425, 429))
+SERVER_ERROR: typing.Final = 500
+
+
+class SendError(Exception):
+    """
+    A request that failed for good. ``retryable`` errors may go away
+    later (server errors, timeouts); the others won't without a change
+    on our side (bad token, deleted webhook, rejected payload).
+    """
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        status_code: int | None = None,
+        retryable: bool = False,
+    ) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class DeadlineExceededError(SendError):
+    def __init__(self, message: str) -> None:
+        super().__init__(message, retryable=True)
+
+
+class CircuitOpenError(SendError):
+    def __init__(self, message: str) -> None:
+        super().__init__(message, retryable=True)
+
+
+def is_retryable_status(status_code: int) -> bool:
+    return status_code >= SERVER_ERROR or status_code in RETRYABLE_STATUSES
+
+
+def backoff(retry: int) -> float:
+    """Exponential backoff with full jitter before the ``retry``-th retry."""
+    return random.uniform(
+        0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** retry),
+    )
+
+
+class Deadline:
+    """When the requests for one event have to be done by."""
+
+    def __init__(self, seconds: float | None) -> None:
+        self._at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> float | None:
+        if self._at is None:
+            return None
+        return max(self._at - time.monotonic(), 0.0)
+
+    def allows(self, at: float) -> bool:
+        """Whether something may still start at ``time.monotonic()`` ``at``."""
+        return self._at is None or at < self._at
+
+    def timeout(self, default: float) -> float:
+        remaining = self.remaining()
+        return default if remaining is None else min(default, remaining)
+
+
+class CircuitBreaker:
+    """
+    Fails fast for a destination whose last ``threshold`` requests all
+    failed, for ``reset_after`` seconds. Then a single request goes
+    through as a probe: if it succeeds the circuit closes, if it fails
+    the circuit stays open for another ``reset_after``.
+    """
+
+    def __init__(
+        self,
+        threshold: int = CIRCUIT_THRESHOLD_DEFAULT,
+        reset_after: float = CIRCUIT_RESET_DEFAULT,
+    ) -> None:
+        self._threshold = threshold
+        self._reset_after = reset_after
+        self._failures = 0
+        self._open_until = 0.0
+        self._probe: object | None = None
+        self._probe_until = 0.0
+        self._lock = threading.Lock()
+
+    def check(self, name: str, owner: object) -> None:
+        """
+        Raises ``CircuitOpenError`` unless ``owner``, e.g. the retries of
+        one request, may send now.
+        """
+        with self._lock:
+            if self._failures < self._threshold:
+                return
+            now = time.monotonic()
+            if now >= self._open_until and (
+                self._probe is None
+                or self._probe is owner
+                # a probe that never reported back
+                or now >= self._probe_until
+            ):
+                self._probe = owner
+                self._probe_until = now + self._reset_after
+                return
+            raise CircuitOpenError(
+                f"{name}: not sent, the last {self._failures} "
+                "requests failed",
+            )
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe = None
+
+    def failed(self) -> None:
+        """One more request failed."""
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self._threshold:
+                self._open_until = time.monotonic() + self._reset_after
+                self._probe = None
+
+    def release(self, owner: object) -> None:
+        """``owner`` is done without telling anything about the health."""
+        with self._lock:
+            if self._probe is owner:
+                self._probe = None
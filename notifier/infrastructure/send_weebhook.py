@@ -1,23 +1,320 @@
+import asyncio
+import dataclasses
+import json
 import sys
 import time
-from typing import Any
+from collections.abc import Sequence
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, Final, NoReturn, TypeVar
 
 import requests
 
+from notifier.application import metrics
+from notifier.application.steps import Steps, run, run_async
+from notifier.infrastructure.http_client import HttpClient
+from notifier.infrastructure.rate_limiter import Bucket, RateLimiter
+from notifier.infrastructure.retry import (
+    CircuitBreaker,
+    Deadline,
+    DeadlineExceededError,
+    SendError,
+    backoff,
+    is_retryable_status,
+)
 
-def send_webhook(*, payload: dict[str, Any], url: str, attempts: int) -> None:
-    count = 0
-    while count < attempts:
-        response = requests.post(url, json=payload, timeout=30)
+if TYPE_CHECKING:
+    import httpx
+
+    from notifier.infrastructure.async_http_client import AsyncHttpClient
+
+THROTTLED_RETRIES_MAX: Final = 5
+# characters of a response body worth logging
+RESPONSE_LOG_LIMIT: Final = 200
+
+
+def send_webhook(
+    *,
+    http_client: HttpClient,
+    payload: dict[str, Any],
+    url: str,
+    attempts: int,
+    rate_limiter: RateLimiter,
+    buckets: Sequence[Bucket] = (),
+    slot: float | None = None,
+    throttled_retries: int = THROTTLED_RETRIES_MAX,
+    method: str = "POST",
+    deadline: Deadline | None = None,
+    circuit: CircuitBreaker | None = None,
+) -> requests.Response:
+    """
+    Returns the successful response, or raises ``SendError``. ``slot``
+    is a time reserved with ``RateLimiter.reserve`` for the first
+    attempt. Server errors, timeouts and connection errors are retried
+    with backoff while ``deadline`` leaves time for it, 429s up to
+    ``throttled_retries`` times; other errors are raised at once.
+    """
+
+    def perform(step: _Step) -> Any:
+        if isinstance(step, _Wait):
+            return rate_limiter.wait(buckets, step.slot)
+        if isinstance(step, _Sleep):
+            return time.sleep(step.delay)
         try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError:
-            print(response.content, file=sys.stderr)
-            count += 1
-            time.sleep(count * 2)
-        else:
-            print(
-                f"Response: {response.status_code=} {response.text=}",
-                file=sys.stdout,
+            return http_client.request(
+                method, url, json=payload, timeout=step.timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise _TransportError(e) from e
+
+    return run(
+        _attempts(
+            payload=payload,
+            timeout=http_client.timeout,
+            rate_limiter=rate_limiter,
+            buckets=buckets,
+            slot=slot,
+            retry=_Retry(
+                _span_name(buckets),
+                attempts,
+                throttled_retries,
+                deadline or Deadline(None),
+                circuit,
+            ),
+        ),
+        perform,
+    )
+
+
+async def send_webhook_async(
+    *,
+    http_client: "AsyncHttpClient",
+    payload: dict[str, Any],
+    url: str,
+    attempts: int,
+    rate_limiter: RateLimiter,
+    buckets: Sequence[Bucket] = (),
+    slot: float | None = None,
+    throttled_retries: int = THROTTLED_RETRIES_MAX,
+    method: str = "POST",
+    deadline: Deadline | None = None,
+    circuit: CircuitBreaker | None = None,
+) -> "httpx.Response":
+    """``send_webhook`` for the asyncio gateways."""
+    from notifier.infrastructure.async_http_client import TRANSPORT_ERRORS
+
+    async def perform(step: _Step) -> Any:
+        if isinstance(step, _Wait):
+            return await rate_limiter.wait_async(buckets, step.slot)
+        if isinstance(step, _Sleep):
+            return await asyncio.sleep(step.delay)
+        try:
+            return await http_client.request(
+                method, url, json=payload, timeout=step.timeout,
+            )
+        except TRANSPORT_ERRORS as e:
+            raise _TransportError(e) from e
+
+    return await run_async(
+        _attempts(
+            payload=payload,
+            timeout=http_client.timeout,
+            rate_limiter=rate_limiter,
+            buckets=buckets,
+            slot=slot,
+            retry=_Retry(
+                _span_name(buckets),
+                attempts,
+                throttled_retries,
+                deadline or Deadline(None),
+                circuit,
+            ),
+        ),
+        perform,
+    )
+
+
+@dataclasses.dataclass(frozen=True)
+class _Wait:
+    """Wait for the rate limiter's ``slot``, the result is the time waited."""
+
+    slot: float
+
+
+@dataclasses.dataclass(frozen=True)
+class _Request:
+    """Send the request, the result is the response."""
+
+    timeout: float
+
+
+@dataclasses.dataclass(frozen=True)
+class _Sleep:
+    delay: float
+
+
+_Step = _Wait | _Request | _Sleep
+
+
+class _TransportError(Exception):
+    """No response at all, whatever the HTTP client raised for it."""
+
+    def __init__(self, error: Exception) -> None:
+        super().__init__(error)
+        self.error = error
+
+
+def _attempts(
+    *,
+    payload: dict[str, Any],
+    timeout: float,
+    rate_limiter: RateLimiter,
+    buckets: Sequence[Bucket],
+    slot: float | None,
+    retry: "_Retry",
+) -> Steps[Any]:
+    """The attempts of one request, until one succeeds or ``retry`` gives up."""
+    name = retry.name
+    while True:
+        retry.check_circuit()
+        if slot is None:
+            slot = rate_limiter.reserve(buckets)
+        retry.check(slot)
+        waited = yield _Wait(slot)
+        slot = None
+        with metrics.span(name, wait=waited) as attributes:
+            try:
+                response = yield _Request(retry.deadline.timeout(timeout))
+            except _TransportError as e:
+                attributes["status"] = "error"
+                yield _Sleep(retry.failed(_transport_error(name, e.error)))
+                continue
+            _observe_attempt(attributes, payload, response)
+        if retry.throttled(rate_limiter.observe(buckets, response)):
+            continue
+        if response.status_code < HTTPStatus.BAD_REQUEST:
+            return retry.succeeded(response)
+        yield _Sleep(retry.failed(_status_error(name, response)))
+
+
+_ResponseT = TypeVar("_ResponseT", "requests.Response", "httpx.Response")
+
+
+class _Retry:
+    """Attempts of one request, and what to do after each of them."""
+
+    def __init__(
+        self,
+        name: str,
+        attempts: int,
+        throttled_retries: int,
+        deadline: Deadline,
+        circuit: CircuitBreaker | None,
+    ) -> None:
+        self.name = name
+        self.deadline = deadline
+        self._attempts = attempts
+        self._throttled_retries = throttled_retries
+        self._circuit = circuit
+        self._failures = 0
+        self._throttled = 0
+
+    def check_circuit(self) -> None:
+        """Fail fast while the destination's circuit is open."""
+        if self._circuit is not None:
+            self._circuit.check(self.name, self)
+
+    def check(self, slot: float) -> None:
+        """Give up if the rate limiter's slot is past the deadline."""
+        if not self.deadline.allows(slot):
+            self._give_up(
+                DeadlineExceededError(
+                    f"{self.name}: deadline reached waiting for the "
+                    "rate limit",
+                ),
+            )
+
+    def throttled(self, retry_after: float | None) -> bool:
+        """
+        Whether to try again because the server asked to wait; the
+        rate limiter holds the next attempt back for ``retry_after``.
+        """
+        if retry_after is None or self._throttled >= self._throttled_retries:
+            return False
+        self._throttled += 1
+        metrics.count("send.throttled")
+        return True
+
+    def failed(self, error: SendError) -> float:
+        """The delay before the next attempt, or raises ``error``."""
+        self._failures += 1
+        # a rejected payload says nothing about the destination's health
+        if self._circuit is not None and error.retryable:
+            self._circuit.failed()
+        if not error.retryable or self._failures >= self._attempts:
+            self._give_up(error)
+        delay = backoff(self._failures)
+        if not self.deadline.allows(time.monotonic() + delay):
+            self._give_up(
+                DeadlineExceededError(
+                    f"{self.name}: deadline reached after "
+                    f"{self._failures} attempts: {error}",
+                ),
             )
-            return
+        metrics.count("send.retries")
+        return delay
+
+    def succeeded(self, response: _ResponseT) -> _ResponseT:
+        if self._circuit is not None:
+            self._circuit.succeeded()
+        _log_response(self.name, response)
+        return response
+
+    def _give_up(self, error: SendError) -> NoReturn:
+        metrics.count("send.failed")
+        if self._circuit is not None:
+            self._circuit.release(self)
+        raise error
+
+
+def _transport_error(name: str, error: Exception) -> SendError:
+    return SendError(f"{name}: {error!r}", retryable=True)
+
+
+def _status_error(
+    name: str,
+    response: "requests.Response | httpx.Response",
+) -> SendError:
+    _log_response(name, response)
+    return SendError(
+        f"{name}: HTTP {response.status_code}: "
+        f"{response.text[:RESPONSE_LOG_LIMIT]}",
+        status_code=response.status_code,
+        retryable=is_retryable_status(response.status_code),
+    )
+
+
+def _log_response(
+    name: str,
+    response: "requests.Response | httpx.Response",
+) -> None:
+    print(
+        f"{name}: HTTP {response.status_code}: "
+        f"{response.text[:RESPONSE_LOG_LIMIT]!r}",
+        file=sys.stderr,
+    )
+
+
+def _span_name(buckets: Sequence[Bucket]) -> str:
+    # bucket keys start with the platform: "telegram:<token>:..."
+    platform = buckets[0].key.split(":", 1)[0] if buckets else "webhook"
+    return f"{platform}.send"
+
+
+def _observe_attempt(
+    attributes: dict[str, Any],
+    payload: dict[str, Any],
+    response: "requests.Response | httpx.Response",
+) -> None:
+    attributes["status"] = str(response.status_code)
+    attributes["bytes_out"] = len(json.dumps(payload).encode())
+    attributes["bytes_in"] = len(response.content)
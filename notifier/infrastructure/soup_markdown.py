@@ -0,0 +1,82 @@
+import bs4
+from markdownify import MarkdownConverter, whitespace_re
+
+from notifier.infrastructure.markdown_buffer import MarkdownBuffer
+
+
+class SoupMarkdownConverter(MarkdownConverter):
+    """markdownify's converter, with Discord's line breaks."""
+
+    class Options(MarkdownConverter.DefaultOptions):
+        heading_style = "ATX"
+        bullets = "-"
+        strip = ["script", "style"]  # noqa: RUF012
+
+    def convert_br(
+        self, el: bs4.Tag, text: str, convert_as_inline: bool,
+    ) -> str:
+        # line breaks are kept as plain newlines, not markdown hard breaks
+        if el.parent is not None and el.parent.name == "li":
+            following = el.next_sibling
+            if not following or getattr(following, "name", None) in (
+                "ul",
+                "ol",
+            ):
+                return ""
+        return "\n"
+
+    def convert_budgeted(self, soup: bs4.BeautifulSoup, limit: int) -> str:
+        """
+        The same markdown as ``convert_soup``, cleaned, but only as much
+        of it as takes more than ``limit`` characters: top-level blocks
+        past that are never converted.
+        """
+        buffer = MarkdownBuffer(limit)
+        self._write_children(soup, buffer)
+        return buffer.getvalue()
+
+    def _write_children(
+        self, node: bs4.Tag, buffer: MarkdownBuffer,
+    ) -> None:
+        for child in node.children:
+            if buffer.exhausted:
+                return
+            if isinstance(child, (bs4.Comment, bs4.Doctype)):
+                continue
+            if isinstance(child, bs4.NavigableString):
+                self._write_text(child, buffer)
+            elif isinstance(child, bs4.Tag) and self._is_transparent(child):
+                # its markdown is just that of its children in a row
+                self._write_children(child, buffer)
+            else:
+                buffer.write(self.process_tag(child, convert_as_inline=False))
+
+    def _write_text(
+        self, node: bs4.NavigableString, buffer: MarkdownBuffer,
+    ) -> None:
+        """
+        ``process_text`` in chunks cut at newlines, so that only the
+        start of a long body is escaped. Whitespace runs never span a
+        newline, and the node is never in an ``li`` here, so nothing is
+        stripped off its end.
+        """
+        text = str(node)
+        normalize = node.find_parent("pre") is None
+        escape = node.find_parent(["pre", "code", "kbd", "samp"]) is None
+        start = 0
+        while start < len(text) and not buffer.exhausted:
+            end = text.find("\n", start + buffer.limit)
+            end = len(text) if end == -1 else end + 1
+            chunk = text[start:end]
+            if normalize:
+                chunk = whitespace_re.sub(" ", chunk)
+            if escape:
+                chunk = self.escape(chunk)
+            buffer.write(chunk)
+            start = end
+
+    def _is_transparent(self, tag: bs4.Tag) -> bool:
+        return (
+            getattr(self, f"convert_{tag.name}", None) is None
+            or not self.should_convert_tag(tag.name)
+        )
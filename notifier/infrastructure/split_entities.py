@@ -0,0 +1,142 @@
+import bisect
+import itertools
+
+import sulguk
+from sulguk.data import MessageEntity
+
+from notifier.infrastructure.truncate_entities import TruncateEntities
+
+# separators to cut at, best first; for each of them a cut outside of
+# entities is preferred over one that has to continue an entity
+SEPARATORS = ("\n\n", "\n", " ")
+
+
+class SplitEntities:
+    """
+    Split an already rendered message into parts of at most
+    ``max_length`` UTF-16 code units. Cuts fall on the last paragraph
+    break, line break or space that fits; entities crossing a cut are
+    continued in the next part.
+    """
+
+    def render(
+            self,
+            render_result: sulguk.RenderResult,
+            max_length: int,
+            max_parts: int | None = None,
+            keep_from: int | None = None,
+    ) -> list[sulguk.RenderResult]:
+        """
+        If the message needs more than ``max_parts`` parts, the last one
+        is truncated, keeping everything from ``keep_from`` (a UTF-16
+        offset) as ``TruncateEntities`` does.
+        """
+        text = render_result.text
+        # UTF-16 offset of every character and the way back
+        offsets = [0, *itertools.accumulate(
+            2 if ord(char) > 0xFFFF else 1 for char in text
+        )]
+        chars = {offset: index for index, offset in enumerate(offsets)}
+        entities = [
+            (
+                chars[entity["offset"]],
+                chars[entity["offset"] + entity["length"]],
+                entity,
+            )
+            for entity in render_result.entities
+        ]
+        depth = self._entity_depth(len(text), entities)
+
+        parts = []
+        start = 0
+        while True:
+            if offsets[-1] - offsets[start] <= max_length:
+                parts.append(
+                    self._part(text, offsets, entities, start, len(text)),
+                )
+                break
+
+            if max_parts is not None and len(parts) == max_parts - 1:
+                rest = self._part(text, offsets, entities, start, len(text))
+                if keep_from is not None and keep_from >= offsets[start]:
+                    rest_keep_from: int | None = keep_from - offsets[start]
+                else:
+                    rest_keep_from = None
+                parts.append(TruncateEntities().render(
+                    render_result=rest,
+                    max_length=max_length,
+                    keep_from=rest_keep_from,
+                ))
+                break
+
+            limit = bisect.bisect_right(
+                offsets, offsets[start] + max_length,
+            ) - 1
+            cut = self._find_cut(text, depth, start, limit)
+            end = len(text[start:cut].rstrip()) + start
+            parts.append(self._part(text, offsets, entities, start, end))
+
+            start = cut
+            while start < len(text) and text[start].isspace():
+                start += 1
+            if start == len(text):
+                break
+
+        return parts
+
+    def _entity_depth(
+            self,
+            size: int,
+            entities: list[tuple[int, int, MessageEntity]],
+    ) -> list[int]:
+        """Number of entities a cut before each character would split."""
+        diff = [0] * (size + 2)
+        for start, end, _ in entities:
+            if end - start > 1:
+                diff[start + 1] += 1
+                diff[end] -= 1
+        return list(itertools.accumulate(diff))
+
+    def _find_cut(
+            self,
+            text: str,
+            depth: list[int],
+            start: int,
+            limit: int,
+    ) -> int:
+        # don't make parts much shorter than they have to be
+        lowest = start + max((limit - start) // 4, 1)
+        for outside in (True, False):
+            for separator in SEPARATORS:
+                position = text.rfind(separator, lowest, limit)
+                while position != -1:
+                    cut = position + len(separator)
+                    if not outside or depth[cut] == 0:
+                        return cut
+                    position = text.rfind(separator, lowest, position)
+        return max(limit, start + 1)
+
+    def _part(
+            self,
+            text: str,
+            offsets: list[int],
+            entities: list[tuple[int, int, MessageEntity]],
+            start: int,
+            end: int,
+    ) -> sulguk.RenderResult:
+        base = offsets[start]
+        part_entities: list[MessageEntity] = []
+        for entity_start, entity_end, entity in entities:
+            entity_start = max(entity_start, start)
+            entity_end = min(entity_end, end)
+            if entity_end <= entity_start:
+                continue
+            part_entities.append({
+                **entity,
+                "offset": offsets[entity_start] - base,
+                "length": offsets[entity_end] - offsets[entity_start],
+            })
+        return sulguk.RenderResult(
+            text=text[start:end],
+            entities=part_entities,
+        )
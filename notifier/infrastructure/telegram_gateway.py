@@ -1,13 +1,63 @@
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import json
+import sys
 import typing
+from concurrent.futures import ThreadPoolExecutor
 
 import sulguk
+from sulguk.entities import Group
+from sulguk.render import State
+from sulguk.transformer import Transformer
 
-from notifier.application import interfaces
-from notifier.domain.entities import Issue, PullRequest
-from notifier.infrastructure.send_weebhook import send_webhook
-from notifier.infrastructure.truncate_html import TruncateHTML
+from notifier.application import interfaces, metrics
+from notifier.application.digest import DigestItem
+from notifier.application.document import Document
+from notifier.application.steps import Blocking, Steps, run, run_async
+from notifier.domain.entities import Issue, PullRequest, SentMessage
+from notifier.infrastructure.http_client import HttpClient
+from notifier.infrastructure.rate_limiter import (
+    TELEGRAM_BOT_LIMIT,
+    TELEGRAM_CHAT_LIMIT,
+    TELEGRAM_GROUP_LIMIT,
+    Bucket,
+    RateLimiter,
+)
+from notifier.infrastructure.retry import (
+    RETRY_DEADLINE_DEFAULT,
+    CircuitBreaker,
+    Deadline,
+    SendError,
+)
+from notifier.infrastructure.send_weebhook import (
+    send_webhook,
+    send_webhook_async,
+)
+from notifier.infrastructure.split_entities import SplitEntities
+from notifier.infrastructure.truncate_entities import TruncateEntities
+
+if typing.TYPE_CHECKING:
+    import httpx
+    import requests
+
+    from notifier.infrastructure.async_http_client import AsyncHttpClient
 
+# the async client needs httpx, only imported when type checking
+_AsyncClient: typing.TypeAlias = "AsyncHttpClient"
+
+TG_API_URL_DEFAULT: typing.Final = "https://api.telegram.org"
 TG_MESSAGE_LIMIT_DEFAULT: typing.Final = 4096
+TG_MESSAGE_PARTS_DEFAULT: typing.Final = 10
+# gap between the parts of a series, so they arrive in order without
+# waiting for each other's responses
+TG_SERIES_INTERVAL: typing.Final = 0.1
+BASE_URL: typing.Final = "https://github.com"
+PROMO: typing.Final = "<a href='/reagento/relator'>sent via relator</a>"
+DIGEST_HEADER: typing.Final = (
+    "📬 <b>{count} new issues and pull requests</b><br/><br/>"
+)
 
 ISSUE_TEMPLATE: typing.Final = (
     "🚀 <b>New issue to <a href=/{repository}>{repository}</a> by <a href=/{user}>@{user}</a> </b><br/>"
@@ -28,65 +78,181 @@ PR_TEMPLATE: typing.Final = (
 )
 
 
-class TelegramGateway(interfaces.Notifier):
+class _Span(Group):
+    """Records where its contents land in the rendered text."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.start: int | None = None
+        self.end: int | None = None
+
+    def render(self, state: State) -> None:
+        self.start = state.canvas.size
+        super().render(state)
+        self.end = state.canvas.size
+
+
+_ClientT = typing.TypeVar("_ClientT")
+
+
+# sulguk internals ``_render`` splices the body into; sulguk is pinned,
+# these are checked so that an upgrade can't break rendering silently
+SPLICED_TRANSFORMER_ATTRIBUTES: typing.Final = (
+    "rawdata", "cdata_elem", "current", "entities", "root",
+)
+SPLICED_STATE_ATTRIBUTES: typing.Final = ("canvas", "entities")
+
+
+@functools.cache
+def _splicing_supported() -> bool:
+    missing = [
+        f"Transformer.{name}"
+        for name in SPLICED_TRANSFORMER_ATTRIBUTES
+        if not hasattr(Transformer(base_url=BASE_URL), name)
+    ] + [
+        f"State.{name}"
+        for name in SPLICED_STATE_ATTRIBUTES
+        if not hasattr(State(), name)
+    ]
+    if missing:
+        print(
+            f"sulguk has no {', '.join(missing)}: rendering Telegram "
+            "messages with sulguk.transform_html instead",
+            file=sys.stderr,
+        )
+    return not missing
+
+
+class BaseTelegramGateway(typing.Generic[_ClientT]):
+    """Rendering and delivery shared by the blocking and the asyncio gateway."""
+
     def __init__(
         self,
         chat_id: str,
         bot_token: str,
         attempt_count: int,
         tg_message_limit: int,
+        http_client: _ClientT,
+        rate_limiter: RateLimiter,
         message_thread_id: str | int | None = None,
         custom_template: str = "",
+        render_cache: interfaces.Cache | None = None,
+        split_messages: bool = False,
+        max_parts: int = TG_MESSAGE_PARTS_DEFAULT,
+        message_index: interfaces.MessageIndex | None = None,
+        retry_deadline: float | None = RETRY_DEADLINE_DEFAULT,
+        api_url: str = TG_API_URL_DEFAULT,
     ) -> None:
         self._chat_id = chat_id
         self._bot_token = bot_token
+        self._api_url = api_url.rstrip("/")
         self._attempt_count = attempt_count
         self._message_thread_id = message_thread_id
         self._custom_template = custom_template
         self._tg_message_limit = tg_message_limit
+        self._http_client = http_client
+        self._rate_limiter = rate_limiter
+        self._render_cache = render_cache
+        self._split_messages = split_messages
+        self._max_parts = max_parts
+        self._message_index = message_index
+        self._retry_deadline = retry_deadline
+        self._circuit = CircuitBreaker()
+        self._buckets = [
+            Bucket(f"telegram:{bot_token}", TELEGRAM_BOT_LIMIT),
+            Bucket(f"telegram:{bot_token}:{chat_id}", TELEGRAM_CHAT_LIMIT),
+        ]
+        if str(chat_id).startswith("-"):
+            self._buckets.append(
+                Bucket(
+                    f"telegram:{bot_token}:{chat_id}:group",
+                    TELEGRAM_GROUP_LIMIT,
+                ),
+            )
 
+    @property
+    def destination(self) -> str:
+        # the bot id is the public part of the token
+        bot_id = self._bot_token.split(":", 1)[0]
+        destination = f"telegram:{bot_id}:{self._chat_id}"
+        if self._message_thread_id:
+            destination += f":{self._message_thread_id}"
+        return destination
 
-    def send_issue(
-        self,
-        issue: Issue,
-        formatted_body: str,
-        formatted_labels: str,
-    ) -> None:
+    def _deadline(self) -> Deadline:
+        return Deadline(self._retry_deadline)
 
-        message = self._create_issue_message(
-            issue=issue,
-            body=formatted_body,
-            labels=formatted_labels
-        )
-        render_result = sulguk.transform_html(
-            message, base_url="https://github.com"
-        )
+    def _method_url(self, method: str) -> str:
+        return f"{self._api_url}/bot{self._bot_token}/{method}"
 
+    def _payload_hashes(
+        self,
+        messages: list[sulguk.RenderResult],
+    ) -> list[str]:
+        return [
+            hashlib.sha256(
+                json.dumps(
+                    [message.text, message.entities],
+                    sort_keys=True,
+                    ensure_ascii=False,
+                ).encode(),
+            ).hexdigest()
+            for message in messages
+        ]
 
-        send_webhook(
-            payload=self._create_payload(render_result),
-            url=f"https://api.telegram.org/bot{self._bot_token}/sendMessage",
-            attempts=self._attempt_count,
+    def _up_to_date(
+        self,
+        sent: SentMessage | None,
+        payload_hashes: list[str],
+        event_url: str,
+    ) -> bool:
+        if sent is None or sent.payload_hashes != payload_hashes:
+            return False
+        print(
+            f"{self.destination}: message for {event_url} is up to date",
+            file=sys.stderr,
         )
+        return True
 
-    def send_pull_request(
+    def _changed_parts(
         self,
-        pull_request: PullRequest,
-        formatted_body: str,
-        formatted_labels: str,
-    ) -> None:
-        message = self._create_pr_message(
-            pull_request, formatted_body, formatted_labels
-        )
-        render_result = sulguk.transform_html(message, base_url="https://github.com")
+        sent: SentMessage,
+        messages: list[sulguk.RenderResult],
+        payload_hashes: list[str],
+    ) -> list[tuple[str, sulguk.RenderResult]]:
+        # Telegram rejects an edit that doesn't change the message
+        return [
+            (message_id, message)
+            for message_id, old_hash, message, new_hash in zip(
+                sent.message_ids,
+                sent.payload_hashes,
+                messages,
+                payload_hashes,
+                strict=False,
+            )
+            if old_hash != new_hash
+        ]
 
-        send_webhook(
-            payload=self._create_payload(render_result),
-            url=f"https://api.telegram.org/bot{self._bot_token}/sendMessage",
-            attempts=self._attempt_count,
-        )
+    def _reserve_series(self, count: int) -> list[float]:
+        """
+        Slots for the rest of a series, which replies to the first
+        message. They are reserved in order up front so that each part
+        is posted as soon as its slot comes, without waiting for the
+        previous response.
+        """
+        slots: list[float] = []
+        for _ in range(count):
+            slot = self._rate_limiter.reserve(self._buckets)
+            if slots:
+                slot = max(slot, slots[-1] + TG_SERIES_INTERVAL)
+            slots.append(slot)
+        return slots
 
-    def _create_payload(self, render_result: sulguk.RenderResult) -> dict:
+    def _create_payload(
+        self,
+        render_result: sulguk.RenderResult,
+        reply_to: int | None = None,
+    ) -> dict:
         for e in render_result.entities:
             e.pop("language", None)
 
@@ -101,69 +267,576 @@ class TelegramGateway(interfaces.Notifier):
         if self._message_thread_id is not None:
             payload["message_thread_id"] = self._message_thread_id
 
+        if reply_to is not None:
+            payload["reply_parameters"] = {
+                "message_id": reply_to,
+                "allow_sending_without_reply": True,
+            }
+
         return payload
 
+    def _create_edit_payload(
+        self,
+        render_result: sulguk.RenderResult,
+        message_id: str,
+    ) -> dict:
+        payload = self._create_payload(render_result)
+        payload.pop("message_thread_id", None)
+        payload["message_id"] = int(message_id)
+        return payload
+
+    def _create_delete_payload(self, message_id: str) -> dict:
+        return {"chat_id": self._chat_id, "message_id": int(message_id)}
+
+    def _create_messages(
+            self,
+            template: str,
+            payload: dict,
+    ) -> list[sulguk.RenderResult]:
+        with metrics.span("telegram.render") as attributes:
+            if not self._split_messages:
+                messages = [self._create_message_with_limit(template, payload)]
+            else:
+                messages = self._memoize(
+                    ("series", self._max_parts),
+                    template,
+                    payload,
+                    lambda: self._split(template, payload),
+                )
+            attributes["parts"] = len(messages)
+        return messages
 
     def _create_message_with_limit(
             self,
             template: str,
             payload: dict,
-    ):
-
-        message = template.format(**payload)
-        message_length = len(message)
-        body = payload["body"]
-        truncate_html = TruncateHTML()
-
-        if message_length > self._tg_message_limit:
-            max_length_body = len(body) - (message_length - self._tg_message_limit)
-            payload['body'] = truncate_html.render(
-                raw_html=body,
-                max_length=max_length_body,
+    ) -> sulguk.RenderResult:
+        return self._memoize(
+            ("message",),
+            template,
+            payload,
+            lambda: [self._render_with_limit(template, payload)],
+        )[0]
+
+    def _memoize(
+            self,
+            kind: tuple,
+            template: str,
+            payload: dict,
+            render: typing.Callable[[], list[sulguk.RenderResult]],
+    ) -> list[sulguk.RenderResult]:
+        if self._render_cache is None:
+            return render()
+
+        key = (
+            "telegram",
+            *kind,
+            template,
+            self._tg_message_limit,
+            {name: value for name, value in payload.items() if name != "body"},
+            payload["body"].digest,
+        )
+        cached = self._render_cache.get_or_put(
+            key,
+            lambda: json.dumps([
+                {"text": message.text, "entities": message.entities}
+                for message in render()
+            ]),
+        )
+        return [sulguk.RenderResult(**message) for message in json.loads(cached)]
+
+    def _split(
+            self,
+            template: str,
+            payload: dict,
+    ) -> list[sulguk.RenderResult]:
+        body_span = _Span()
+        render_result = self._render(template, payload, body_span)
+
+        return SplitEntities().render(
+            render_result=render_result,
+            max_length=self._tg_message_limit,
+            max_parts=self._max_parts,
+            keep_from=body_span.end,
+        )
+
+    def _render_with_limit(
+            self,
+            template: str,
+            payload: dict,
+    ) -> sulguk.RenderResult:
+        body_span = _Span()
+        render_result = self._render(template, payload, body_span)
+
+        return TruncateEntities().render(
+            render_result=render_result,
+            max_length=self._tg_message_limit,
+            keep_from=body_span.end,
+        )
+
+    def _render(
+            self,
+            template: str,
+            payload: dict,
+            body_span: "_Span",
+    ) -> sulguk.RenderResult:
+        """
+        Render the template around the already parsed body: only the
+        template text goes through the HTML parser, the body's sulguk
+        entities are added in between.
+        """
+        body: Document = payload["body"]
+        prefix, placeholder, suffix = template.partition("{body}")
+        if not _splicing_supported():
+            return sulguk.transform_html(
+                template.format(**payload), base_url=BASE_URL
             )
-            return template.format(**payload)
 
-        return message
+        transformer = Transformer(base_url=BASE_URL)
+        if placeholder:
+            transformer.feed(prefix.format(**payload))
+        if not placeholder or transformer.rawdata or transformer.cdata_elem:
+            # the body can't be spliced in between complete tags
+            return sulguk.transform_html(
+                template.format(**payload), base_url=BASE_URL
+            )
 
+        transformer.current.add(body_span)
+        body_span.add(body.entities())
+        transformer.feed(suffix.format(**payload))
 
-    def _create_issue_message(self, issue: Issue, body: str, labels: str) -> str:
-        template = self._custom_template or ISSUE_TEMPLATE
-        payload = dict(
-            id=issue.id,
-            user=issue.user,
-            title=issue.title,
-            labels=labels,
-            url=issue.url,
-            body=body,
-            repository=issue.repository,
-            promo="<a href='/reagento/relator'>sent via relator</a>"
-        )
-
-        return self._create_message_with_limit(
+        state = State()
+        try:
+            transformer.root.render(state)
+        except Exception as e:  # noqa: BLE001
+            # checked when the body was parsed, but only by building it
+            print(f"Error rendering the body: {e}", file=sys.stderr)
+            body_span.entities.clear()
+            return self._render(
+                template,
+                {**payload, "body": body.placeholder()},
+                body_span,
+            )
+        return sulguk.RenderResult(
+            text=state.canvas.text,
+            entities=state.entities,
+        )
+
+    def _create_issue_message(
+        self, issue: Issue, body: Document, labels: str,
+    ) -> list[sulguk.RenderResult]:
+        template, payload = self._issue_payload(issue, body, labels)
+        return self._create_messages(
             template=template,
             payload=payload,
         )
 
-    def _create_pr_message(self, pr: PullRequest, body: str, labels: str) -> str:
-        """Create HTML message for pull request"""
-        template = self._custom_template or PR_TEMPLATE
-
-        payload = dict(
-            id=pr.id,
-            user=pr.user,
-            title=pr.title,
-            labels=labels,
-            url=pr.url,
-            body=body,
-            repository=pr.repository,
-            additions=pr.additions,
-            deletions=pr.deletions,
-            head_ref=pr.head_ref,
-            base_ref=pr.base_ref,
-            promo="<a href='/reagento/relator'>sent via relator</a>",
-        )
-
-        return self._create_message_with_limit(
+    def _create_pr_message(
+        self, pr: PullRequest, body: Document, labels: str,
+    ) -> list[sulguk.RenderResult]:
+        """Render message for pull request"""
+        template, payload = self._pr_payload(pr, body, labels)
+        return self._create_messages(
             template=template,
             payload=payload
-        )
\ No newline at end of file
+        )
+
+    def _create_digest_messages(
+        self, items: typing.Sequence[DigestItem],
+    ) -> list[sulguk.RenderResult]:
+        """
+        One list entry per event, rendered with its usual template but
+        without the body; split into a series if it gets too long.
+        """
+        entries = []
+        for item in items:
+            if isinstance(item.event, Issue):
+                template, payload = self._issue_payload(
+                    item.event, item.formatted_body, item.formatted_labels,
+                )
+            else:
+                template, payload = self._pr_payload(
+                    item.event, item.formatted_body, item.formatted_labels,
+                )
+            # a digest is a list of links, the bodies would drown it
+            payload.update(body="", promo="")
+            entries.append(template.format(**payload))
+        html = (
+            DIGEST_HEADER.format(count=len(items))
+            + "<br/>".join(entries)
+            + PROMO
+        )
+
+        with metrics.span(
+            "telegram.render", events=len(items),
+        ) as attributes:
+            messages = SplitEntities().render(
+                render_result=sulguk.transform_html(html, base_url=BASE_URL),
+                max_length=self._tg_message_limit,
+                max_parts=self._max_parts,
+            )
+            attributes["parts"] = len(messages)
+        return messages
+
+    def _issue_payload(
+        self, issue: Issue, body: Document, labels: str,
+    ) -> tuple[str, dict[str, typing.Any]]:
+        template = self._custom_template or ISSUE_TEMPLATE
+        payload = {
+            "id": issue.id,
+            "user": issue.user,
+            "title": issue.title,
+            "labels": labels,
+            "url": issue.url,
+            "body": body,
+            "repository": issue.repository,
+            "promo": PROMO,
+        }
+        return template, payload
+
+    def _pr_payload(
+        self, pr: PullRequest, body: Document, labels: str,
+    ) -> tuple[str, dict[str, typing.Any]]:
+        template = self._custom_template or PR_TEMPLATE
+        payload = {
+            "id": pr.id,
+            "user": pr.user,
+            "title": pr.title,
+            "labels": labels,
+            "url": pr.url,
+            "body": body,
+            "repository": pr.repository,
+            "additions": pr.additions,
+            "deletions": pr.deletions,
+            "head_ref": pr.head_ref,
+            "base_ref": pr.base_ref,
+            "promo": PROMO,
+        }
+        return template, payload
+
+    def _deliver(
+        self,
+        event_url: str,
+        create_messages: Blocking,
+    ) -> Steps[None]:
+        """
+        With a message index, a known event has its messages edited, or
+        nothing is sent at all if they haven't changed.
+        """
+        messages = yield create_messages
+        deadline = self._deadline()
+        if self._message_index is None:
+            yield from self._send_messages(messages, deadline)
+            return
+
+        payload_hashes = self._payload_hashes(messages)
+        sent = yield Blocking(
+            self._message_index.get, (event_url, self.destination),
+        )
+        if self._up_to_date(sent, payload_hashes, event_url):
+            return
+
+        message_ids = None
+        if sent is not None:
+            message_ids = yield from self._edit_messages(
+                sent, messages, payload_hashes, deadline,
+            )
+        if message_ids is None:
+            message_ids = yield from self._send_messages(messages, deadline)
+        yield Blocking(
+            self._message_index.put,
+            (
+                event_url,
+                self.destination,
+                SentMessage(
+                    message_ids=message_ids,
+                    payload_hashes=payload_hashes,
+                ),
+            ),
+        )
+
+    def _send_messages(
+        self,
+        messages: list[sulguk.RenderResult],
+        deadline: Deadline,
+    ) -> Steps[list[str]]:
+        """Ids of the messages that were sent."""
+        first, *rest = messages
+        response = yield _Call(
+            "sendMessage", self._create_payload(first), deadline,
+        )
+        reply_to = _message_id(response)
+        added = yield from self._send_series(rest, reply_to, deadline)
+        return [str(reply_to), *added]
+
+    def _send_series(
+        self,
+        messages: list[sulguk.RenderResult],
+        reply_to: int,
+        deadline: Deadline,
+    ) -> Steps[list[str]]:
+        """
+        The rest of a series, as replies to its first message. The parts
+        are posted once each in slots reserved in order, without waiting
+        for each other's responses. Telegram numbers messages as they
+        arrive: from the first part that failed or overtook the one
+        before it, the parts that got through are deleted, that part is
+        sent again with retries and the rest are pipelined again.
+        """
+        message_ids: list[str] = []
+        pipelined = True
+        while len(message_ids) < len(messages):
+            pending = messages[len(message_ids):]
+            if not pipelined or len(pending) == 1:
+                response = yield _Call(
+                    "sendMessage",
+                    self._create_payload(pending[0], reply_to=reply_to),
+                    deadline,
+                )
+                message_ids.append(str(_message_id(response)))
+                pipelined = True
+                continue
+
+            outcomes = yield _Series([
+                _Call(
+                    "sendMessage",
+                    self._create_payload(message, reply_to=reply_to),
+                    deadline,
+                    slot,
+                )
+                for message, slot in zip(
+                    pending, self._reserve_series(len(pending)), strict=True,
+                )
+            ])
+            previous = int(message_ids[-1]) if message_ids else reply_to
+            for index, outcome in enumerate(outcomes):
+                if (
+                    isinstance(outcome, SendError)
+                    or _message_id(outcome) <= previous
+                ):
+                    stray = outcomes[index:]
+                    break
+                previous = _message_id(outcome)
+                message_ids.append(str(previous))
+            else:
+                continue
+
+            yield from self._delete_messages(
+                [
+                    str(_message_id(outcome))
+                    for outcome in stray
+                    if not isinstance(outcome, SendError)
+                ],
+                deadline,
+            )
+            if isinstance(stray[0], SendError) and not stray[0].retryable:
+                raise stray[0]
+            pipelined = False
+        return message_ids
+
+    def _edit_messages(
+        self,
+        sent: SentMessage,
+        messages: list[sulguk.RenderResult],
+        payload_hashes: list[str],
+        deadline: Deadline,
+    ) -> Steps[list[str] | None]:
+        """
+        Edit the changed parts of a series in place, adding or deleting
+        parts if their number changed. None if the messages are gone and
+        have to be sent anew.
+        """
+        message_ids = sent.message_ids
+        for message_id, message in self._changed_parts(
+            sent, messages, payload_hashes,
+        ):
+            try:
+                yield _Call(
+                    "editMessageText",
+                    self._create_edit_payload(message, message_id),
+                    deadline,
+                )
+            except SendError as e:
+                if e.retryable:
+                    raise
+                return None
+
+        added = yield from self._send_series(
+            messages[len(message_ids):], int(message_ids[0]), deadline,
+        )
+        yield from self._delete_messages(
+            message_ids[len(messages):], deadline,
+        )
+        return [*message_ids[:len(messages)], *added]
+
+    def _delete_messages(
+        self,
+        message_ids: list[str],
+        deadline: Deadline,
+    ) -> Steps[None]:
+        for message_id in message_ids:
+            try:
+                yield _Call(
+                    "deleteMessage",
+                    self._create_delete_payload(message_id),
+                    deadline,
+                )
+            except SendError as e:
+                # a part that can't be deleted is most likely gone already
+                if e.retryable:
+                    raise
+
+    def _send_kwargs(self, call: "_Call") -> dict[str, typing.Any]:
+        kwargs = {
+            "payload": call.payload,
+            "url": self._method_url(call.method),
+            "attempts": self._attempt_count,
+            "rate_limiter": self._rate_limiter,
+            "buckets": self._buckets,
+            "deadline": call.deadline,
+            "circuit": self._circuit,
+        }
+        if call.slot is not None:
+            # a retry would arrive after the parts following it
+            kwargs.update(slot=call.slot, attempts=1, throttled_retries=0)
+        return kwargs
+
+
+@dataclasses.dataclass(frozen=True)
+class _Call:
+    """Call a Bot API method, the result is the response."""
+
+    method: str
+    payload: dict
+    deadline: Deadline
+    # reserved for a single attempt, in a pipelined series
+    slot: float | None = None
+
+
+@dataclasses.dataclass(frozen=True)
+class _Series:
+    """
+    Make the calls concurrently, each at its slot; the result is their
+    responses, or the ``SendError`` of those that failed, in order.
+    """
+
+    calls: list[_Call]
+
+
+def _message_id(response: "requests.Response | httpx.Response") -> int:
+    return response.json()["result"]["message_id"]
+
+
+class TelegramGateway(BaseTelegramGateway[HttpClient], interfaces.Notifier):
+    def send_issue(
+        self,
+        issue: Issue,
+        formatted_body: Document,
+        formatted_labels: str,
+    ) -> None:
+        run(
+            self._deliver(
+                issue.url,
+                Blocking(
+                    self._create_issue_message,
+                    (issue, formatted_body, formatted_labels),
+                ),
+            ),
+            self._perform,
+        )
+
+    def send_pull_request(
+        self,
+        pull_request: PullRequest,
+        formatted_body: Document,
+        formatted_labels: str,
+    ) -> None:
+        run(
+            self._deliver(
+                pull_request.url,
+                Blocking(
+                    self._create_pr_message,
+                    (pull_request, formatted_body, formatted_labels),
+                ),
+            ),
+            self._perform,
+        )
+
+    def send_digest(self, items: typing.Sequence[DigestItem]) -> None:
+        run(
+            self._send_messages(
+                self._create_digest_messages(items), self._deadline(),
+            ),
+            self._perform,
+        )
+
+    def _perform(self, step: _Call | _Series) -> typing.Any:
+        if isinstance(step, _Series):
+            with ThreadPoolExecutor(
+                max_workers=len(step.calls),
+                thread_name_prefix="telegram-series",
+            ) as executor:
+                return list(executor.map(self._outcome, step.calls))
+        return send_webhook(
+            http_client=self._http_client, **self._send_kwargs(step),
+        )
+
+    def _outcome(self, call: _Call) -> "requests.Response | SendError":
+        try:
+            return self._perform(call)
+        except SendError as e:
+            return e
+
+
+class AsyncTelegramGateway(
+    BaseTelegramGateway[_AsyncClient],
+    interfaces.AsyncNotifier,
+):
+    """Same messages as ``TelegramGateway``, sent from an event loop."""
+
+    async def send_issue(
+        self,
+        issue: Issue,
+        formatted_body: Document,
+        formatted_labels: str,
+    ) -> None:
+        await run_async(
+            self._deliver(
+                issue.url,
+                Blocking(
+                    self._create_issue_message,
+                    (issue, formatted_body, formatted_labels),
+                ),
+            ),
+            self._perform,
+        )
+
+    async def send_pull_request(
+        self,
+        pull_request: PullRequest,
+        formatted_body: Document,
+        formatted_labels: str,
+    ) -> None:
+        await run_async(
+            self._deliver(
+                pull_request.url,
+                Blocking(
+                    self._create_pr_message,
+                    (pull_request, formatted_body, formatted_labels),
+                ),
+            ),
+            self._perform,
+        )
+
+    async def _perform(self, step: _Call | _Series) -> typing.Any:
+        if isinstance(step, _Series):
+            return await asyncio.gather(*map(self._outcome, step.calls))
+        return await send_webhook_async(
+            http_client=self._http_client, **self._send_kwargs(step),
+        )
+
+    async def _outcome(self, call: _Call) -> "httpx.Response | SendError":
+        try:
+            return await self._perform(call)
+        except SendError as e:
+            return e
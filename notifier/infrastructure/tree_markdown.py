@@ -0,0 +1,336 @@
+import re
+import typing
+from collections.abc import Callable
+
+from notifier.application import html_tree
+from notifier.infrastructure.markdown_buffer import MarkdownBuffer
+
+# markdownify's patterns
+WHITESPACE: typing.Final = re.compile(r"[\t ]+")
+LINE_BEGINNING: typing.Final = re.compile(r"^", re.MULTILINE)
+INLINE_HEADING: typing.Final = re.compile(r"h[1-6]")
+HEADING: typing.Final = re.compile(r"h(\d+)")
+LIST_TAGS: typing.Final = ("ul", "ol")
+CODE_TAGS: typing.Final = ("pre", "code", "kbd", "samp")
+# converted as if they were transparent, keeping their text
+STRIPPED_TAGS: typing.Final = frozenset(("script", "style"))
+
+_Converter: typing.TypeAlias = Callable[[html_tree.Element, str, bool], str]
+
+
+def chomp(text: str) -> tuple[str, str, str]:
+    """Leading and trailing space of an inline tag's text, moved out."""
+    prefix = " " if text and text[0] == " " else ""
+    suffix = " " if text and text[-1] == " " else ""
+    return prefix, suffix, text.strip()
+
+
+def _quote(title: str) -> str:
+    return title.replace('"', r"\"")
+
+
+def _inline(markup: str) -> _Converter:
+    def convert(el: html_tree.Element, text: str, inline: bool) -> str:
+        prefix, suffix, text = chomp(text)
+        if not text:
+            return ""
+        return f"{prefix}{markup}{text}{markup}{suffix}"
+
+    return convert
+
+
+class TreeMarkdownConverter:
+    """
+    The markdown ``SoupMarkdownConverter`` writes, from an ``html_tree``
+    tree: markdownify's conversions with the options used for Discord
+    (ATX headings, ``-`` bullets, script and style not converted).
+
+    Whitespace the conversion would drop around list and table parts is
+    already gone from a ``Document`` tree, so it isn't looked for here.
+    """
+
+    convert_b = convert_strong = staticmethod(_inline("**"))
+    convert_em = convert_i = staticmethod(_inline("*"))
+    convert_del = convert_s = staticmethod(_inline("~~"))
+    convert_sub = convert_sup = staticmethod(_inline(""))
+    _convert_inline_code = staticmethod(_inline("`"))
+
+    def convert_budgeted(self, tree: html_tree.Element, limit: int) -> str:
+        """
+        Markdown of the whole tree, cleaned, but only as much of it as
+        takes more than ``limit`` characters: top-level blocks past
+        that are never converted.
+        """
+        buffer = MarkdownBuffer(limit)
+        self._write_children(tree, buffer)
+        return buffer.getvalue()
+
+    def process_tag(
+        self, el: html_tree.Element, convert_as_inline: bool,
+    ) -> str:
+        # markdown headings and cells can't hold blocks
+        children_inline = (
+            convert_as_inline
+            or INLINE_HEADING.match(el.name) is not None
+            or el.name in ("td", "th")
+        )
+        parts = []
+        for child in el.children:
+            if isinstance(child, html_tree.Text):
+                parts.append(self.process_text(child))
+            elif isinstance(child, html_tree.Element):
+                parts.append(self.process_tag(child, children_inline))
+        text = "".join(parts)
+
+        converter = self._converter(el.name)
+        if converter is not None:
+            text = converter(el, text, convert_as_inline)
+        return text
+
+    def process_text(self, node: html_tree.Text) -> str:
+        text = node.data
+        if node.find_parent("pre") is None:
+            text = WHITESPACE.sub(" ", text)
+        if node.find_parent(CODE_TAGS) is None:
+            text = self.escape(text)
+
+        # the last text of an item, or the one before its sublist
+        following = node.next_sibling
+        if node.parent is not None and node.parent.name == "li" and (
+            not following or following.name in LIST_TAGS
+        ):
+            text = text.rstrip()
+        return text
+
+    def escape(self, text: str) -> str:
+        return text.replace("*", r"\*").replace("_", r"\_")
+
+    def indent(self, text: str, level: int) -> str:
+        return LINE_BEGINNING.sub("\t" * level, text) if text else ""
+
+    def convert_a(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        prefix, suffix, text = chomp(text)
+        if not text:
+            return ""
+        href = el.get("href")
+        title = el.get("title")
+        if text.replace(r"\_", "_") == href and not title:
+            return f"<{href}>"
+        title_part = f' "{_quote(title)}"' if title else ""
+        if not href:
+            return text
+        return f"{prefix}[{text}]({href}{title_part}){suffix}"
+
+    def convert_blockquote(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        if convert_as_inline:
+            return text
+        if not text:
+            return ""
+        return "\n" + LINE_BEGINNING.sub("> ", text.strip()) + "\n\n"
+
+    def convert_br(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        # line breaks are kept as plain newlines, not markdown hard breaks
+        if el.parent is not None and el.parent.name == "li":
+            following = el.next_sibling
+            if not following or following.name in LIST_TAGS:
+                return ""
+        return "\n"
+
+    def convert_code(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        if el.parent is not None and el.parent.name == "pre":
+            return text
+        return self._convert_inline_code(el, text, convert_as_inline)
+
+    convert_kbd = convert_samp = convert_code
+
+    def convert_hn(
+        self,
+        n: int,
+        el: html_tree.Element,
+        text: str,
+        convert_as_inline: bool,
+    ) -> str:
+        if convert_as_inline:
+            return text
+        return "{} {}\n\n".format("#" * n, text.strip())
+
+    def convert_hr(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        return "\n\n---\n\n"
+
+    def convert_img(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        alt = el.get("alt") or ""
+        src = el.get("src") or ""
+        title = el.get("title") or ""
+        title_part = f' "{_quote(title)}"' if title else ""
+        if convert_as_inline:
+            return alt
+        return f"![{alt}]({src}{title_part})"
+
+    def convert_list(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        following = el.next_sibling
+        before_paragraph = (
+            following is not None
+            and bool(following)
+            and following.name not in LIST_TAGS
+        )
+        if el.find_parent("li") is not None:
+            # nested: no trailing newline
+            return "\n" + self.indent(text, 1).rstrip()
+        return text + ("\n" if before_paragraph else "")
+
+    convert_ul = convert_ol = convert_list
+
+    def convert_li(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        parent = el.parent
+        if parent is not None and parent.name == "ol":
+            start = parent.get("start")
+            bullet = f"{(int(start) if start else 1) + parent.index(el)}."
+        else:
+            bullet = "-"
+        return f"{bullet} {text.strip()}\n"
+
+    def convert_p(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        if convert_as_inline:
+            return text
+        return f"{text}\n\n" if text else ""
+
+    def convert_pre(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        if not text:
+            return ""
+        return f"\n```\n{text}\n```\n"
+
+    def convert_table(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        return "\n\n" + text + "\n"
+
+    def convert_caption(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        return text + "\n"
+
+    def convert_figcaption(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        return "\n\n" + text + "\n\n"
+
+    def convert_td(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        colspan = int(el["colspan"]) if "colspan" in el.attrs else 1
+        return " " + text.strip().replace("\n", " ") + " |" * colspan
+
+    convert_th = convert_td
+
+    def convert_tr(
+        self, el: html_tree.Element, text: str, convert_as_inline: bool,
+    ) -> str:
+        cells = el.find_all(("td", "th"))
+        parent = el.parent
+        if parent is None:
+            return "|" + text + "\n"
+        is_first = not el.previous_sibling
+        is_headrow = (
+            all(cell.name == "th" for cell in cells)
+            or (is_first and parent.name != "tbody")
+            or (
+                is_first
+                and parent.name == "tbody"
+                and parent.parent is not None
+                and not parent.parent.find_all("thead")
+            )
+        )
+        overline = underline = ""
+        if is_headrow and is_first:
+            # first row and a heading one: underline it
+            full_colspan = sum(
+                int(cell["colspan"]) if "colspan" in cell.attrs else 1
+                for cell in cells
+            )
+            underline = "| " + " | ".join(["---"] * full_colspan) + " |\n"
+        elif is_first and (
+            parent.name == "table"
+            or (parent.name == "tbody" and not parent.previous_sibling)
+        ):
+            # first row of a table without a heading: an empty one above
+            overline = (
+                "| " + " | ".join([""] * len(cells)) + " |\n"
+                "| " + " | ".join(["---"] * len(cells)) + " |\n"
+            )
+        return overline + "|" + text + "\n" + underline
+
+    def _converter(self, name: str) -> _Converter | None:
+        if name in STRIPPED_TAGS:
+            return None
+        converter: _Converter | None = getattr(self, f"convert_{name}", None)
+        if converter is not None:
+            return converter
+        # markdownify takes any h<number> for a heading
+        heading = HEADING.match(name)
+        if heading is None:
+            return None
+        level = int(heading[1])
+        return lambda el, text, inline: self.convert_hn(
+            level, el, text, inline,
+        )
+
+    def _write_children(
+        self, el: html_tree.Element, buffer: MarkdownBuffer,
+    ) -> None:
+        for child in el.children:
+            if buffer.exhausted:
+                return
+            if isinstance(child, html_tree.Text):
+                self._write_text(child, buffer)
+            elif isinstance(child, html_tree.Element):
+                if self._converter(child.name) is None:
+                    # its markdown is just that of its children in a row
+                    self._write_children(child, buffer)
+                else:
+                    buffer.write(
+                        self.process_tag(child, convert_as_inline=False),
+                    )
+
+    def _write_text(
+        self, node: html_tree.Text, buffer: MarkdownBuffer,
+    ) -> None:
+        """
+        ``process_text`` in chunks cut at newlines, so that only the
+        start of a long body is escaped. Whitespace runs never span a
+        newline, and the node is never in an ``li`` here, so nothing is
+        stripped off its end.
+        """
+        text = node.data
+        normalize = node.find_parent("pre") is None
+        escape = node.find_parent(CODE_TAGS) is None
+        start = 0
+        while start < len(text) and not buffer.exhausted:
+            end = text.find("\n", start + buffer.limit)
+            end = len(text) if end == -1 else end + 1
+            chunk = text[start:end]
+            if normalize:
+                chunk = WHITESPACE.sub(" ", chunk)
+            if escape:
+                chunk = self.escape(chunk)
+            buffer.write(chunk)
+            start = end
@@ -0,0 +1,95 @@
+import sulguk
+from sulguk.data import MessageEntity
+
+
+def utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+class TruncateEntities:
+    """
+    Cut an already rendered message to a budget in UTF-16 code units,
+    the way Telegram counts message length. Entities that cross the cut
+    are clipped to it, entities inside the removed part are dropped.
+    """
+
+    def __init__(self) -> None:
+        self._ellipsis = "..."
+
+    def render(
+            self,
+            render_result: sulguk.RenderResult,
+            max_length: int,
+            keep_from: int | None = None,
+    ) -> sulguk.RenderResult:
+        """
+        Everything from ``keep_from`` (a UTF-16 offset) to the end of the
+        text is preserved and the cut is made right before it, if the
+        budget allows; otherwise the text is cut from the end.
+        """
+        encoded = render_result.text.encode("utf-16-le")
+        size = len(encoded) // 2
+        if size <= max_length:
+            return render_result
+
+        ellipsis_length = utf16_length(self._ellipsis)
+        if keep_from is None or keep_from > size:
+            keep_from = size
+        budget = max_length - ellipsis_length - (size - keep_from)
+        if budget < 0:
+            keep_from = size
+            budget = max(max_length - ellipsis_length, 0)
+
+        # a split surrogate pair is dropped by "ignore"
+        head = encoded[:budget * 2].decode("utf-16-le", "ignore").rstrip()
+        tail = encoded[keep_from * 2:].decode("utf-16-le", "ignore")
+        head_length = utf16_length(head)
+        shift = head_length + ellipsis_length - keep_from
+
+        entities = []
+        for entity in render_result.entities:
+            moved = self._move(
+                entity=entity,
+                head_length=head_length,
+                ellipsis_length=ellipsis_length,
+                keep_from=keep_from,
+                shift=shift,
+            )
+            if moved is not None:
+                entities.append(moved)
+
+        return sulguk.RenderResult(
+            text=head + self._ellipsis + tail,
+            entities=entities,
+        )
+
+    def _move(
+            self,
+            entity: MessageEntity,
+            head_length: int,
+            ellipsis_length: int,
+            keep_from: int,
+            shift: int,
+    ) -> MessageEntity | None:
+        start = entity["offset"]
+        end = start + entity["length"]
+
+        if end <= head_length:
+            return entity
+        if start >= keep_from:
+            return {**entity, "offset": start + shift}
+
+        if start < head_length:
+            # the ellipsis stays inside the entity it cut, like the text did
+            length = head_length - start + ellipsis_length
+            if end > keep_from:
+                length += end - keep_from
+            return {**entity, "length": length}
+
+        if end > keep_from:
+            return {
+                **entity,
+                "offset": keep_from + shift,
+                "length": end - keep_from,
+            }
+        return None
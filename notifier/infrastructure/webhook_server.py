@@ -0,0 +1,219 @@
+import hashlib
+import hmac
+import json
+import sys
+import threading
+import typing
+from collections.abc import Callable, Collection
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from notifier.application import metrics
+
+WEBHOOK_MAX_BODY_SIZE: typing.Final = 25 * 1024 * 1024
+WEBHOOK_ACTIONS_DEFAULT: typing.Final = ("opened", "reopened")
+EVENT_OBJECTS: typing.Final = {
+    "issues": "issue",
+    "pull_request": "pull_request",
+    "pull_request_target": "pull_request",
+}
+
+
+def verify_signature(secret: str, body: bytes, signature: str) -> bool:
+    expected = "sha256=" + hmac.new(
+        secret.encode(), body, hashlib.sha256,
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def verify_token(secret: str, authorization: str) -> bool:
+    """Whether an ``Authorization`` header carries the secret as a token."""
+    return hmac.compare_digest(f"Bearer {secret}", authorization)
+
+
+def parse_content_length(value: str | None) -> int | None:
+    """The body size a request announces, None if it's not a size."""
+    if not value:
+        return 0
+    if not (value.isascii() and value.isdigit()):
+        return None
+    return int(value)
+
+
+def extract_event_url(
+    event: str,
+    payload: dict[str, typing.Any],
+    actions: Collection[str],
+) -> str | None:
+    key = EVENT_OBJECTS.get(event)
+    if key is None or payload.get("action") not in actions:
+        return None
+    return (payload.get(key) or {}).get("url")
+
+
+class WebhookServer:
+    """
+    Receives GitHub webhook deliveries and hands the API URL of every
+    accepted issue/PR to ``handle_event`` on a bounded worker pool.
+
+    Deliveries are acknowledged as soon as they are queued; when
+    ``queue_size`` events are already waiting the server answers 503 so
+    GitHub shows the delivery as failed and it can be redelivered.
+    """
+
+    def __init__(
+        self,
+        handle_event: Callable[[str], None],
+        secret: str,
+        host: str,
+        port: int,
+        concurrency: int,
+        queue_size: int,
+        actions: Collection[str] = WEBHOOK_ACTIONS_DEFAULT,
+    ) -> None:
+        self._handle_event = handle_event
+        self._secret = secret
+        self._actions = frozenset(actions)
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix="webhook",
+        )
+        self._slots = threading.BoundedSemaphore(concurrency + queue_size)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self._httpd.server_address[:2]
+        return str(host), int(port)
+
+    def serve_forever(self) -> None:
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+            self._executor.shutdown(wait=True)
+
+    def shutdown(self) -> None:
+        self._httpd.shutdown()
+
+    def submit(self, event_url: str) -> bool:
+        if not self._slots.acquire(blocking=False):
+            return False
+        future = self._executor.submit(self._run, event_url)
+        future.add_done_callback(lambda _: self._slots.release())
+        return True
+
+    def _run(self, event_url: str) -> None:
+        try:
+            self._handle_event(event_url)
+        except Exception as e:  # noqa: BLE001
+            print(f"Error processing {event_url}: {e}", file=sys.stderr)
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                if self.path == "/healthz":
+                    self._reply(HTTPStatus.OK, "ok")
+                elif self.path == "/metrics":
+                    # the server listens on every interface by default
+                    if not verify_token(
+                        server._secret,
+                        self.headers.get("Authorization") or "",
+                    ):
+                        self._reply(HTTPStatus.UNAUTHORIZED, "bad token")
+                        return
+                    self._reply(
+                        HTTPStatus.OK,
+                        json.dumps(metrics.snapshot()),
+                        {"Content-Type": "application/json"},
+                    )
+                else:
+                    self._reply(HTTPStatus.NOT_FOUND, "not found")
+
+            def do_POST(self) -> None:
+                length = parse_content_length(
+                    self.headers.get("Content-Length"),
+                )
+                if length is None:
+                    # reading a negative length would wait for the peer
+                    # to close the connection
+                    self._reject(
+                        HTTPStatus.BAD_REQUEST, "invalid Content-Length",
+                    )
+                    return
+                if length > WEBHOOK_MAX_BODY_SIZE:
+                    self._reject(
+                        HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "too large",
+                    )
+                    return
+                body = self.rfile.read(length)
+
+                signature = self.headers.get("X-Hub-Signature-256") or ""
+                if not verify_signature(server._secret, body, signature):
+                    self._reply(HTTPStatus.UNAUTHORIZED, "bad signature")
+                    return
+
+                event = self.headers.get("X-GitHub-Event") or ""
+                if event == "ping":
+                    self._reply(HTTPStatus.OK, "pong")
+                    return
+
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    payload = None
+                if not isinstance(payload, dict):
+                    self._reply(HTTPStatus.BAD_REQUEST, "invalid payload")
+                    return
+
+                event_url = extract_event_url(event, payload, server._actions)
+                if event_url is None:
+                    self._reply(HTTPStatus.ACCEPTED, "ignored")
+                elif server.submit(event_url):
+                    self._reply(HTTPStatus.ACCEPTED, "queued")
+                else:
+                    self._reply(
+                        HTTPStatus.SERVICE_UNAVAILABLE,
+                        "queue is full",
+                        {"Retry-After": "30"},
+                    )
+
+            def _reject(self, status: HTTPStatus, message: str) -> None:
+                # the body is left unread: on a kept-alive connection it
+                # would be parsed as the next request
+                self.close_connection = True
+                self._reply(status, message, {"Connection": "close"})
+
+            def _reply(
+                self,
+                status: HTTPStatus,
+                message: str,
+                headers: dict[str, str] | None = None,
+            ) -> None:
+                content = message.encode()
+                headers = {"Content-Type": "text/plain", **(headers or {})}
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(
+                self, format: str, *args: typing.Any,
+            ) -> None:
+                headers = getattr(self, "headers", None)
+                delivery = "-"
+                if headers is not None:
+                    delivery = headers.get("X-GitHub-Delivery", "-")
+                print(
+                    f"{self.address_string()} {delivery} {format % args}",
+                    file=sys.stderr,
+                )
+
+        return Handler
@@ -0,0 +1,95 @@
+import os
+import sys
+
+from notifier.factory import (
+    create_digest_notifiers,
+    create_dispatcher,
+    create_github_gateway,
+    create_http_client,
+    create_message_index,
+    create_notifiers,
+    create_outbox,
+    create_render_cache,
+    create_render_service,
+    create_response_cache,
+    create_router,
+    flush_digests,
+    get_interactor,
+    register_metrics_hooks,
+    report_error,
+    report_metrics,
+    report_render_cache_stats,
+)
+from notifier.infrastructure.render_cache import RENDER_CACHE_SIZE_DEFAULT
+from notifier.infrastructure.webhook_server import (
+    WEBHOOK_ACTIONS_DEFAULT,
+    WebhookServer,
+)
+
+if __name__ == "__main__":
+    secret = os.environ.get("WEBHOOK_SECRET")
+    if not secret:
+        print("Error: WEBHOOK_SECRET is required", file=sys.stderr)
+        sys.exit(1)
+
+    register_metrics_hooks()
+    http_client = create_http_client()
+    response_cache = create_response_cache()
+    render_cache = create_render_cache(RENDER_CACHE_SIZE_DEFAULT)
+    message_index = create_message_index()
+    notifiers = create_digest_notifiers(
+        create_notifiers(
+            http_client,
+            render_cache=render_cache,
+            message_index=message_index,
+        ),
+    )
+    render_service = create_render_service(render_cache)
+    dispatcher = create_dispatcher()
+    outbox = create_outbox()
+    router = create_router(notifiers)
+
+    def handle_event(event_url: str) -> None:
+        interactor = get_interactor(event_url)(
+            github=create_github_gateway(event_url, http_client, response_cache),
+            notifiers=notifiers,
+            render_service=render_service,
+            dispatcher=dispatcher,
+            outbox=outbox,
+            router=router,
+        )
+        try:
+            interactor.handler()
+        except Exception as e:  # noqa: BLE001
+            # one failed event must not stop the server; it is reported
+            report_error(e)
+        else:
+            print(f"Delivered {event_url}")
+
+    actions = os.environ.get("WEBHOOK_ACTIONS")
+    server = WebhookServer(
+        handle_event=handle_event,
+        secret=secret,
+        host=os.environ.get("WEBHOOK_HOST", "0.0.0.0"),
+        port=int(os.environ.get("WEBHOOK_PORT", "8080")),
+        concurrency=int(os.environ.get("WEBHOOK_CONCURRENCY", "4")),
+        queue_size=int(os.environ.get("WEBHOOK_QUEUE_SIZE", "100")),
+        actions=actions.split(",") if actions else WEBHOOK_ACTIONS_DEFAULT,
+    )
+    host, port = server.address
+    print(f"Listening for GitHub webhooks on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        flushed = flush_digests(notifiers)
+        report_render_cache_stats(render_cache)
+        report_metrics()
+        http_client.close()
+        if outbox is not None:
+            outbox.close()
+        if message_index is not None:
+            message_index.close()
+    if not flushed:
+        sys.exit(1)